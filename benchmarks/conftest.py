@@ -0,0 +1,56 @@
+import pytest
+from flask import g
+
+from whiteboard.db import get_db
+
+from .seed import USERNAME, create_seeded_app, login
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('whiteboard benchmarks')
+    group.addoption('--bench-workouts', type=int, default=800,
+                    help='Workouts of the seeded database.')
+    group.addoption('--bench-scores', type=int, default=5000,
+                    help='Scores of the seeded database.')
+    group.addoption('--bench-values', type=int, default=10000,
+                    help='Values per call of the batch parser benchmarks.')
+
+
+@pytest.fixture(scope='session')
+def bench_config(request):
+    return {
+        'workouts': request.config.getoption('--bench-workouts'),
+        'scores': request.config.getoption('--bench-scores'),
+        'values': request.config.getoption('--bench-values'),
+    }
+
+
+@pytest.fixture(scope='session')
+def app(bench_config):
+    """An app on a database seeded once for all benchmarks."""
+    app, cleanup = create_seeded_app(
+        workouts=bench_config['workouts'], scores=bench_config['scores'],
+        tags=20,
+        # Time every page as a whole, not only the first page of 50
+        config={'WORKOUT_PAGE_SIZE': bench_config['workouts']})
+    yield app
+    cleanup()
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    """A test client logged in as the bench user."""
+    client = app.test_client()
+    response = login(client)
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def user_request(app):
+    """A request context of the bench user, like login_required sets up."""
+    with app.test_request_context():
+        g.user = get_db().execute(
+            'SELECT * FROM table_users WHERE name = ?', (USERNAME,)
+        ).fetchone()
+        yield g.user
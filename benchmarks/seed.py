@@ -0,0 +1,90 @@
+import os
+import random
+import tempfile
+
+from whiteboard import create_app
+from whiteboard.db import close_pool, get_db, init_db
+
+# bcrypt hash of the password 'secret', the same one used in tests/data.sql
+PASSWORD_HASH = '$2a$10$Q0X4lrRRIvWoLFoiX3CvAO/8fesQsnMR.tQxyBYjzuoSSm4W9IFKe'
+USERNAME = 'bench'
+PASSWORD = 'secret'
+
+
+# Create an app on a temporary database with a catalog of the given size.
+# Returns the app and a function to remove the database again.
+def create_seeded_app(workouts=800, tags_per_workout=2, scores=0,
+                      config=None, seed=0, tags=0):
+    db_fd, db_path = tempfile.mkstemp()
+    test_config = {'TESTING': True, 'DATABASE': db_path}
+    test_config.update(config or {})
+    app = create_app(test_config)
+
+    with app.app_context():
+        init_db()
+        seed_database(get_db(), workouts, tags_per_workout, scores, seed,
+                      tags)
+
+    def cleanup():
+        with app.app_context():
+            close_pool()
+        os.close(db_fd)
+        os.unlink(db_path)
+
+    return app, cleanup
+
+
+def seed_database(db, workouts, tags_per_workout, scores, seed=0, tags=0):
+    rand = random.Random(seed)
+    db.executemany(
+        'INSERT INTO table_users(name, password) VALUES (?, ?)',
+        (('admin', PASSWORD_HASH), (USERNAME, PASSWORD_HASH),)
+    )
+    # Custom tags of the bench user
+    db.executemany(
+        'INSERT INTO table_tags(userId, tag) VALUES (2, ?)',
+        (('Tag {:06d}'.format(i),) for i in range(tags))
+    )
+    tag_ids = [row[0] for row in db.execute('SELECT id FROM table_tags')]
+
+    db.executemany(
+        'INSERT INTO table_workout(userId, name, description, datetime)'
+        ' VALUES (1, ?, ?, 0)',
+        (('Workout {:06d}'.format(rand.randrange(10 ** 6)),
+          'For Time\n21-15-9\nThrusters\nPull-Ups\nWorkout {}'.format(i))
+         for i in range(workouts))
+    )
+    workout_ids = [row[0] for row in
+                   db.execute('SELECT id FROM table_workout')]
+
+    db.executemany(
+        'INSERT INTO table_workout_tags(workoutId, tagId) VALUES (?, ?)',
+        ((workout_id, tag_id)
+         for workout_id in workout_ids
+         for tag_id in rand.sample(tag_ids, tags_per_workout))
+    )
+
+    if scores and workout_ids:
+        values = [rand.randrange(60, 3600) for _ in range(scores)]
+        db.executemany(
+            'INSERT INTO table_workout_score'
+            '(userId, workoutId, score, scoreValue, scoreType, rx, datetime,'
+            ' note)'
+            ' VALUES (2, ?, ?, ?, 0, ?, ?, ?)',
+            ((workout_ids[i % len(workout_ids)],
+              str(values[i]),
+              values[i],
+              rand.randrange(2),
+              1500000000 + i * 3600,
+              'note {}'.format(i))
+             for i in range(scores))
+        )
+
+    db.commit()
+
+
+def login(client):
+    return client.post(
+        '/auth/login',
+        data={'username': USERNAME, 'password': PASSWORD}
+    )
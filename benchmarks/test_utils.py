@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from whiteboard.utils import (
+    datetime_to_sec, datetimes_to_sec, get_format_timestamp,
+    timestamp_to_sec, timestamps_to_sec
+)
+
+TIMEZONE = 'Europe/Berlin'
+
+
+@pytest.fixture(scope='module')
+def datetimes(bench_config):
+    rand = random.Random(0)
+    return ['{}.{}.{} {}:{:02}'.format(
+        rand.randrange(1, 29), rand.randrange(1, 13),
+        rand.randrange(2015, 2025), rand.randrange(24), rand.randrange(60))
+        for _ in range(bench_config['values'])]
+
+
+@pytest.fixture(scope='module')
+def timestamps(bench_config):
+    rand = random.Random(0)
+    return ['{}:{:02}:{:02}'.format(
+        rand.randrange(3), rand.randrange(60), rand.randrange(60))
+        for _ in range(bench_config['values'])]
+
+
+def test_timestamp_to_sec(benchmark, timestamps):
+    benchmark(lambda: [timestamp_to_sec(value) for value in timestamps])
+
+
+def test_timestamps_to_sec(benchmark, timestamps):
+    benchmark(timestamps_to_sec, timestamps)
+
+
+def test_datetime_to_sec(benchmark, datetimes):
+    benchmark(lambda: [datetime_to_sec(value, TIMEZONE)
+                       for value in datetimes])
+
+
+def test_datetimes_to_sec(benchmark, datetimes):
+    benchmark(datetimes_to_sec, datetimes, TIMEZONE)
+
+
+# A score list formats the same few dates again and again
+def test_get_format_timestamp(benchmark, bench_config):
+    seconds = [1500000000 + i % 100 * 3600
+               for i in range(bench_config['values'])]
+    benchmark(lambda: [get_format_timestamp(value, TIMEZONE)
+                       for value in seconds])
@@ -0,0 +1,59 @@
+import itertools
+
+import pytest
+from flask import session
+
+from whiteboard.db import get_db
+from whiteboard.views.user import get_user_prefs
+from whiteboard.views.workout import link_workouts_to_tags
+
+
+@pytest.fixture(scope='module')
+def workout_id(app):
+    # The scores are spread evenly, so any workout has its share
+    with app.app_context():
+        return get_db().execute(
+            'SELECT MIN(id) FROM table_workout').fetchone()[0]
+
+
+def test_link_workouts_to_tags(benchmark, bench_config):
+    size = bench_config['workouts']
+    workouts = [{'id': i, 'name': 'Workout {}'.format(i)}
+                for i in range(size)]
+    tags = [{'workoutId': i, 'tagId': j, 'tag': 'Tag {}'.format(j)}
+            for i in range(size) for j in range(2)]
+
+    benchmark(link_workouts_to_tags, workouts, tags)
+
+
+# Without the prefs in the session, i.e. the database read after a login
+def test_get_user_prefs(benchmark, user_request):
+    def run():
+        session.pop('prefs', None)
+        return get_user_prefs()
+
+    assert benchmark(run)['sortType'] == 0
+
+
+def test_workout_list(benchmark, client):
+    response = benchmark(client.get, '/workout/', buffered=True)
+    assert response.status_code == 200
+
+
+def test_workout_info(benchmark, client, workout_id):
+    response = benchmark(client.get, '/workout/{}'.format(workout_id),
+                         buffered=True)
+    assert response.status_code == 200
+
+
+def test_score_add(benchmark, client, workout_id):
+    notes = itertools.count()
+
+    def run():
+        return client.post(
+            '/workout/{}/score/add'.format(workout_id),
+            data={'score': '4:30', 'datetime': '1.1.2020 12:00',
+                  'note': 'bench {}'.format(next(notes))})
+
+    response = benchmark(run)
+    assert response.status_code == 302
@@ -0,0 +1,80 @@
+# Time to first byte and total time of the list pages, rendered in one
+# piece and streamed (STREAM_TEMPLATES).
+#
+# Run with: python -m benchmarks.ttfb [--sizes 1000 5000 20000]
+#
+# The workout list is rendered unpaged here, so both pages grow with the
+# size. Streamed, the time to first byte should stay flat.
+import argparse
+import time
+
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from .seed import create_seeded_app, login
+
+
+def measure(app, client, path, repeat):
+    best_first, best_total = None, None
+    for _ in range(repeat):
+        environ = EnvironBuilder(path=path).get_environ()
+        client.cookie_jar.inject_wsgi(environ)
+
+        start = time.perf_counter()
+        app_iter, status, headers = run_wsgi_app(app, environ)
+        try:
+            # The first chunk is the one the browser starts working on
+            for chunk in app_iter:
+                if chunk:
+                    break
+            first = time.perf_counter() - start
+            for chunk in app_iter:
+                pass
+            total = time.perf_counter() - start
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        assert status.startswith('200'), status
+        best_first = first if best_first is None else min(best_first, first)
+        best_total = total if best_total is None else min(best_total, total)
+
+    return best_first, best_total
+
+
+def bench(size, stream, repeat):
+    app, cleanup = create_seeded_app(
+        workouts=size, tags=size,
+        config={'STREAM_TEMPLATES': stream, 'WORKOUT_PAGE_SIZE': size})
+    try:
+        client = app.test_client()
+        login(client)
+        results = {}
+        for path in ('/workout/', '/tag/'):
+            client.get(path)  # warm up
+            results[path] = measure(app, client, path, repeat)
+
+        return results
+    finally:
+        cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>8} {:>10} {:>10} {:>14} {:>14}'.format(
+        'rows', 'page', 'mode', 'ttfb [ms]', 'total [ms]'))
+    for size in args.sizes:
+        for stream in (False, True):
+            results = bench(size, stream, args.repeat)
+            for path, (first, total) in results.items():
+                print('{:>8} {:>10} {:>10} {:>14.2f} {:>14.2f}'.format(
+                    size, path, 'stream' if stream else 'buffered',
+                    first * 1e3, total * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# CPU time of the workout list for growing catalog sizes.
+#
+# Run with: python -m benchmarks.workout_list [--sizes 500 1000 2000]
+#
+# Both link_workouts_to_tags and the full /workout/ request should show a
+# roughly constant cost per workout, i.e. linear scaling. The page size is
+# the catalog size, so the request renders every workout, and the streamed
+# body is read completely.
+import argparse
+import time
+
+from whiteboard.views.workout import link_workouts_to_tags
+
+from .seed import create_seeded_app, login
+
+
+def cpu_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def bench_link_workouts_to_tags(size, tags_per_workout=2, repeat=5):
+    workouts = [{'id': i, 'name': 'Workout {}'.format(i)}
+                for i in range(size)]
+    tags = [{'workoutId': i, 'tagId': j, 'tag': 'Tag {}'.format(j)}
+            for i in range(size) for j in range(tags_per_workout)]
+
+    return cpu_time(lambda: link_workouts_to_tags(workouts, tags), repeat)
+
+
+def bench_list_view(size, repeat=5):
+    app, cleanup = create_seeded_app(
+        workouts=size, config={'WORKOUT_PAGE_SIZE': size})
+    try:
+        client = app.test_client()
+        login(client)
+        client.get('/workout/').data  # warm up
+
+        return cpu_time(lambda: client.get('/workout/').data, repeat)
+    finally:
+        cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[500, 1000, 2000, 4000, 8000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>8} {:>16} {:>12} {:>16} {:>12}'.format(
+        'workouts', 'link_tags [ms]', 'per row [us]',
+        '/workout/ [ms]', 'per row [us]'))
+    for size in args.sizes:
+        link = bench_link_workouts_to_tags(size, repeat=args.repeat)
+        view = bench_list_view(size, repeat=args.repeat)
+        print('{:>8} {:>16.2f} {:>12.2f} {:>16.2f} {:>12.2f}'.format(
+            size, link * 1e3, link / size * 1e6,
+            view * 1e3, view / size * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,58 @@
 DEBUG = False
 SECRET_KEY = 'dev'  # Be shure to overload it by instance/config.py
 DATABASE = 'instance/whiteboard.sqlite'
-BCRYPT_LOG_ROUNDS = 12  # Configuration for the Flask-Bcrypt extension
-TIMEZONE = 'Europe/Berlin'
+# Connections kept open per worker process and the seconds a request waits
+# for a free one before giving up
+DATABASE_POOL_SIZE = 4
+DATABASE_POOL_TIMEOUT = 5.0
+# Applied once to every new connection (PRAGMA <key> = <value>)
+DATABASE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -8000,  # negative values are KiB, so 8 MB page cache
+    'mmap_size': 67108864,  # 64 MB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,  # ms
+}
+WORKOUT_PAGE_SIZE = 50  # Workouts per page in the workout list
+SEARCH_PAGE_SIZE = 20  # Results per page of the workout search
+LEADERBOARD_PAGE_SIZE = 50  # Entries per page of a leaderboard
+# Send list pages while rendering them, STREAM_BUFFER_SIZE is the number of
+# template chunks joined into one write
+STREAM_TEMPLATES = True
+STREAM_BUFFER_SIZE = 8
+# Report the hits and misses of the request scoped identity map in the
+# X-Identity-Map response header
+IDENTITY_MAP_STATS = False
+# Bytes of rendered list rows kept in the fragment cache of each worker
+# process, 0 disables it
+FRAGMENT_CACHE_SIZE = 8388608  # 8 MB
+SCORE_HISTORY_POINTS = 500  # Max. points of the score chart
+# Scores inserted per transaction by the importer and errors reported
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ERRORS = 100
+# Characters per chunk of a data export, and the pages copied per step of a
+# database backup with the seconds to sleep in between
+EXPORT_CHUNK_SIZE = 65536
+BACKUP_PAGES = 256
+BACKUP_SLEEP = 0.01
+BCRYPT_LOG_ROUNDS = 12  # Cost of the password hashes
+# Seconds the user identity cached in the session is trusted before it is
+# checked against the database again
+AUTH_CHECK_INTERVAL = 60
+# Processes hashing the passwords (0 hashes in the request thread), the
+# hashes running or waiting before logins are rejected with 429 and the
+# seconds a request waits for its hash
+HASH_POOL_WORKERS = 2
+HASH_POOL_QUEUE_SIZE = 8
+HASH_POOL_TIMEOUT = 10.0
+# Content codings of the compressed responses by preference (br and zstd
+# need the optional brotli and zstandard packages), their levels, the
+# bytes below which a response is sent as is and the compressed mimetypes
+COMPRESS_CODINGS = ('br', 'zstd', 'gzip')
+COMPRESS_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+COMPRESS_MIN_SIZE = 500
+COMPRESS_MIMETYPES = ('text/html', 'application/json', 'text/csv',
+                      'application/x-ndjson')
+SYNC_PAGE_SIZE = 500  # Changes per response of /sync
+TIMEZONE = 'Europe/Berlin'  # Default timezone of users without one set
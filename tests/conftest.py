@@ -2,13 +2,23 @@ import os
 import tempfile
 
 import pytest
+from flask.testing import FlaskClient
 from whiteboard import create_app
-from whiteboard.db import get_db, init_db
+from whiteboard.db import close_pool, get_db, init_db
+from whiteboard.hashing import close_hash_pool
 
 with open(os.path.join(os.path.dirname(__file__), 'data.sql'), 'rb') as f:
     _data_sql = f.read().decode('utf8')
 
 
+class BufferedClient(FlaskClient):
+    """Read streamed responses to the end like a WSGI server does."""
+
+    def open(self, *args, **kwargs):
+        kwargs.setdefault('buffered', True)
+        return super().open(*args, **kwargs)
+
+
 @pytest.fixture
 def app():
     """Create and configure a new app instance for each test."""
@@ -19,7 +29,11 @@ def app():
     app = create_app({
         'TESTING': True,
         'DATABASE': db_path,
+        # Spawning the hash processes for every test takes too long,
+        # tests/test_hashing.py covers them
+        'HASH_POOL_WORKERS': 0,
     })
+    app.test_client_class = BufferedClient
 
     # create the database and load test data
     with app.app_context():
@@ -28,7 +42,10 @@ def app():
 
     yield app
 
-    # close and remove the temporary database
+    # close the pools and remove the temporary database
+    with app.app_context():
+        close_pool()
+        close_hash_pool()
     os.close(db_fd)
     os.unlink(db_path)
 
@@ -14,13 +14,21 @@ VALUES
   (3, 'Workout B from test2', 'Workout B description from test2', 0);
 
 
-INSERT INTO table_workout_score(userId, workoutId, score, rx, datetime, note)
+INSERT INTO table_workout_score
+  (userId, workoutId, score, scoreValue, scoreType, rx, datetime, note)
 VALUES
-  (2, 1, 80, 1, 1605114000, 'note 1 for workout A from admin'),
-  (2, 3, 100, 1, 1605114000, 'note 1 for workout A from test1'),
-  (2, 3, 120, 1, 1605114000, 'note 2 for workout A from test1'),
-  (2, 4, 140, 0, 1605114000, 'note 1 for workout B from test1'),
-  (3, 1, 80, 1, 1605114000, 'note 1 for workout A from admin');
+  (2, 1, 80, 80, 0, 1, 1605114000, 'note 1 for workout A from admin'),
+  (2, 3, 100, 100, 0, 1, 1605114000, 'note 1 for workout A from test1'),
+  (2, 3, 120, 120, 0, 1, 1605114000, 'note 2 for workout A from test1'),
+  (2, 4, 140, 140, 0, 0, 1605114000, 'note 1 for workout B from test1'),
+  (3, 1, 80, 80, 0, 1, 1605114000, 'note 1 for workout A from admin');
+
+INSERT INTO table_workout_records
+VALUES
+  (2, 1, 1, 1, 1, 80, 80, 0, -80, 1, 1605114000, 1, 80, 80, 1, 1605114000),
+  (2, 3, 2, 2, 3, 120, 120, 0, -120, 1, 1605114000, 3, 120, 120, 1, 1605114000),
+  (2, 4, 1, 0, 4, 140, 140, 0, -140, 0, 1605114000, 4, 140, 140, 0, 1605114000),
+  (3, 1, 1, 1, 5, 80, 80, 0, -80, 1, 1605114000, 5, 80, 80, 1, 1605114000);
 
 INSERT INTO table_equipment(equipment)
 VALUES
@@ -1,5 +1,6 @@
 import pytest
 from flask import g, session
+from whiteboard.db import get_db
 
 
 def test_login(client, auth):
@@ -86,3 +87,64 @@ def test_passwd_udpate_validate_input(client, auth, password1, password2, messag
         data={'password1': password1, 'password2': password2}
     )
     assert message in response.data
+
+
+# The identity is read from the session until it is checked again
+def test_session_identity(app, client, auth):
+    auth.login()
+
+    with app.app_context():
+        db = get_db()
+        db.execute('UPDATE table_users SET name = ? WHERE id = 2', ('x',))
+        db.commit()
+
+    with client:
+        client.get('/')
+        assert g.user == {'id': 2, 'name': 'test1'}
+
+    app.config['AUTH_CHECK_INTERVAL'] = 0
+    with client:
+        client.get('/')
+        assert g.user == {'id': 2, 'name': 'x'}
+        assert session['user_name'] == 'x'
+
+
+def test_session_identity_deleted_user(app, client, auth):
+    auth.login()
+    app.config['AUTH_CHECK_INTERVAL'] = 0
+
+    with app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM table_users WHERE id = 2')
+        db.commit()
+
+    with client:
+        response = client.get('/workout/')
+        assert response.status_code == 302
+        assert g.user is None
+        assert 'user_id' not in session
+
+
+# A password change logs out the other sessions of the user
+def test_passwd_update_logout_others(app, client, auth):
+    other = app.test_client()
+    other.post('/auth/login', data={'username': 'test1', 'password': 'secret'})
+    auth.login()
+    app.config['AUTH_CHECK_INTERVAL'] = 0
+
+    client.post(
+        '/auth/passwd/update',
+        data={'password1': '123456', 'password2': '123456'}
+    )
+    assert client.get('/workout/').status_code == 200
+    response = other.get('/workout/')
+    assert response.headers['Location'].endswith('/auth/login')
+
+
+def test_static_skips_user(client, auth):
+    auth.login()
+
+    with client:
+        response = client.get('/static/css/style.css')
+        assert response.status_code == 200
+        assert g.user is None
@@ -0,0 +1,116 @@
+import gzip
+import json
+import os
+import shutil
+
+import pytest
+from whiteboard import bundles
+
+
+@pytest.fixture
+def static_folder(app, tmp_path):
+    """A copy of the static folder to build the assets in."""
+    folder = str(tmp_path / 'static')
+    shutil.copytree(app.static_folder, folder,
+                    ignore=shutil.ignore_patterns(bundles.ASSETS_DIR))
+    app.static_folder = folder
+    return folder
+
+
+@pytest.fixture
+def built(app, runner, static_folder):
+    result = runner.invoke(args=['build-assets'])
+    assert result.exit_code == 0
+    with app.app_context():
+        return bundles.get_manifest()
+
+
+def test_build_assets(built, static_folder):
+    assert sorted(built) == sorted(bundles.BUNDLES)
+    assert built['css/app.css'].startswith('dist/css/app.')
+
+    with open(os.path.join(static_folder, 'dist', 'manifest.json')) as f:
+        assert json.load(f) == built
+
+    for name in built:
+        path = os.path.join(static_folder, built[name])
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path + '.gz', 'rb') as f:
+            assert gzip.decompress(f.read()) == data
+        if bundles.brotli is not None:
+            with open(path + '.br', 'rb') as f:
+                assert bundles.brotli.decompress(f.read()) == data
+
+
+# The same sources give the same names
+def test_build_assets_reproducible(app, built):
+    with app.app_context():
+        assert bundles.build_assets() == built
+
+
+def test_asset_urls_not_built(client, auth):
+    response = client.get('/auth/login')
+    assert b'/static/css/lib/w3pro.css' in response.data
+    assert b'/static/css/style.css' in response.data
+    assert b'/static/js/lib/Chart.min.js' in response.data
+
+    auth.login()
+    response = client.get('/workout/')
+    assert b'/static/js/sidebar.js' in response.data
+    assert b'/static/js/workout/handle_dialog.js' in response.data
+
+
+def test_asset_urls_built(client, auth, built):
+    response = client.get('/auth/login')
+    assert built['css/app.css'].encode() in response.data
+    assert built['js/lib/Chart.min.js'].encode() in response.data
+    assert b'/static/css/style.css' not in response.data
+
+    auth.login()
+    response = client.get('/workout/')
+    assert built['js/app.js'].encode() in response.data
+    assert built['js/workout/list.js'].encode() in response.data
+    assert b'/static/js/sidebar.js' not in response.data
+
+
+# Pages rendered with other asset names aren't answered with 304
+def test_etag_changes_with_assets(client, auth, runner, static_folder):
+    auth.login()
+    etag = client.get('/workout/').get_etag()[0]
+
+    assert runner.invoke(args=['build-assets']).exit_code == 0
+    response = client.get(
+        '/workout/', headers={'If-None-Match': '"' + etag + '"'})
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+
+
+@pytest.mark.parametrize(('accept', 'encoding'), (
+    ('', None),
+    ('gzip', 'gzip'),
+    ('gzip, deflate, br', 'br'),
+    ('br;q=0, gzip', 'gzip'),
+))
+def test_send_built_asset(client, built, accept, encoding):
+    if encoding == 'br' and bundles.brotli is None:
+        pytest.skip('Brotli is not installed.')
+
+    response = client.get('/static/' + built['css/app.css'],
+                          headers={'Accept-Encoding': accept})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/css'
+    assert response.headers.get('Content-Encoding') == encoding
+    assert 'Accept-Encoding' in response.vary
+    assert response.cache_control.max_age == bundles.MAX_AGE
+    assert response.cache_control.immutable
+    if encoding is None:
+        assert b'.w3-modal' in response.data
+
+
+def test_send_static_unchanged(client, built):
+    response = client.get('/static/css/style.css',
+                          headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert not response.cache_control.immutable
@@ -0,0 +1,113 @@
+import pytest
+from flask import g
+from whiteboard.catalog import Catalog, get_catalog
+from whiteboard.db import get_db
+
+
+def get_fresh_catalog(app):
+    with app.app_context():
+        return get_catalog()
+
+
+def test_get_catalog(app):
+    catalog = get_fresh_catalog(app)
+    assert [workout['name'] for workout in catalog.workouts] == [
+        'Workout A from admin', 'Workout B from admin']
+    assert {'tagId': 15, 'tag': 'Tag A from admin'} in catalog.get(1)['tags']
+    assert {'tagId': 16, 'tag': 'Tag B from admin'} in catalog.get(1)['tags']
+    assert catalog.get(3) is None
+
+    # The catalog is reused as long as the version doesn't change
+    assert get_fresh_catalog(app) is catalog
+
+
+def test_get_catalog_once_per_request(app):
+    with app.app_context():
+        catalog = get_catalog()
+        assert g.catalog is catalog
+        get_db().execute(
+            'UPDATE table_workout SET name = ? WHERE id = 1', ('Renamed',))
+        assert get_catalog() is catalog
+
+
+@pytest.mark.parametrize(('statement'), (
+    ('UPDATE table_workout SET name = "Renamed" WHERE id = 1'),
+    ('DELETE FROM table_workout WHERE id = 2'),
+    ('INSERT INTO table_workout(userId, name, description, datetime)'
+     ' VALUES (1, "Workout C from admin", "", 0)'),
+    ('INSERT INTO table_workout_tags(workoutId, tagId) VALUES (1, 17)'),
+    ('DELETE FROM table_workout_tags WHERE workoutId = 1'),
+    ('UPDATE table_workout_tags SET workoutId = 1 WHERE workoutId = 3'),
+    ('UPDATE table_tags SET tag = "Renamed" WHERE id = 15'),
+    ('DELETE FROM table_tags WHERE id = 15'),
+))
+def test_catalog_version_bump(app, statement):
+    catalog = get_fresh_catalog(app)
+
+    with app.app_context():
+        db = get_db()
+        db.execute(statement)
+        db.commit()
+
+    reloaded = get_fresh_catalog(app)
+    assert reloaded is not catalog
+    assert reloaded.version > catalog.version
+
+
+@pytest.mark.parametrize(('statement'), (
+    ('UPDATE table_workout SET name = "Renamed" WHERE id = 3'),
+    ('DELETE FROM table_workout WHERE id = 4'),
+    ('INSERT INTO table_workout(userId, name, description, datetime)'
+     ' VALUES (2, "Workout C from test1", "", 0)'),
+    ('UPDATE table_tags SET tag = "Renamed" WHERE id = 20'),
+    # Tags of custom workouts
+    ('INSERT INTO table_workout_tags(workoutId, tagId) VALUES (3, 20)'),
+    ('UPDATE table_workout_tags SET workoutId = 4 WHERE workoutId = 3'),
+    ('DELETE FROM table_workout_tags WHERE workoutId = 3'),
+    ('INSERT INTO table_workout_score(userId, workoutId, score)'
+     ' VALUES (2, 1, "100")'),
+))
+def test_catalog_version_unchanged(app, statement):
+    catalog = get_fresh_catalog(app)
+
+    with app.app_context():
+        db = get_db()
+        db.execute(statement)
+        db.commit()
+
+    assert get_fresh_catalog(app) is catalog
+
+
+def test_catalog_update_from_view(client, auth):
+    auth.login_admin()
+    client.post(
+        '/workout/1/update',
+        data={'name': 'Renamed from admin', 'description': 'Renamed'}
+    )
+
+    auth.login()
+    response = client.get('/workout/')
+    assert b'Renamed from admin' in response.data
+    assert b'Workout A from admin' not in response.data
+
+
+@pytest.mark.parametrize(('after', 'ascending', 'limit', 'ids'), (
+    (None, True, 10, [1, 2, 3, 4]),
+    (None, True, 2, [1, 2]),
+    (['b', 2], True, 10, [3, 4]),
+    (['b', 3], True, 10, [4]),
+    (['c', 4], True, 10, []),
+    (None, False, 10, [4, 3, 2, 1]),
+    (None, False, 2, [4, 3]),
+    (['b', 3], False, 10, [2, 1]),
+    (['a', 1], False, 10, []),
+))
+def test_catalog_page(after, ascending, limit, ids):
+    catalog = Catalog(1, [
+        {'id': 1, 'name': 'a'},
+        {'id': 2, 'name': 'b'},
+        {'id': 3, 'name': 'b'},
+        {'id': 4, 'name': 'c'},
+    ])
+    assert [workout['id'] for workout in
+            catalog.page(after, ascending, limit)] == ids
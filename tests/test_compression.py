@@ -0,0 +1,235 @@
+import gzip
+import shutil
+
+import pytest
+from werkzeug.datastructures import Headers
+from whiteboard import bundles, compression
+from whiteboard.compression import (
+    CompressionMiddleware, add_vary, get_compression_stats, strip_etag_suffix
+)
+
+
+def decompress(coding, data):
+    if coding == 'br':
+        return compression.brotli.decompress(data)
+    if coding == 'zstd':
+        return compression.zstandard.ZstdDecompressor().decompressobj(
+        ).decompress(data)
+    return gzip.decompress(data)
+
+
+def skip_missing(coding):
+    if coding not in compression.COMPRESSORS:
+        pytest.skip('{} is not installed.'.format(coding))
+
+
+@pytest.mark.parametrize(('accept', 'coding'), (
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('gzip, deflate, br', 'br'),
+    ('gzip, zstd', 'zstd'),
+    ('br;q=0.5, gzip', 'gzip'),
+    ('br;q=0, zstd;q=0, *', 'gzip'),
+    ('*', 'br'),
+))
+def test_negotiate(accept, coding):
+    middleware = CompressionMiddleware(None)
+    if coding is not None:
+        skip_missing(coding)
+    assert middleware.negotiate(accept) == coding
+
+
+@pytest.mark.parametrize(('coding'), ('gzip', 'br', 'zstd'))
+@pytest.mark.parametrize(('stream'), (True, False))
+def test_compress_list(app, client, auth, coding, stream):
+    skip_missing(coding)
+    app.config['STREAM_TEMPLATES'] = stream
+    auth.login()
+    plain = client.get('/workout/')
+    assert 'Content-Encoding' not in plain.headers
+
+    response = client.get('/workout/', headers={'Accept-Encoding': coding})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == coding
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_etag()[0] == plain.get_etag()[0] + '-' + coding
+    # Only a page rendered as a whole has a known length
+    assert (response.content_length is None) == stream
+    assert decompress(coding, response.data) == plain.data
+
+
+def test_compress_export(client, auth):
+    auth.login()
+    plain = client.get('/data/export')
+    response = client.get('/data/export',
+                          headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+
+
+@pytest.mark.parametrize(('path', 'min_size', 'vary'), (
+    # Below the min. size
+    ('/auth/login', 1 << 20, True),
+    # Redirect
+    ('/workout/', 0, True),
+    # Not compressed mimetype
+    ('/static/css/style.css', 0, False),
+))
+def test_skip(app, client, path, min_size, vary):
+    app.extensions['whiteboard_compression'].min_size = min_size
+    response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert ('Accept-Encoding' in response.vary) == vary
+    assert get_compression_stats(app)['skipped'] == 1
+    assert get_compression_stats(app)['compressed'] == 0
+
+
+# The plain page varies with the Accept-Encoding header too
+@pytest.mark.parametrize(('accept'), ('', 'identity'))
+def test_skip_not_accepted(client, auth, accept):
+    auth.login()
+    response = client.get('/workout/', headers={'Accept-Encoding': accept})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_skip_head(client, auth):
+    auth.login()
+    response = client.head('/workout/', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+
+
+# The built assets are precompressed already
+def test_skip_built_asset(app, client, runner, tmp_path):
+    folder = str(tmp_path / 'static')
+    shutil.copytree(app.static_folder, folder,
+                    ignore=shutil.ignore_patterns(bundles.ASSETS_DIR))
+    app.static_folder = folder
+    assert runner.invoke(args=['build-assets']).exit_code == 0
+    with app.app_context():
+        built = bundles.get_manifest()['js/app.js']
+
+    response = client.get('/static/' + built,
+                          headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'sidebar' in gzip.decompress(response.data)
+    assert get_compression_stats(app)['compressed'] == 0
+
+
+def test_etag_not_modified(client, auth):
+    auth.login()
+    headers = {'Accept-Encoding': 'gzip'}
+    etag = client.get('/workout/', headers=headers).get_etag()[0]
+    assert etag.endswith('-gzip')
+
+    headers['If-None-Match'] = '"{}"'.format(etag)
+    response = client.get('/workout/', headers=headers)
+    assert response.status_code == 304
+    assert response.get_etag() == (etag, False)
+    assert 'Accept-Encoding' in response.vary
+
+    # The plain ETag matches the same body
+    headers['If-None-Match'] = '"{}"'.format(etag[:-len('-gzip')])
+    response = client.get('/workout/', headers=headers)
+    assert response.status_code == 304
+
+
+def test_stats(app, client, auth):
+    auth.login()
+    client.get('/workout/', headers={'Accept-Encoding': 'gzip'})
+    stats = get_compression_stats(app)
+    assert stats['compressed'] == 1
+    assert stats['bytes_out'] > 0
+    assert stats['bytes_saved'] == stats['bytes_in'] - stats['bytes_out']
+    assert stats['bytes_saved'] > stats['bytes_out']
+    assert stats['cpu_time'] >= 0
+
+
+# A plain WSGI app, which starts the response with the first chunk only
+def test_lazy_start_response():
+    closed = []
+
+    class Body(object):
+        def __init__(self, environ, start_response):
+            self.start_response = start_response
+
+        def __iter__(self):
+            self.start_response('200 OK', [('Content-Type', 'text/html')])
+            for _ in range(100):
+                yield b'<li class="w3-bar">Workout</li>\n'
+
+        def close(self):
+            closed.append(True)
+
+    middleware = CompressionMiddleware(Body, codings=('gzip',))
+    started = []
+    body = middleware(
+        {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'gzip'},
+        lambda status, headers, exc_info=None: started.append(headers))
+    data = b''.join(body)
+    body.close()
+
+    assert dict(started[0])['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(data) == b'<li class="w3-bar">Workout</li>\n' * 100
+    assert closed == [True]
+
+
+# A WSGI app writing (part of) its body with the legacy write() callable
+@pytest.mark.parametrize(('accept'), ('gzip', ''))
+def test_legacy_write(accept):
+    def app(environ, start_response):
+        write = start_response('200 OK', [('Content-Type', 'text/html')])
+        for _ in range(50):
+            write(b'<li class="w3-bar">Written</li>\n')
+        return [b'<li class="w3-bar">Returned</li>\n'] * 50
+
+    middleware = CompressionMiddleware(app, codings=('gzip',))
+    started = []
+    data = []
+
+    def start_response(status, headers, exc_info=None):
+        started.append(dict(headers))
+        return data.append
+
+    data.extend(middleware(
+        {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': accept},
+        start_response))
+    data = b''.join(data)
+
+    if accept:
+        assert started[0]['Content-Encoding'] == 'gzip'
+        data = gzip.decompress(data)
+    assert data == (b'<li class="w3-bar">Written</li>\n' * 50
+                    + b'<li class="w3-bar">Returned</li>\n' * 50)
+
+
+@pytest.mark.parametrize(('header', 'expected', 'coding'), (
+    (None, None, None),
+    ('"abc"', '"abc"', None),
+    ('"abc-gzip"', '"abc"', 'gzip'),
+    ('W/"abc-br", "def-zstd"', 'W/"abc", "def"', 'zstd'),
+))
+def test_strip_etag_suffix(header, expected, coding):
+    environ = {}
+    if header is not None:
+        environ['HTTP_IF_NONE_MATCH'] = header
+    assert strip_etag_suffix(environ) == coding
+    assert environ.get('HTTP_IF_NONE_MATCH') == expected
+
+
+@pytest.mark.parametrize(('vary', 'expected'), (
+    (None, 'Accept-Encoding'),
+    ('Cookie', 'Cookie, Accept-Encoding'),
+    ('accept-encoding', 'accept-encoding'),
+))
+def test_add_vary(vary, expected):
+    headers = Headers()
+    if vary is not None:
+        headers['Vary'] = vary
+    add_vary(headers)
+    assert headers['Vary'] == expected
@@ -0,0 +1,150 @@
+import pytest
+from werkzeug.http import http_date
+from whiteboard.db import get_db
+from whiteboard.utils import get_format_timestamp
+
+
+@pytest.mark.parametrize(('path'), (
+    ('/workout/'),
+    ('/workout/3'),
+    ('/tag/'),
+    ('/movement/'),
+    ('/equipment/'),
+))
+def test_etag(client, auth, path):
+    auth.login()
+    response = client.get(path)
+    assert response.status_code == 200
+    etag, weak = response.get_etag()
+    assert etag and not weak
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    response = client.get(path, headers={'If-None-Match': '"' + etag + '"'})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.get_etag() == (etag, False)
+
+    response = client.get(path, headers={'If-None-Match': '"other"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(('path', 'data'), (
+    ('/workout/add', {'name': 'Fran', 'description': '21-15-9'}),
+    ('/workout/3/update', {'name': 'Fran', 'description': '21-15-9'}),
+    ('/workout/3/delete', None),
+    ('/workout/3/score/add',
+     {'score': '100', 'datetime': '14.02.2009 00:31', 'note': ''}),
+    ('/workout/3/score/2/update',
+     {'score': '100', 'datetime': '14.02.2009 00:31', 'note': ''}),
+    ('/workout/3/score/2/delete', None),
+    ('/tag/add', {'tag': 'Tag C from test1'}),
+    ('/tag/20/update', {'tag': 'Tag C from test1'}),
+    ('/tag/20/delete', None),
+    ('/user/prefs/update/workout/', {'inputSort': '1', 'inputFilter': '0'}),
+))
+def test_etag_changes_on_write(client, auth, path, data):
+    auth.login()
+    etag = client.get('/workout/').get_etag()[0]
+
+    if data is None:
+        client.get(path)
+    else:
+        client.post(path, data=data)
+
+    response = client.get(
+        '/workout/', headers={'If-None-Match': '"' + etag + '"'})
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+
+
+def test_etag_other_users(client, auth):
+    auth.login()
+    etag = client.get('/workout/').get_etag()[0]
+
+    # Custom data of other users doesn't matter
+    auth.login_admin()
+    client.post('/tag/add', data={'tag': 'Tag F from admin'})
+    auth.login()
+    response = client.get(
+        '/workout/', headers={'If-None-Match': '"' + etag + '"'})
+    assert response.status_code == 304
+
+    # Changes of the default catalog do
+    auth.login_admin()
+    client.post(
+        '/workout/1/update', data={'name': 'Fran', 'description': '21-15-9'})
+    auth.login()
+    response = client.get(
+        '/workout/', headers={'If-None-Match': '"' + etag + '"'})
+    assert response.status_code == 200
+
+
+def test_etag_per_page(client, auth):
+    auth.login()
+    etags = {
+        client.get('/workout/').get_etag()[0],
+        client.get('/workout/3').get_etag()[0],
+        client.get('/workout/4').get_etag()[0],
+        client.get('/workout/?after=abc').get_etag()[0],
+        client.get('/tag/').get_etag()[0],
+    }
+    assert len(etags) == 5
+
+
+def test_last_modified(client, auth, app):
+    auth.login()
+    response = client.get('/workout/')
+    last_modified = response.headers['Last-Modified']
+
+    response = client.get(
+        '/workout/', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            'UPDATE table_users'
+            ' SET dataModified = (SELECT modified FROM table_catalog_version)'
+            ' + 60'
+        )
+        db.commit()
+
+    response = client.get(
+        '/workout/', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+    assert response.headers['Last-Modified'] != last_modified
+
+
+def test_flashed_messages(client, auth):
+    auth.login()
+    etag = client.get('/workout/').get_etag()[0]
+
+    # The error is flashed on the next page, which has to be rendered
+    client.get('/workout/99/delete')
+    response = client.get(
+        '/workout/', headers={'If-None-Match': '"' + etag + '"'})
+    assert response.status_code == 200
+    assert b'User or Workout ID is invalid.' in response.data
+
+
+# The default datetime of a new score is filled in by the browser, the
+# page itself doesn't change with the time
+def test_workout_page_without_time(client, auth):
+    auth.login()
+    response = client.get('/workout/3')
+    assert b'data-timezone="Europe/Berlin"' in response.data
+    assert get_format_timestamp(
+        timezone='Europe/Berlin').encode() not in response.data
+
+
+def test_redirect(client, auth):
+    auth.login()
+    response = client.get('/workout/99')
+    assert response.status_code == 302
+    assert 'ETag' not in response.headers
+
+
+def test_nologin(client):
+    response = client.get(
+        '/workout/', headers={'If-Modified-Since': http_date(0)})
+    assert response.status_code == 302
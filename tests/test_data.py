@@ -0,0 +1,279 @@
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+from whiteboard.db import get_db
+
+CSV = (
+    'workout,score,datetime,rx,note\n'
+    'Workout A from admin,100,14.02.2009 00:31,1,first\n'
+    'Workout A from test1,2:30,14.02.2009 00:31,0,\n'
+    'Workout A from test2,100,14.02.2009 00:31,1,\n'
+    'Workout B from test1,abc,14.02.2009 00:31,1,\n'
+    'Workout B from test1,100,14.02.2009,1,\n'
+    ',100,14.02.2009 00:31,1,\n'
+    'Workout B from test1,100,31.02.2009 00:31,1,\n'
+    'Workout B from test1,\u00b2,14.02.2009 00:31,1,\n'
+    'Workout B from test1,99.5,1234567860,yes,"multi\nline"\n'
+)
+NDJSON = '\n'.join((
+    json.dumps({'workout': 'Workout A from admin', 'score': '100',
+                'datetime': '14.02.2009 00:31', 'rx': True}),
+    '',
+    'not json',
+    json.dumps(['Workout A from admin', '100']),
+    json.dumps({'workout': 'Workout B from test1', 'score': 120,
+                'datetime': '14.02.2009 00:31'}),
+))
+ERRORS = [
+    {'line': 4, 'message': 'Workout is invalid.'},
+    {'line': 5, 'message': 'Score is invalid.'},
+    {'line': 6, 'message': 'Datetime is invalid.'},
+    {'line': 7, 'message': 'Workout is required.'},
+    {'line': 8, 'message': 'Datetime is invalid.'},
+    {'line': 9, 'message': 'Score is invalid.'},
+]
+
+
+def get_imported(app):
+    with app.app_context():
+        return [tuple(score) for score in get_db().execute(
+            'SELECT userId, workoutId, score, scoreValue, scoreType, rx,'
+            ' datetime, note FROM table_workout_score WHERE id > 5'
+            ' ORDER BY id'
+        ).fetchall()]
+
+
+def test_import_csv_file(app, client, auth):
+    auth.login()
+    response = client.post('/data/import', data={
+        'file': (io.BytesIO(CSV.encode('utf-8')), 'scores.csv'),
+    })
+    assert response.status_code == 200
+    assert response.json == {
+        'imported': 3, 'error_count': 6, 'errors': ERRORS}
+    assert get_imported(app) == [
+        (2, 1, '100', 100, 0, 1, 1234567860, 'first'),
+        (2, 3, '2:30', 9000, 1, 0, 1234567860, ''),
+        (2, 4, '99.5', 99.5, 0, 1, 1234567860, 'multi\nline'),
+    ]
+
+    # The records include the imported scores
+    with app.app_context():
+        record = get_db().execute(
+            'SELECT attempts, bestScore FROM table_workout_records'
+            ' WHERE userId = 2 AND workoutId = 1'
+        ).fetchone()
+        assert tuple(record) == (2, '100')
+
+
+# The rows before the invalid UTF-8 are imported, the rest isn't read
+def test_import_invalid_encoding(app, client, auth):
+    app.config['IMPORT_BATCH_SIZE'] = 100
+    rows = ''.join('Workout A from test1,{},14.02.2009 00:31\n'.format(i)
+                   for i in range(2000))
+    auth.login()
+    response = client.post(
+        '/data/import',
+        data=('workout,score,datetime\n' + rows).encode('utf-8') +
+        b'Workout A from test1,\xb2,14.02.2009 00:31\n',
+        content_type='text/csv')
+    assert response.status_code == 200
+
+    imported = response.json['imported']
+    assert 0 < imported < 2000
+    assert response.json['errors'] == [
+        {'line': imported + 2, 'message': 'Encoding is invalid.'}]
+    assert [score[2] for score in get_imported(app)] == [
+        str(i) for i in range(imported)]
+
+
+def test_import_ndjson_body(app, client, auth):
+    auth.login()
+    response = client.post(
+        '/data/import', data=NDJSON.encode('utf-8'),
+        content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.json == {'imported': 2, 'error_count': 2, 'errors': [
+        {'line': 3, 'message': 'Row is invalid.'},
+        {'line': 4, 'message': 'Row is invalid.'},
+    ]}
+    assert get_imported(app) == [
+        (2, 1, '100', 100, 0, 1, 1234567860, ''),
+        (2, 4, '120', 120, 0, 0, 1234567860, ''),
+    ]
+
+
+def test_import_batches(app, client, auth):
+    app.config['IMPORT_BATCH_SIZE'] = 2
+    app.config['IMPORT_MAX_ERRORS'] = 1
+    auth.login()
+    response = client.post(
+        '/data/import', data=CSV.encode('utf-8'), content_type='text/csv')
+    assert response.json['imported'] == 3
+    assert response.json['error_count'] == 6
+    assert response.json['errors'] == ERRORS[:1]
+    assert len(get_imported(app)) == 3
+
+
+@pytest.mark.parametrize(('data', 'content_type'), (
+    (b'a,b\n', 'application/octet-stream'),
+    ({'file': (io.BytesIO(b'a,b\n'), 'scores.txt')}, None),
+))
+def test_import_invalid_format(client, auth, data, content_type):
+    auth.login()
+    response = client.post(
+        '/data/import', data=data, content_type=content_type)
+    assert response.status_code == 400
+    assert response.json['error'] == 'Format is invalid.'
+
+
+def test_import_nologin(client):
+    response = client.post(
+        '/data/import', data=CSV.encode('utf-8'), content_type='text/csv')
+    assert response.headers['Location'].endswith('/auth/login')
+
+
+def test_import_scores_command(app, runner, tmp_path):
+    path = tmp_path / 'scores.ndjson'
+    path.write_text(NDJSON)
+    result = runner.invoke(args=['import-scores', 'test1', str(path)])
+    assert 'Line 3: Row is invalid.' in result.output
+    assert 'Imported 2 scores, 2 errors.' in result.output
+    assert len(get_imported(app)) == 2
+
+    result = runner.invoke(args=['import-scores', 'nobody', str(path)])
+    assert 'Unknown user.' in result.output
+
+
+def test_export_ndjson(client, auth):
+    auth.login()
+    response = client.get('/data/export')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'attachment' in response.headers['Content-Disposition']
+    lines = [json.loads(line) for line in response.data.splitlines()]
+    assert [line['type'] for line in lines] == [
+        'workouts', 'workouts', 'scores', 'scores', 'scores', 'scores',
+        'tags', 'tags']
+    assert lines[0]['name'] == 'Workout A from test1'
+    assert lines[0]['description'] == 'Workout A description from test1'
+    assert 'Tag C from admin' in lines[0]['tags']
+    assert lines[3]['workout'] == 'Workout A from test1'
+    assert lines[3]['score'] == '100'
+
+
+# Tag names may hold the separator of a list
+@pytest.mark.parametrize(('data_format'), ('ndjson', 'csv'))
+def test_export_tags_with_comma(app, client, auth, data_format):
+    with app.app_context():
+        db = get_db()
+        db.execute('UPDATE table_tags SET tag = ? WHERE id = 20',
+                   ('Hero, Girl',))
+        db.execute('INSERT INTO table_workout_tags(workoutId, tagId)'
+                   ' VALUES (3, 20)')
+        db.commit()
+
+    auth.login()
+    response = client.get(
+        '/data/export?kind=workouts&format=' + data_format)
+    if data_format == 'ndjson':
+        workout = json.loads(response.data.splitlines()[0])
+        tags = workout['tags']
+    else:
+        workout = next(csv.DictReader(io.StringIO(response.data.decode())))
+        tags = json.loads(workout['tags'])
+    assert workout['name'] == 'Workout A from test1'
+    assert isinstance(tags, list)
+    assert 'Hero, Girl' in tags
+    assert 'Tag C from admin' in tags
+
+
+@pytest.mark.parametrize(('query', 'header'), (
+    ('', b'id,workout,score,datetime,rx,note,scoreValue,scoreType\r\n'),
+    ('&kind=tags', b'id,tag\r\n'),
+))
+def test_export_csv(client, auth, query, header):
+    auth.login()
+    response = client.get('/data/export?format=csv' + query)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.data.startswith(header)
+
+
+def test_export_chunks(app, client, auth):
+    app.config['EXPORT_CHUNK_SIZE'] = 10
+    auth.login()
+    response = client.get('/data/export', buffered=False)
+    chunks = list(response.response)
+    response.close()
+    assert len(chunks) == 8
+    assert b''.join(chunks) == client.get('/data/export').data
+
+
+def test_export_import_roundtrip(app, client, auth):
+    auth.login()
+    data = client.get('/data/export').data
+    response = client.post(
+        '/data/import', data=data, content_type='application/x-ndjson')
+    assert response.json == {'imported': 4, 'error_count': 0, 'errors': []}
+
+    with app.app_context():
+        scores = get_db().execute(
+            'SELECT workoutId, score, rx, datetime, note'
+            ' FROM table_workout_score WHERE userId = 2 ORDER BY id'
+        ).fetchall()
+        assert [tuple(score) for score in scores[4:]] == [
+            tuple(score) for score in scores[:4]]
+
+
+@pytest.mark.parametrize(('query', 'status', 'message'), (
+    ('?format=xml', 400, 'Format is invalid.'),
+    ('?kind=users', 400, 'Kind is invalid.'),
+    ('?format=csv&kind=tags&kind=scores', 400, 'CSV holds one kind only.'),
+    ('?format=sqlite', 403, 'User is not allowed to export the db.'),
+))
+def test_export_invalid(client, auth, query, status, message):
+    auth.login()
+    response = client.get('/data/export' + query)
+    assert response.status_code == status
+    assert response.json['error'] == message
+
+
+def test_export_sqlite(client, auth, tmp_path):
+    auth.login_admin()
+    response = client.get('/data/export?format=sqlite')
+    assert response.status_code == 200
+    assert response.data.startswith(b'SQLite format 3\x00')
+
+    path = tmp_path / 'export.sqlite'
+    path.write_bytes(response.data)
+    db = sqlite3.connect(str(path))
+    assert db.execute(
+        'SELECT COUNT(id) FROM table_workout_score').fetchone()[0] == 5
+    db.close()
+
+
+def test_export_data_command(runner, tmp_path):
+    path = tmp_path / 'scores.csv'
+    result = runner.invoke(args=[
+        'export-data', 'test1', '--format', 'csv', '--kind', 'scores',
+        '-o', str(path)])
+    assert result.exit_code == 0
+    assert path.read_text().count('\n') == 5
+
+    result = runner.invoke(args=['export-data', 'test1'])
+    assert result.output.count('\n') == 8
+
+
+def test_backup_db_command(runner, tmp_path):
+    path = tmp_path / 'backup.sqlite'
+    result = runner.invoke(args=['backup-db', str(path)])
+    assert 'Saved the database' in result.output
+
+    db = sqlite3.connect(str(path))
+    assert db.execute(
+        'SELECT COUNT(id) FROM table_workout').fetchone()[0] == 6
+    db.close()
@@ -1,7 +1,11 @@
 import sqlite3
+import threading
 
 import pytest
-from whiteboard.db import get_db
+from whiteboard import create_app
+from whiteboard.db import (
+    close_pool, get_db, get_migrations, get_pool_stats, migrate
+)
 
 
 def test_get_close_db(app):
@@ -9,12 +13,97 @@ def test_get_close_db(app):
         db = get_db()
         assert db is get_db()
 
+    # The connection is handed back to the pool instead of being closed
+    db.execute('SELECT 1')
+
+    with app.app_context():
+        assert get_db() is db
+        close_pool()
+
     with pytest.raises(sqlite3.ProgrammingError) as e:
         db.execute('SELECT 1')
 
     assert 'closed' in str(e.value)
 
 
+def test_pool_pragmas(app):
+    with app.app_context():
+        db = get_db()
+        assert db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert db.execute('PRAGMA synchronous').fetchone()[0] == 1
+        assert db.execute('PRAGMA temp_store').fetchone()[0] == 2
+        assert db.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+
+
+def test_pool_stats(app):
+    with app.app_context():
+        close_pool()
+
+    with app.app_context():
+        get_db()
+    with app.app_context():
+        get_db()
+        stats = get_pool_stats()
+
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['open'] == 1
+
+
+def test_pool_discards_broken_connection(app):
+    with app.app_context():
+        db = get_db()
+    db.close()
+
+    with app.app_context():
+        assert get_db() is not db
+        assert get_pool_stats()['discarded'] == 1
+
+
+def test_pool_rolls_back_on_release(app):
+    with app.app_context():
+        get_db().execute('DELETE FROM table_workout')
+
+    with app.app_context():
+        count = get_db().execute(
+            'SELECT COUNT(id) FROM table_workout').fetchone()[0]
+        assert count == 6
+
+
+def test_pool_exhausted(app):
+    app.config.update(DATABASE_POOL_SIZE=1, DATABASE_POOL_TIMEOUT=0.05)
+    errors = []
+
+    def acquire():
+        with app.app_context():
+            try:
+                get_db()
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    with app.app_context():
+        close_pool()
+
+    with app.app_context():
+        get_db()
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        thread.join()
+        assert get_pool_stats()['waits'] == 1
+
+    assert errors == ['database connection pool exhausted']
+
+
+def test_pool_per_app():
+    app1 = create_app({'TESTING': True, 'DATABASE': ':memory:'})
+    app2 = create_app({'TESTING': True, 'DATABASE': ':memory:'})
+
+    with app1.app_context():
+        db1 = get_db()
+    with app2.app_context():
+        assert get_db() is not db1
+
+
 def test_init_db_command(runner, monkeypatch):
     class Recorder(object):
         called = False
@@ -26,3 +115,77 @@ def test_init_db_command(runner, monkeypatch):
     result = runner.invoke(args=['init-db'])
     assert 'Initialized' in result.output
     assert Recorder.called
+
+
+def test_migrate_command(runner):
+    result = runner.invoke(args=['migrate'])
+    assert 'Applied' not in result.output
+    assert 'Database schema is at version' in result.output
+
+
+def test_backfill_scores_command(app, runner):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            'UPDATE table_workout_score'
+            ' SET scoreValue = NULL, scoreType = NULL'
+        )
+        db.execute(
+            'UPDATE table_workout_score SET score = ? WHERE id = 2', ('1:30',)
+        )
+        db.execute(
+            'UPDATE table_workout_score SET score = ? WHERE id = 3', ('x',)
+        )
+        db.commit()
+        version = db.execute(
+            'SELECT dataVersion FROM table_users WHERE id = 2').fetchone()[0]
+
+    result = runner.invoke(args=['backfill-scores'])
+    assert 'Updated 4 scores, 1 invalid.' in result.output
+
+    with app.app_context():
+        db = get_db()
+        scores = db.execute(
+            'SELECT id, scoreValue, scoreType FROM table_workout_score'
+            ' ORDER BY id'
+        ).fetchall()
+        assert [tuple(score) for score in scores] == [
+            (1, 80, 0), (2, 5400, 1), (3, None, None), (4, 140, 0),
+            (5, 80, 0)]
+        assert db.execute(
+            'SELECT dataVersion FROM table_users WHERE id = 2'
+        ).fetchone()[0] == version + 1
+
+    result = runner.invoke(args=['backfill-scores'])
+    assert 'Updated 0 scores, 1 invalid.' in result.output
+
+
+def test_migrate_existing_database(app):
+    with app.app_context():
+        db = get_db()
+        # Simulate a database created before migrations existed
+        with app.open_resource('schema.sql') as f:
+            db.executescript(f.read().decode('utf8'))
+        db.execute(
+            'INSERT INTO table_workout(userId, name, description, datetime)'
+            ' VALUES (1, "Fran", "21-15-9", 0)'
+        )
+        db.commit()
+
+        applied = migrate()
+        assert applied[0].startswith('0001_')
+        assert applied == [filename for _, filename in get_migrations()]
+        assert migrate() == []
+
+        # Existing data survives the upgrade
+        workout = db.execute('SELECT * FROM table_workout').fetchone()
+        assert workout['name'] == 'Fran'
+
+        plan = db.execute(
+            'EXPLAIN QUERY PLAN'
+            ' SELECT id, workoutId, score, rx, datetime, note'
+            ' FROM table_workout_score WHERE workoutId = ? AND userId = ?'
+            ' ORDER BY datetime ASC',
+            (3, 2,)
+        ).fetchall()
+        assert 'idx_workout_score_workout_user_datetime' in plan[0]['detail']
@@ -0,0 +1,142 @@
+import sys
+
+import pytest
+from whiteboard.fragments import FragmentCache, get_fragment_stats
+
+
+def test_fragment_cache_lru():
+    value = 'x' * 100
+    size = sys.getsizeof(value)
+    cache = FragmentCache(size * 2)
+
+    cache.set('a', value)
+    cache.set('b', value)
+    assert cache.get('a') == value
+    # b is the least recently used one now
+    cache.set('c', value)
+    assert cache.get('b') is None
+    assert cache.get('a') == value
+    assert cache.get('c') == value
+
+    # Too large for the whole cache
+    cache.set('d', 'x' * (size * 2))
+    assert cache.get('d') is None
+
+    assert cache.stats() == {
+        'entries': 2,
+        'size': size * 2,
+        'max_size': size * 2,
+        'hits': 3,
+        'misses': 2,
+        'evictions': 1,
+    }
+
+    cache.clear()
+    assert cache.stats()['entries'] == cache.stats()['size'] == 0
+
+
+def test_fragment_cache_replace():
+    cache = FragmentCache(1000)
+    cache.set('a', 'old')
+    cache.set('a', 'new value')
+    assert cache.get('a') == 'new value'
+    assert cache.stats()['size'] == sys.getsizeof('new value')
+
+
+def render(app, source, **context):
+    with app.test_request_context():
+        return source.render(**context)
+
+
+def test_cache_tag(app):
+    source = app.jinja_env.from_string(
+        '{% for row in rows %}'
+        '{% cache row.id %}<{{ row.name }}>{% endcache %}'
+        '{% endfor %}')
+    assert render(app, source, rows=[
+        {'id': 1, 'name': 'a'}, {'id': 2, 'name': '&'},
+    ]) == '<a><&amp;>'
+    # Same key, same output
+    assert render(app, source, rows=[
+        {'id': 1, 'name': 'b'}, {'id': 3, 'name': 'c'},
+    ]) == '<a><c>'
+
+    stats = get_fragment_stats(app)
+    assert stats['entries'] == 3
+    assert stats['hits'] == 1
+
+
+# The key covers the position in the template
+def test_cache_tag_position(app):
+    source = app.jinja_env.from_string(
+        '{% cache 1 %}first{% endcache %}'
+        '{% cache 1 %}second{% endcache %}')
+    assert render(app, source) == 'firstsecond'
+
+
+@pytest.mark.parametrize(('option'), ('size', 'auto_reload'))
+def test_cache_tag_disabled(app, option):
+    if option == 'size':
+        app.extensions['whiteboard_fragments'].max_size = 0
+    else:
+        app.jinja_env.auto_reload = True
+
+    source = app.jinja_env.from_string(
+        '{% cache 1 %}{{ name }}{% endcache %}')
+    assert render(app, source, name='a') == 'a'
+    assert render(app, source, name='b') == 'b'
+    assert get_fragment_stats(app)['entries'] == 0
+
+
+# The rows come from the cache, the pages are the same as without it
+@pytest.mark.parametrize(('path'), (
+    ('/workout/'),
+    ('/tag/'),
+    ('/movement/'),
+    ('/equipment/'),
+))
+def test_list_cached(app, client, auth, path):
+    auth.login()
+    first = client.get(path).data
+    stats = get_fragment_stats(app)
+    assert stats['entries'] > 0
+    assert stats['hits'] == 0
+
+    assert client.get(path).data == first
+    assert get_fragment_stats(app)['hits'] == stats['entries']
+
+    app.extensions['whiteboard_fragments'].max_size = 0
+    assert client.get(path).data == first
+
+
+@pytest.mark.parametrize(('path', 'data', 'page', 'message'), (
+    ('/workout/3/update', {'name': 'Fran', 'description': '21-15-9'},
+     '/workout/', b'Fran'),
+    ('/tag/20/update', {'tag': 'Tag C from test1'},
+     '/tag/', b'Tag C from test1'),
+))
+def test_list_cached_update(client, auth, path, data, page, message):
+    auth.login()
+    client.get(page)
+    client.post(path, data=data)
+    assert message in client.get(page).data
+
+
+# The default workouts and tags change with the catalog
+@pytest.mark.parametrize(('path', 'data', 'page', 'message'), (
+    ('/workout/1/update', {'name': 'Fran', 'description': '21-15-9'},
+     '/workout/', b'Fran'),
+    ('/tag/15/update', {'tag': 'Tag F from admin'},
+     '/tag/', b'Tag F from admin'),
+))
+def test_list_cached_catalog_update(client, auth, path, data, page,
+                                    message):
+    auth.login()
+    client.get(page)
+    auth.logout()
+    auth.login('admin')
+    client.post(path, data=data)
+    auth.logout()
+
+    auth.login()
+    assert message in client.get(page).data
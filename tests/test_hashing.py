@@ -0,0 +1,96 @@
+from hashlib import sha256
+
+import pytest
+from whiteboard.db import get_db
+from whiteboard.hashing import (
+    HashPool, HashPoolBusy, _generate_password_hash, check_password_hash,
+    close_hash_pool, generate_password_hash, get_hash_pool, get_hash_stats
+)
+
+
+@pytest.mark.parametrize(('workers'), (0, 1))
+def test_hash_roundtrip(app, workers):
+    app.config['HASH_POOL_WORKERS'] = workers
+    app.config['BCRYPT_LOG_ROUNDS'] = 4
+
+    with app.app_context():
+        try:
+            pw_hash = generate_password_hash('secret')
+            assert pw_hash.startswith('$2b$04$')
+            assert check_password_hash(pw_hash, 'secret') is True
+            assert check_password_hash(pw_hash, 'wrong') is False
+            assert check_password_hash('invalid', 'secret') is False
+
+            stats = get_hash_stats()
+            assert stats['workers'] == workers
+            assert stats['submitted'] == 4
+            assert stats['pending'] == 0
+            assert stats['rejected'] == 0
+            assert stats['hash_time'] > 0
+        finally:
+            close_hash_pool()
+
+
+def test_hash_pool_timeout():
+    pool = HashPool(workers=1, queue_size=1, timeout=0.01)
+    try:
+        with pytest.raises(HashPoolBusy):
+            pool.run(_generate_password_hash, 'secret', 12)
+        assert pool.stats()['timeouts'] == 1
+        # The slot is only free again once the hash is done
+        with pytest.raises(HashPoolBusy):
+            pool.run(_generate_password_hash, 'secret', 4)
+        assert pool.stats()['rejected'] == 1
+    finally:
+        pool.close()
+
+
+# Take all slots of the pool like running hashes do
+@pytest.fixture
+def saturated(app):
+    app.config['HASH_POOL_QUEUE_SIZE'] = 1
+    with app.app_context():
+        pool = get_hash_pool()
+    pool._slots.acquire()
+    yield pool
+    pool._slots.release()
+
+
+def test_login_saturated(client, auth, saturated):
+    response = auth.login()
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert b'Too many logins at the moment' in response.data
+    assert saturated.stats()['rejected'] == 1
+
+    # Not logged in
+    response = client.get('/workout/')
+    assert response.headers['Location'].endswith('/auth/login')
+
+
+def test_passwd_update_saturated(app, client, auth):
+    app.config['HASH_POOL_QUEUE_SIZE'] = 1
+    auth.login()
+    with app.app_context():
+        password = get_db().execute(
+            'SELECT password FROM table_users WHERE id = 2').fetchone()[0]
+        pool = get_hash_pool()
+
+    pool._slots.acquire()
+    try:
+        response = client.post(
+            '/auth/passwd/update',
+            follow_redirects=True,
+            data={'password1': '123456', 'password2': '123456'}
+        )
+    finally:
+        pool._slots.release()
+    assert b'the password was not changed.' in response.data
+    assert b'Too many logins' not in response.data
+
+    with app.app_context():
+        assert get_db().execute(
+            'SELECT password FROM table_users WHERE id = 2'
+        ).fetchone()[0] == password
+        assert check_password_hash(
+            password, sha256(b'secret').hexdigest()) is True
@@ -0,0 +1,85 @@
+import pytest
+from flask import g
+from whiteboard.identity import forget, get_identity_stats, lookup
+from whiteboard.views.score import get_score
+from whiteboard.views.tag import get_tag
+from whiteboard.views.workout import get_workout
+
+
+def test_lookup(app):
+    loaded = []
+
+    def load(key):
+        loaded.append(key)
+        return {'id': key} if key < 10 else None
+
+    with app.app_context():
+        assert lookup('row', 1, load) == {'id': 1}
+        assert lookup('row', 1, load) is lookup('row', 1, load)
+        assert lookup('row', 10, load) is None
+        assert lookup('row', 10, load) is None
+        assert lookup('other', 1, load) == {'id': 1}
+        assert loaded == [1, 10, 1]
+        assert get_identity_stats() == {'hits': 3, 'misses': 3}
+
+        forget('row', 1)
+        lookup('row', 1, load)
+        forget('row')
+        lookup('row', 1, load)
+        lookup('row', 10, load)
+        lookup('other', 1, load)
+        assert loaded == [1, 10, 1, 1, 1, 10]
+
+    # Nothing is kept beyond the request
+    with app.app_context():
+        assert get_identity_stats() == {'hits': 0, 'misses': 0}
+
+
+@pytest.mark.parametrize(('get', 'row_id'), (
+    (get_workout, 3),
+    (get_score, 2),
+    (get_tag, 20),
+))
+def test_get_row_once(app, get, row_id):
+    with app.test_request_context():
+        g.user = {'id': 2}
+        row = get(row_id)
+        assert row['id'] == row_id
+        assert get(row_id) is row
+        assert get_identity_stats() == {'hits': 1, 'misses': 1}
+
+        # Rows of other users are cached, but never returned
+        g.user = {'id': 3}
+        assert get(row_id) is None
+
+
+@pytest.mark.parametrize(('path', 'data', 'stats'), (
+    ('/workout/3', None, 'hits=0, misses=1'),
+    ('/workout/3/update', {'name': 'Fran', 'description': '21-15-9'},
+     'hits=0, misses=1'),
+    ('/workout/3/score/2/update',
+     {'score': '100', 'datetime': '14.02.2009 00:31', 'note': ''},
+     'hits=0, misses=2'),
+    ('/tag/20/update', {'tag': 'Renamed'}, 'hits=0, misses=1'),
+))
+def test_stats_header(app, client, auth, path, data, stats):
+    app.config['IDENTITY_MAP_STATS'] = True
+    auth.login()
+    if data is None:
+        response = client.get(path)
+    else:
+        response = client.post(path, data=data)
+    assert response.headers['X-Identity-Map'] == stats
+
+
+def test_stats_header_disabled(client, auth):
+    auth.login()
+    response = client.get('/workout/3')
+    assert 'X-Identity-Map' not in response.headers
+
+
+def test_forget_on_update(app, client, auth):
+    auth.login()
+    with client:
+        client.post('/tag/20/update', data={'tag': 'Renamed'})
+        assert ('tag', 20) not in g.identity_map
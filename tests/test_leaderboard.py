@@ -0,0 +1,191 @@
+import pytest
+from whiteboard.db import get_db
+from whiteboard.records import rebuild_records
+
+
+# Add a user with a single score of workout 1 per score
+def add_athletes(app, scores):
+    with app.app_context():
+        db = get_db()
+        for i, (score, value, value_type, rx) in enumerate(scores):
+            user_id = db.execute(
+                'INSERT INTO table_users(name, password) VALUES (?, ?)',
+                ('athlete{}'.format(i), 'x',)
+            ).lastrowid
+            db.execute(
+                'INSERT INTO table_workout_score'
+                '(userId, workoutId, score, scoreValue, scoreType, rx,'
+                ' datetime, note)'
+                ' VALUES (?, 1, ?, ?, ?, ?, ?, "")',
+                (user_id, score, value, value_type, rx, 1605114000 + i,)
+            )
+        rebuild_records()
+
+
+def test_leaderboard_order(app, client, auth):
+    add_athletes(app, (
+        ('100', 100, 0, 0),
+        ('70', 70, 0, 1),
+        ('90', 90, 0, 1),
+        ('x', None, None, 1),
+    ))
+    auth.login()
+    response = client.get('/workout/1/leaderboard.json')
+    assert response.status_code == 200
+    assert [(entry['rank'], entry['name'], entry['score'], entry['rx'])
+            for entry in response.json['entries']] == [
+        (1, 'athlete2', '90', 1),
+        (2, 'test1', '80', 1),
+        (3, 'test2', '80', 1),
+        (4, 'athlete1', '70', 1),
+        (5, 'athlete0', '100', 0),
+    ]
+    assert response.json['rank'] == 2
+    assert response.json['next_cursor'] is None
+
+
+def test_leaderboard_times(app, client, auth):
+    with app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM table_workout_score')
+        db.commit()
+    add_athletes(app, (
+        ('5:00', 300, 1, 1),
+        ('3:00', 180, 1, 1),
+        ('2:00', 120, 1, 0),
+    ))
+    auth.login()
+    response = client.get('/workout/1/leaderboard.json')
+    assert [entry['score'] for entry in response.json['entries']] == [
+        '3:00', '5:00', '2:00']
+    assert response.json['rank'] is None
+
+
+# Finishers rank ahead of the reps of time capped athletes, within Rx and
+# within scaled
+@pytest.mark.parametrize(('page_size'), (1, 2, 50))
+def test_leaderboard_mixed_types(app, client, auth, page_size):
+    with app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM table_workout_score')
+        db.commit()
+    add_athletes(app, (
+        ('150', 150, 0, 1),
+        ('5:00', 300, 1, 1),
+        ('200', 200, 0, 1),
+        ('3:00', 180, 1, 1),
+        ('4:00', 240, 1, 0),
+        ('250', 250, 0, 0),
+    ))
+    app.config['LEADERBOARD_PAGE_SIZE'] = page_size
+    auth.login()
+
+    entries = []
+    path = '/workout/1/leaderboard.json'
+    while True:
+        response = client.get(path)
+        entries.extend(response.json['entries'])
+        if response.json['next_cursor'] is None:
+            break
+        path = '/workout/1/leaderboard.json?after=' + (
+            response.json['next_cursor'])
+
+    assert [(entry['rank'], entry['score']) for entry in entries] == [
+        (1, '3:00'), (2, '5:00'), (3, '200'), (4, '150'), (5, '4:00'),
+        (6, '250')]
+
+
+@pytest.mark.parametrize(('page_size'), (1, 2, 3, 50))
+def test_leaderboard_pages(app, client, auth, page_size):
+    add_athletes(app, [(str(i), i, 0, i % 2) for i in range(7)])
+    app.config['LEADERBOARD_PAGE_SIZE'] = page_size
+    auth.login()
+
+    entries = []
+    path = '/workout/1/leaderboard.json'
+    while True:
+        response = client.get(path)
+        assert len(response.json['entries']) <= page_size
+        entries.extend(response.json['entries'])
+        if response.json['next_cursor'] is None:
+            break
+        path = '/workout/1/leaderboard.json?after=' + (
+            response.json['next_cursor'])
+
+    assert [entry['rank'] for entry in entries] == list(range(1, 10))
+    assert [entry['score'] for entry in entries] == [
+        '80', '80', '5', '3', '1', '6', '4', '2', '0']
+
+
+def test_leaderboard_page(app, client, auth):
+    add_athletes(app, [(str(i), i, 0, 1) for i in range(3)])
+    app.config['LEADERBOARD_PAGE_SIZE'] = 2
+    auth.login()
+    response = client.get('/workout/1/leaderboard')
+    assert response.status_code == 200
+    assert b'Your rank: 1' in response.data
+    assert b'athlete0' not in response.data
+    assert b'id="nextPage"' in response.data
+    assert b'id="firstPage"' not in response.data
+
+    response = client.get('/workout/1')
+    assert b'/workout/1/leaderboard' in response.data
+
+
+def test_leaderboard_rank_after_update(app, client, auth):
+    auth.login()
+    response = client.get('/workout/1/leaderboard.json')
+    assert response.json['rank'] == 1
+
+    # test2 beats test1
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            'UPDATE table_workout_score SET score = 99, scoreValue = 99'
+            ' WHERE id = 5')
+        rebuild_records()
+    response = client.get('/workout/1/leaderboard.json')
+    assert response.json['rank'] == 2
+
+
+# The leaderboard changes with the scores of other users
+@pytest.mark.parametrize(('path'), (
+    ('/workout/1/leaderboard'),
+    ('/workout/1/leaderboard.json'),
+))
+def test_leaderboard_other_user_score(client, auth, path):
+    auth.login()
+    response = client.get(path)
+    etag = response.get_etag()[0]
+    auth.logout()
+
+    auth.login('test2')
+    client.post('/workout/1/score/add',
+                data={'score': '500', 'datetime': '14.02.2009 00:31',
+                      'note': '', 'rx': 'on'})
+    auth.logout()
+
+    auth.login()
+    headers = {}
+    if etag is not None:
+        headers['If-None-Match'] = '"{}"'.format(etag)
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert b'500' in response.data
+
+
+@pytest.mark.parametrize(('path', 'status'), (
+    ('/workout/5/leaderboard.json', 404),
+    ('/workout/99/leaderboard.json', 404),
+    ('/workout/5/leaderboard', 302),
+    ('/workout/1/leaderboard.json?after=abc', 200),
+))
+def test_leaderboard_invalid(client, auth, path, status):
+    auth.login()
+    response = client.get(path)
+    assert response.status_code == status
+
+
+def test_leaderboard_nologin(client):
+    response = client.get('/workout/1/leaderboard')
+    assert response.headers['Location'].endswith('/auth/login')
@@ -0,0 +1,125 @@
+import random
+
+import pytest
+from whiteboard.db import get_db
+from whiteboard.records import rebuild_records
+
+
+def get_records(app):
+    with app.app_context():
+        return [tuple(record) for record in get_db().execute(
+            'SELECT * FROM table_workout_records ORDER BY userId, workoutId'
+        ).fetchall()]
+
+
+def test_rebuild_records_command(app, runner):
+    records = get_records(app)
+    assert len(records) == 4
+
+    with app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM table_workout_records')
+        db.commit()
+
+    result = runner.invoke(args=['rebuild-records'])
+    assert 'Rebuilt 4 records.' in result.output
+    assert get_records(app) == records
+
+
+def test_migration_matches_rebuild(app):
+    records = get_records(app)
+
+    with app.app_context():
+        db = get_db()
+        db.execute('DELETE FROM table_workout_records')
+        with app.open_resource(
+                'migrations/0014_leaderboard_score_type.sql') as f:
+            db.executescript(f.read().decode('utf8'))
+
+    assert get_records(app) == records
+
+
+@pytest.mark.parametrize(('scores', 'best', 'last'), (
+    # Higher numbers are better
+    ((('100', 1, '1.1.2020 10:00'), ('120', 1, '2.1.2020 10:00')),
+     '120', '120'),
+    # Lower times are better
+    ((('10:30', 1, '1.1.2020 10:00'), ('12:00', 1, '2.1.2020 10:00')),
+     '10:30', '12:00'),
+    # Rx beats scaled
+    ((('100', 1, '1.1.2020 10:00'), ('200', 0, '2.1.2020 10:00')),
+     '100', '200'),
+    # A time beats reps, e.g. of a time cap
+    ((('150', 1, '1.1.2020 10:00'), ('20:00', 1, '2.1.2020 10:00')),
+     '20:00', '20:00'),
+    # The earlier score wins a tie
+    ((('100', 1, '2.1.2020 10:00'), ('100', 1, '1.1.2020 10:00')),
+     '100', '100'),
+))
+def test_best_and_last(app, client, auth, scores, best, last):
+    auth.login()
+    for score, rx, datetime in scores:
+        data = {'score': score, 'datetime': datetime, 'note': ''}
+        if rx:
+            data['rx'] = 1
+        client.post('/workout/1/score/add', data=data)
+
+    with app.app_context():
+        db = get_db()
+        # Only the new scores
+        db.execute('DELETE FROM table_workout_score WHERE id = 1')
+        rebuild_records([(2, 1)])
+        record = db.execute(
+            'SELECT * FROM table_workout_records'
+            ' WHERE userId = 2 AND workoutId = 1'
+        ).fetchone()
+        assert record['bestScore'] == best
+        assert record['lastScore'] == last
+        assert record['attempts'] == len(scores)
+        assert record['rxAttempts'] == sum(score[1] for score in scores)
+
+    response = client.get('/workout/1')
+    assert b'Best: ' + best.encode() in response.data
+    assert b'Last: ' + last.encode() in response.data
+
+
+def test_records_follow_writes(app, client, auth):
+    rand = random.Random(0)
+    auth.login()
+
+    def post_score(path):
+        data = {
+            'score': rand.choice(('{}', '0:{}:30', '{}.5')).format(
+                rand.randrange(1, 5)),
+            'datetime': '{}.1.2020 10:00'.format(rand.randrange(1, 4)),
+            'note': '',
+        }
+        if rand.random() < 0.5:
+            data['rx'] = 1
+        client.post(path, data=data)
+
+    for _ in range(60):
+        with app.app_context():
+            score_ids = [row[0] for row in get_db().execute(
+                'SELECT id FROM table_workout_score'
+                ' WHERE userId = 2 AND workoutId IN (3, 4)'
+            )]
+        workout_id = rand.choice((3, 4))
+        action = rand.random()
+        if action < 0.5 or not score_ids:
+            post_score('/workout/{}/score/add'.format(workout_id))
+        elif action < 0.8:
+            post_score('/workout/{}/score/{}/update'.format(
+                workout_id, rand.choice(score_ids)))
+        else:
+            client.get('/workout/{}/score/{}/delete'.format(
+                workout_id, rand.choice(score_ids)))
+
+        # The incremental records equal the ones computed from scratch
+        records = get_records(app)
+        with app.app_context():
+            rebuild_records()
+        assert get_records(app) == records
+
+    client.get('/workout/3/delete')
+    assert (2, 3) not in [record[:2] for record in get_records(app)]
@@ -2,13 +2,13 @@ import pytest
 from whiteboard.db import get_db
 
 
-@pytest.mark.parametrize(('score'), (
-    (b'999'),
-    (b'999.99'),
-    (b'2:30'),
-    (b'2:30:45'),
+@pytest.mark.parametrize(('score', 'value', 'value_type'), (
+    (b'999', 999, 0),
+    (b'999.99', 999.99, 0),
+    (b'2:30', 9000, 1),
+    (b'2:30:45', 9045, 1),
 ))
-def test_add(client, auth, app, score):
+def test_add(client, auth, app, score, value, value_type):
     auth.login()
     response = client.get('/workout/4/score/add', follow_redirects=True)
     assert response.status_code == 200
@@ -38,6 +38,8 @@ def test_add(client, auth, app, score):
             'SELECT * FROM table_workout_score WHERE id=6').fetchone()
         assert result['workoutId'] == 4
         assert result['score'] == score.decode("utf-8")
+        assert result['scoreValue'] == value
+        assert result['scoreType'] == value_type
         assert result['datetime'] == 1234567860
         assert result['rx'] == 1
         assert result['note'] == 'Add note to Workout B from test1'
@@ -47,11 +49,15 @@ def test_add(client, auth, app, score):
     ('', '14.02.2009 00:31', 1, 'note', b'Score is required.'),
     ('abc', '14.02.2009 00:31', 1, 'note', b'Score is invalid.'),
     ('123abc', '14.02.2009 00:31', 1, 'note', b'Score is invalid.'),
+    ('\u00b2', '14.02.2009 00:31', 1, 'note', b'Score is invalid.'),
+    ('\u00b2:30', '14.02.2009 00:31', 1, 'note', b'Score is invalid.'),
     ('1234567890', '', 1, 'note', b'Datetime is required.'),
     ('1234567890', '14.02.2009', 1, 'note', b'Datetime is invalid.'),
     ('1234567890', '14.02.2009 00:', 1, 'note', b'Datetime is invalid.'),
     ('1234567890', 'abc', 1, 'note', b'Datetime is invalid.'),
     ('1234567890', '123', 1, 'note', b'Datetime is invalid.'),
+    ('1234567890', '31.02.2009 00:31', 1, 'note', b'Datetime is invalid.'),
+    ('1234567890', '14/02/2009 00:31', 1, 'note', b'Datetime is invalid.'),
 ))
 def test_add_validate_input(client, auth, score, datetime, rx, note, message):
     auth.login()
@@ -84,13 +90,13 @@ def test_add_invalid(client, auth, workoutId):
     assert b'User or Workout ID is invalid.' in response.data
 
 
-@pytest.mark.parametrize(('score'), (
-    (b'999'),
-    (b'999.99'),
-    (b'2:30'),
-    (b'2:30:45'),
+@pytest.mark.parametrize(('score', 'value', 'value_type'), (
+    (b'999', 999, 0),
+    (b'999.99', 999.99, 0),
+    (b'2:30', 9000, 1),
+    (b'2:30:45', 9045, 1),
 ))
-def test_update(client, auth, app, score):
+def test_update(client, auth, app, score, value, value_type):
     auth.login()
     response = client.get('/workout/3/score/2/update', follow_redirects=True)
     assert response.status_code == 200
@@ -122,6 +128,8 @@ def test_update(client, auth, app, score):
         assert result['id'] == 2
         assert result['workoutId'] == 3
         assert result['score'] == score.decode("utf-8")
+        assert result['scoreValue'] == value
+        assert result['scoreType'] == value_type
         assert result['rx'] == 0
         assert result['datetime'] == 1234567860
         assert result['note'] == 'Update note to Workout B from test1'
@@ -131,11 +139,15 @@ def test_update(client, auth, app, score):
     ('', '14.02.2009 00:31', 1, 'note', b'Score is required.'),
     ('abc', '14.02.2009 00:31', 1, 'note', b'Score is invalid.'),
     ('123abc', '14.02.2009 00:31', 1, 'note', b'Score is invalid.'),
+    ('\u00b2', '14.02.2009 00:31', 1, 'note', b'Score is invalid.'),
+    ('\u00b2:30', '14.02.2009 00:31', 1, 'note', b'Score is invalid.'),
     ('1234567890', '', 1, 'note', b'Datetime is required.'),
     ('1234567890', '14.02.2009', 1, 'note', b'Datetime is invalid.'),
     ('1234567890', '14.02.2009 00:', 1, 'note', b'Datetime is invalid.'),
     ('1234567890', 'abc', 1, 'note', b'Datetime is invalid.'),
     ('1234567890', '123', 1, 'note', b'Datetime is invalid.'),
+    ('1234567890', '31.02.2009 00:31', 1, 'note', b'Datetime is invalid.'),
+    ('1234567890', '14/02/2009 00:31', 1, 'note', b'Datetime is invalid.'),
 ))
 def test_update_validate_input(client, auth, score, datetime, rx, note,
                                message):
@@ -218,3 +230,50 @@ def test_delete_invalid(client, auth, workoutId, scoreId, message):
     )
     assert response.status_code == 200
     assert message in response.data
+
+
+def test_history(app, client, auth):
+    auth.login()
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            'INSERT INTO table_workout_score'
+            '(userId, workoutId, score, scoreValue, scoreType, rx, datetime)'
+            ' VALUES (2, 4, ?, ?, 0, 1, ?)',
+            ((str(i), i, 1605114000 + i * 3600,) for i in range(1, 1000))
+        )
+        db.commit()
+
+    response = client.get('/workout/4/score/history.json')
+    assert response.status_code == 200
+    assert response.json['total'] == 1000
+    assert len(response.json['values']) == 500
+    assert response.json['values'][0] == 140
+    assert response.json['values'][-1] == 999
+    assert response.json['labels'][0] == '11.11.2020 18:00'
+
+    response = client.get('/workout/4/score/history.json?points=20')
+    assert len(response.json['values']) == 20
+    assert len(response.json['datetimes']) == 20
+
+    response = client.get(
+        '/workout/4/score/history.json?start=1605117600&end=1605124800')
+    assert response.json['total'] == 3
+    assert response.json['values'] == [1, 2, 3]
+
+
+@pytest.mark.parametrize(('path', 'status'), (
+    ('/workout/3/score/history.json', 200),
+    ('/workout/1/score/history.json', 200),
+    ('/workout/5/score/history.json', 404),
+    ('/workout/99/score/history.json', 404),
+))
+def test_history_access(client, auth, path, status):
+    auth.login()
+    response = client.get(path)
+    assert response.status_code == status
+
+
+def test_history_nologin(client):
+    response = client.get('/workout/3/score/history.json')
+    assert response.headers['Location'].endswith('/auth/login')
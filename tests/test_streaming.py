@@ -0,0 +1,33 @@
+import pytest
+
+
+@pytest.mark.parametrize(('path', 'message'), (
+    ('/workout/', b'Workout A from test1'),
+    ('/tag/', b'Tag A from test1'),
+    ('/movement/', b'Movement 1'),
+    ('/equipment/', b'Equipment 1'),
+))
+@pytest.mark.parametrize(('stream'), (True, False))
+def test_list(app, client, auth, path, message, stream):
+    app.config['STREAM_TEMPLATES'] = stream
+    auth.login()
+    response = client.get(path)
+    assert response.status_code == 200
+    # A streamed page has no known length up front
+    assert (response.content_length is None) == stream
+    assert response.mimetype == 'text/html'
+    assert response.get_etag()[0]
+    assert message in response.data
+    assert response.data.rstrip().endswith(b'</html>')
+
+
+@pytest.mark.parametrize(('stream'), (True, False))
+def test_flashed_messages(app, client, auth, stream):
+    app.config['STREAM_TEMPLATES'] = stream
+    auth.login()
+    response = client.get('/tag/1/delete', follow_redirects=True)
+    assert b'User or Tag ID is invalid.' in response.data
+
+    # The message is shown once only
+    response = client.get('/tag/')
+    assert b'User or Tag ID is invalid.' not in response.data
@@ -0,0 +1,175 @@
+import io
+
+import pytest
+from whiteboard.changelog import get_version
+from whiteboard.db import get_db
+
+
+def sync(client, since=None):
+    path = '/sync' if since is None else '/sync?since={}'.format(since)
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def get_ids(changes, kind):
+    return [item['id'] for item in changes[kind]]
+
+
+def test_sync_full(app, client, auth):
+    auth.login()
+    changes = sync(client)
+    assert changes['full'] is True
+    assert changes['more'] is False
+    assert changes['version'] == 0
+
+    with app.app_context():
+        db = get_db()
+        for kind, query in (
+            ('workouts', 'SELECT id FROM table_workout'
+                         ' WHERE userId IN (1, 2) ORDER BY id'),
+            ('tags', 'SELECT id FROM table_tags'
+                     ' WHERE userId IN (1, 2) ORDER BY id'),
+            ('scores', 'SELECT id FROM table_workout_score'
+                       ' WHERE userId = 2 ORDER BY id'),
+        ):
+            assert get_ids(changes, kind) == [
+                row[0] for row in db.execute(query)]
+
+    workout = [item for item in changes['workouts'] if item['id'] == 3][0]
+    assert workout['name'] == 'Workout A from test1'
+    assert {17, 18} <= set(workout['tags'])
+    assert changes['scores'][1] == {
+        'id': 2, 'workoutId': 3, 'score': '100', 'scoreValue': 100,
+        'scoreType': 0, 'rx': 1, 'datetime': 1605114000,
+        'note': 'note 1 for workout A from test1',
+    }
+
+
+def test_sync_changes(app, client, auth):
+    auth.login()
+    version = sync(client)['version']
+
+    client.post('/workout/add',
+                data={'name': 'Fran', 'description': '21-15-9'})
+    client.post('/tag/20/update', data={'tag': 'Tag C from test1'})
+    client.get('/workout/3/score/2/delete')
+    client.post('/workout/3/score/3/update',
+                data={'score': '130', 'datetime': '14.02.2009 00:31',
+                      'note': ''})
+
+    changes = sync(client, version)
+    assert changes['full'] is False
+    assert changes['more'] is False
+    assert changes['version'] > version
+    assert [item['name'] for item in changes['workouts']] == ['Fran']
+    assert changes['tags'] == [
+        {'id': 20, 'userId': 2, 'tag': 'Tag C from test1'}]
+    assert get_ids(changes, 'scores') == [3]
+    assert changes['scores'][0]['score'] == '130'
+    assert changes['deleted'] == {'workouts': [], 'tags': [], 'scores': [2]}
+
+    # Nothing new
+    again = sync(client, changes['version'])
+    assert again['version'] == changes['version']
+    assert again['workouts'] == again['tags'] == again['scores'] == []
+
+
+def test_sync_deleted(client, auth):
+    auth.login()
+    client.get('/tag/20/delete')
+    client.get('/workout/3/delete')
+
+    changes = sync(client, 0)
+    assert changes['deleted'] == {
+        'workouts': [3], 'tags': [20], 'scores': [2, 3]}
+    assert changes['workouts'] == changes['tags'] == changes['scores'] == []
+
+
+# The default catalog of the admin is synced to everybody, the admin's
+# scores and the data of other users aren't
+def test_sync_other_users(client, auth):
+    auth.login('admin')
+    client.post('/workout/add',
+                data={'name': 'Fran', 'description': '21-15-9'})
+    client.post('/workout/1/score/add',
+                data={'score': '100', 'datetime': '14.02.2009 00:31',
+                      'note': ''})
+    auth.logout()
+    auth.login('test2')
+    client.post('/tag/add', data={'tag': 'Tag B from test2'})
+    auth.logout()
+
+    auth.login()
+    changes = sync(client, 0)
+    assert [item['name'] for item in changes['workouts']] == ['Fran']
+    assert changes['tags'] == changes['scores'] == []
+
+
+def test_sync_pages(app, client, auth):
+    app.config['SYNC_PAGE_SIZE'] = 2
+    auth.login()
+    for name in ('A', 'B', 'C'):
+        client.post('/tag/add', data={'tag': name})
+
+    changes = sync(client, 0)
+    assert changes['more'] is True
+    assert [item['tag'] for item in changes['tags']] == ['A', 'B']
+
+    changes = sync(client, changes['version'])
+    assert changes['more'] is False
+    assert [item['tag'] for item in changes['tags']] == ['C']
+
+
+def test_sync_import(app, client, auth):
+    auth.login()
+    response = client.post(
+        '/data/import?format=csv',
+        data=io.BytesIO(b'workout,score,datetime\n'
+                        b'Workout A from test1,110,14.02.2009 00:31\n'
+                        b'Workout B from test1,150,14.02.2009 00:31\n'),
+        content_type='text/csv')
+    assert response.get_json()['imported'] == 2
+
+    changes = sync(client, 0)
+    assert [item['score'] for item in changes['scores']] == ['110', '150']
+    with app.app_context():
+        assert changes['version'] == get_version()
+
+
+# A version the server never handed out gets everything again
+def test_sync_unknown_version(client, auth):
+    auth.login()
+    changes = sync(client, 100)
+    assert changes['full'] is True
+    assert len(changes['scores']) == 4
+
+
+@pytest.mark.parametrize(('since'), ('', '-1', 'abc', '1.5', '\u00b2'))
+def test_sync_invalid_version(client, auth, since):
+    auth.login()
+    response = client.get('/sync?since=' + since)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Version is invalid.'
+
+
+def test_sync_login_required(client):
+    response = client.get('/sync')
+    assert response.headers['Location'].endswith('/auth/login')
+
+
+def test_service_worker(client, auth):
+    response = client.get('/sw.js')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/javascript'
+    assert 'no-cache' in response.headers['Cache-Control']
+    assert b'/static/js/sidebar.js' in response.data
+    assert b'/static/manifest.webmanifest' in response.data
+    assert b"const CACHE = 'whiteboard-" in response.data
+    assert b'const LOGIN_URL = "/auth/login"' in response.data
+
+    auth.login()
+    response = client.get('/workout/')
+    assert b'data-service-worker="/sw.js"' in response.data
+    assert b'data-sync="/sync"' in response.data
+    assert b'/static/js/offline.js' in response.data
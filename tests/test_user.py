@@ -1,4 +1,5 @@
 import pytest
+from flask import session
 from whiteboard.db import get_db
 
 
@@ -102,6 +103,8 @@ def test_prefs_update(client, auth, app):
     ('1', 'abc', b'Filter type is invalid.'),
     ('1.5', '2', b'Sort type is invalid.'),
     ('1', '1.5', b'Filter type is invalid.'),
+    ('\u00b2', '2', b'Sort type is invalid.'),
+    ('1', '\u00b2', b'Filter type is invalid.'),
 ))
 def test_prefs_update_validate_input(client, auth, inputSort, inputFilter, message):
     auth.login()
@@ -111,3 +114,117 @@ def test_prefs_update_validate_input(client, auth, inputSort, inputFilter, messa
         data={'inputSort': inputSort, 'inputFilter': inputFilter}
     )
     assert message in response.data
+
+
+@pytest.mark.parametrize(('timezone', 'result', 'date'), (
+    ('UTC', 'UTC', b'11.11.2020 17:00'),
+    ('America/New_York', 'America/New_York', b'11.11.2020 12:00'),
+    # Empty is the default timezone of the config (Europe/Berlin)
+    ('', None, b'11.11.2020 18:00'),
+))
+def test_prefs_update_timezone(client, auth, app, timezone, result, date):
+    auth.login()
+    # Initialize entry in table_user_prefs
+    client.get('/workout/')
+
+    response = client.post(
+        '/user/prefs/update/workout/',
+        data={'inputSort': '0', 'inputFilter': '0',
+              'inputTimezone': timezone}
+    )
+    assert response.status_code == 302
+
+    with app.app_context():
+        db = get_db()
+        prefs = db.execute(
+            'SELECT timezone FROM table_user_prefs WHERE userId = 2'
+        ).fetchone()
+        assert prefs['timezone'] == result
+
+    # Scores are shown in the timezone of the user
+    response = client.get('/workout/3')
+    assert date in response.data
+
+    # and read in it
+    response = client.post(
+        '/workout/3/score/add',
+        data={'score': '90', 'datetime': date.decode(), 'note': ''}
+    )
+    with app.app_context():
+        db = get_db()
+        score = db.execute(
+            'SELECT datetime FROM table_workout_score WHERE score = ?',
+            ('90',)
+        ).fetchone()
+        assert score['datetime'] == 1605114000
+
+
+def test_prefs_update_invalid_timezone(client, auth, app):
+    auth.login()
+    client.get('/workout/')
+
+    response = client.post(
+        '/user/prefs/update/xxx/',
+        follow_redirects=True,
+        data={'inputSort': '1', 'inputFilter': '0',
+              'inputTimezone': 'Europe/Nowhere'}
+    )
+    assert b'Timezone is invalid.' in response.data
+
+    with app.app_context():
+        db = get_db()
+        prefs = db.execute(
+            'SELECT sortType, timezone FROM table_user_prefs WHERE userId = 2'
+        ).fetchone()
+        assert prefs is None
+
+
+# List views read the prefs once per session and never write them
+def test_prefs_cached(client, auth, app):
+    auth.login()
+    response = client.get('/workout/')
+    assert response.status_code == 200
+
+    with app.app_context():
+        db = get_db()
+        count = db.execute('SELECT COUNT(id) FROM table_user_prefs').fetchone()[0]
+        assert count == 0
+        db.execute(
+            'INSERT INTO table_user_prefs(userId, sortType, filterType)'
+            ' VALUES (2, 1, 0)'
+        )
+        db.commit()
+
+    with client:
+        client.get('/workout/')
+        assert session['prefs']['sortType'] == 0
+
+
+# Upserted, another session of the user reads them again once it checks
+# its identity
+def test_prefs_update_other_session(client, auth, app):
+    other = app.test_client()
+    other.post('/auth/login', data={'username': 'test1', 'password': 'secret'})
+    other.get('/workout/')
+    auth.login()
+    app.config['AUTH_CHECK_INTERVAL'] = 0
+
+    for sort_type in ('1', '0', '1'):
+        client.post(
+            '/user/prefs/update/workout/',
+            data={'inputSort': sort_type, 'inputFilter': '2'}
+        )
+    with client:
+        client.get('/workout/')
+        assert session['prefs']['sortType'] == 1
+        assert session['prefs_version'] == 3
+
+    with other:
+        other.get('/workout/')
+        assert session['prefs']['sortType'] == 1
+        assert session['prefs']['filterType'] == 2
+
+    with app.app_context():
+        db = get_db()
+        count = db.execute('SELECT COUNT(id) FROM table_user_prefs').fetchone()[0]
+        assert count == 1
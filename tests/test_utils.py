@@ -1,8 +1,61 @@
+import datetime
 import pytest
-import time
+import zoneinfo
 from whiteboard.utils import (
     is_float, is_timestamp, is_datetime, timestamp_to_sec, datetime_to_sec,
-    get_format_timestamp
+    get_format_timestamp, encode_cursor, decode_cursor, score_to_value,
+    downsample_lttb, timestamps_to_sec, datetimes_to_sec, is_timezone
+)
+
+TIMEZONE = 'Europe/Berlin'
+
+VALID_TIMESTAMPS = (
+    ('20:30', 73800),
+    ('02:30', 9000),
+    ('2:30', 9000),
+    ('20:03', 72180),
+    ('20:3', 72180),
+    ('20:30:45', 73845),
+    ('20:30:05', 73805),
+    ('20:30:5', 73805),
+    ('2:3:5', 7385),
+    ('2:3', 7380),
+    ('00:00', 0),
+    ('00:00:00', 0),
+    ('2', 2),
+    ('203', 203),
+    ('20.3', 20),
+)
+INVALID_TIMESTAMPS = (
+    ('203:30'),
+    ('20:300'),
+    ('20:30:450'),
+    (''),
+)
+# Based on TIMEZONE
+VALID_DATETIMES = (
+    ('1.1.2020 20:30', 1577907000),
+    ('10.10.2020 20:30', 1602354600),
+    ('1.10.2020 20:30', 1601577000),
+    ('01.10.2020 20:30', 1601577000),
+    ('10.1.2020 20:30', 1578684600),
+    ('10.01.2020 20:30', 1578684600),
+    ('10.10.2020 2:30', 1602289800),
+    ('10.10.2020 20:3', 1602352980),
+    ('10.10.2020 20:30:45', 1602354645),
+    ('10.10.2020 20:30:4', 1602354604),
+    ('1.1.2020 00:00', 1577833200),
+    ('1.1.2020 00:00:00', 1577833200),
+)
+INVALID_DATETIMES = (
+    ('1.1.2020'),
+    ('1.1.2020 20'),
+    ('1.1.2020_20:30'),
+    ('20:30'),
+    ('1.1.20 20:30'),
+    ('1/1/2020 20:30'),
+    ('31.02.2020 10:00'),
+    (''),
 )
 
 
@@ -94,17 +147,20 @@ def test_invalid_timestamp(value):
 
 # test get_format_timestamp function with valid values and no parameter
 def test_valid_format_timestamp_no_parameter():
-    assert get_format_timestamp() == time.strftime(
-        "%d.%m.%Y %H:%M",
-        time.localtime(time.time()))
+    assert get_format_timestamp(timezone=TIMEZONE) == (
+        datetime.datetime.now(zoneinfo.ZoneInfo(TIMEZONE)).strftime(
+            "%d.%m.%Y %H:%M"))
 
 
 # test get_format_timestamp function with valid values and parameter
-@pytest.mark.parametrize(('value', 'result'), (
-    (1577907000, '01.01.2020 20:30'),
+@pytest.mark.parametrize(('value', 'timezone', 'result'), (
+    (1577907000, TIMEZONE, '01.01.2020 20:30'),
+    (1577907000, 'UTC', '01.01.2020 19:30'),
+    (1577907000, 'America/New_York', '01.01.2020 14:30'),
+    (1602354600, TIMEZONE, '10.10.2020 20:30'),
 ))
-def test_valid_format_timestamp_with_parameter(value, result):
-    assert get_format_timestamp(value) == result
+def test_valid_format_timestamp_with_parameter(value, timezone, result):
+    assert get_format_timestamp(value, timezone) == result
 
 
 # test get_format_timestamp function with invalid values
@@ -119,66 +175,161 @@ def test_invalid_format_timestamp(value):
 
 
 # test timestamp_to_sec function with valid values
-@pytest.mark.parametrize(('value', 'result'), (
-    ('20:30', 73800),
-    ('02:30', 9000),
-    ('2:30', 9000),
-    ('20:03', 72180),
-    ('20:3', 72180),
-    ('20:30:45', 73845),
-    ('20:30:05', 73805),
-    ('20:30:5', 73805),
-    ('2:3:5', 7385),
-    ('2:3', 7380),
-    ('00:00', 0),
-    ('00:00:00', 0),
-    ('2', 2),
-    ('203', 203),
-    ('20.3', 20),
-))
+@pytest.mark.parametrize(('value', 'result'), VALID_TIMESTAMPS)
 def test_valid_timestamp_to_sec(value, result):
     assert timestamp_to_sec(value) == result
 
 
 # test timestamp_to_sec function with invalid values
-@pytest.mark.parametrize(('value'), (
-    ('203:30'),
-    ('20:300'),
-    ('20:30:450'),
-    (''),
-))
+@pytest.mark.parametrize(('value'), INVALID_TIMESTAMPS)
 def test_invalid_timestamp_to_sec(value):
     assert timestamp_to_sec(value) == -1
 
 
 # test datetime_to_sec function with valid values
-# Test based on timezone: Europe/Berlin
-@pytest.mark.parametrize(('value', 'result'), (
-    ('1.1.2020 20:30', 1577907000),
-    ('10.10.2020 20:30', 1602354600),
-    ('1.10.2020 20:30', 1601577000),
-    ('01.10.2020 20:30', 1601577000),
-    ('10.1.2020 20:30', 1578684600),
-    ('10.01.2020 20:30', 1578684600),
-    ('10.10.2020 2:30', 1602289800),
-    ('10.10.2020 20:3', 1602352980),
-    ('10.10.2020 20:30:45', 1602354645),
-    ('10.10.2020 20:30:4', 1602354604),
-    ('1.1.2020 00:00', 1577833200),
-    ('1.1.2020 00:00:00', 1577833200),
-))
+@pytest.mark.parametrize(('value', 'result'), VALID_DATETIMES)
 def test_valid_datetime_to_sec(value, result):
-    assert datetime_to_sec(value) == result
+    assert datetime_to_sec(value, TIMEZONE) == result
+
+
+# test datetime_to_sec function in other timezones
+@pytest.mark.parametrize(('value', 'timezone', 'result'), (
+    ('01.01.2020 20:30', 'UTC', 1577910600),
+    ('01.01.2020 20:30', 'America/New_York', 1577928600),
+    ('10.10.2020 20:30', 'Asia/Kolkata', 1602342000),
+))
+def test_datetime_to_sec_timezone(value, timezone, result):
+    assert datetime_to_sec(value, timezone) == result
+    assert get_format_timestamp(result, timezone) == value
 
 
 # test datetime_to_sec function with invalid values
+@pytest.mark.parametrize(('value'), INVALID_DATETIMES)
+def test_invalid_datetime_to_sec(value):
+    assert datetime_to_sec(value) == -1
+
+
+# test the batch parsers against the scalar ones, invalid values are masked
+@pytest.mark.parametrize(('batch', 'valid', 'invalid'), (
+    (timestamps_to_sec, VALID_TIMESTAMPS, INVALID_TIMESTAMPS),
+    (datetimes_to_sec, VALID_DATETIMES, INVALID_DATETIMES),
+))
+def test_batch_to_sec(batch, valid, invalid):
+    values = [value for value, _ in valid] + list(invalid)
+    if batch is datetimes_to_sec:
+        seconds = batch(values, TIMEZONE)
+    else:
+        seconds = batch(values)
+
+    assert seconds.dtype == 'int64'
+    assert seconds.mask.tolist() == [False] * len(valid) + [True] * len(
+        invalid)
+    assert seconds.filled(-1).tolist() == [
+        result for _, result in valid] + [-1] * len(invalid)
+
+
+# The scalar and the batch parsers agree on the odd values too
+@pytest.mark.parametrize(('scalar', 'batch', 'values'), (
+    (timestamp_to_sec, timestamps_to_sec, (
+        '1:60', '20:30:60', '\u00b2:30', '\u00b2', '\u0663', '12.5', '1/2',
+    )),
+    (datetime_to_sec, datetimes_to_sec, (
+        '1/1/2020 20:30', '1-1-2020 20:30', '31.02.2020 10:00',
+        '29.02.2021 10:00', '29.02.2020 10:00', '1.13.2020 10:00',
+        '1.1.0000 10:00', '1.1.2020 24:00', '1.1.2020 20:60',
+        '\u00b2.1.2020 20:30', '\u00b2', '1234567890', '12.5',
+    )),
+))
+def test_batch_to_sec_parity(scalar, batch, values):
+    assert batch(values).filled(-1).tolist() == [
+        scalar(value) for value in values]
+
+
+@pytest.mark.parametrize(('batch'), (timestamps_to_sec, datetimes_to_sec))
+def test_batch_to_sec_empty(batch):
+    assert batch([]).tolist() == []
+
+
+# test score_to_value function
+@pytest.mark.parametrize(('value', 'result'), (
+    ('100', (100, 0)),
+    ('42.5', (42.5, 0)),
+    (' 7 ', (7, 0)),
+    ('20:30', (73800, 1)),
+    ('1:02:03', (3723, 1)),
+    ('', (None, None)),
+    ('abc', (None, None)),
+    ('20:300', (None, None)),
+    # Other digits than ASCII ones
+    ('\u00b2', (None, None)),
+    ('\u0663', (None, None)),
+    ('\u00b2:30', (None, None)),
+))
+def test_score_to_value(value, result):
+    assert score_to_value(value) == result
+
+
+# test downsample_lttb function
+@pytest.mark.parametrize(('size', 'threshold', 'result'), (
+    (0, 10, 0),
+    (5, 10, 5),
+    (10, 10, 10),
+    (100, 2, 100),
+    (100, 3, 3),
+    (1000, 50, 50),
+))
+def test_downsample_lttb(size, threshold, result):
+    points = [(i, (i * 7919) % 101) for i in range(size)]
+    sampled = downsample_lttb(points, threshold)
+    assert len(sampled) == result
+    if points:
+        assert sampled[0] == points[0]
+        assert sampled[-1] == points[-1]
+    assert sampled == sorted(sampled)
+    assert set(sampled) <= set(points)
+
+
+def test_downsample_lttb_keeps_peaks():
+    points = [(i, 0) for i in range(100)]
+    points[37] = (37, 1000)
+    points[71] = (71, -1000)
+    sampled = downsample_lttb(points, 10)
+    assert (37, 1000) in sampled
+    assert (71, -1000) in sampled
+
+
+# test encode_cursor and decode_cursor functions
+@pytest.mark.parametrize(('values', 'types'), (
+    (('Fran', 42), (str, int)),
+    (('äöü', 0), (str, int)),
+    ((1,), (int,)),
+))
+def test_cursor_roundtrip(values, types):
+    assert decode_cursor(encode_cursor(*values), types) == list(values)
+
+
+# test decode_cursor function with invalid values
 @pytest.mark.parametrize(('value'), (
-    ('1.1.2020'),
-    ('1.1.2020 20'),
-    ('1.1.2020_20:30'),
-    ('20:30'),
-    ('1.1.20 20:30'),
+    (None),
     (''),
+    ('abc'),
+    ('ä'),
+    (encode_cursor('Fran')),
+    (encode_cursor(42, 'Fran')),
+    (encode_cursor('Fran', 1.5)),
 ))
-def test_invalid_datetime_to_sec(value):
-    assert datetime_to_sec(value) == -1
+def test_invalid_cursor(value):
+    assert decode_cursor(value, (str, int)) is None
+
+
+# test is_timezone function
+@pytest.mark.parametrize(('value', 'result'), (
+    ('Europe/Berlin', True),
+    ('UTC', True),
+    ('America/New_York', True),
+    ('Europe/Nowhere', False),
+    ('../etc/passwd', False),
+    ('', False),
+))
+def test_is_timezone(value, result):
+    assert is_timezone(value) is result
@@ -1,5 +1,8 @@
+import re
+
 import pytest
 from whiteboard.db import get_db
+from whiteboard.views.workout import link_workouts_to_tags
 
 
 # List with No Login
@@ -312,3 +315,149 @@ def test_delete_notexist(client, auth, app):
     response = client.get('/workout/99/delete', follow_redirects=True)
     assert response.status_code == 200
     assert b'User or Workout ID is invalid.' in response.data
+
+
+def test_link_workouts_to_tags():
+    workouts = [
+        {'id': 1, 'name': 'Workout A'},
+        {'id': 2, 'name': 'Workout B'},
+        {'id': 3, 'name': 'Workout C'},
+    ]
+    tags = [
+        {'workoutId': 2, 'tagId': 10, 'tag': 'Tag A'},
+        {'workoutId': 1, 'tagId': 11, 'tag': 'Tag B'},
+        {'workoutId': 2, 'tagId': 11, 'tag': 'Tag B'},
+        {'workoutId': 99, 'tagId': 12, 'tag': 'Tag C'},
+    ]
+
+    result = link_workouts_to_tags(workouts, tags)
+    assert [workout['name'] for workout in result] == [
+        'Workout A', 'Workout B', 'Workout C']
+    assert result[0]['tags'] == [{'tagId': 11, 'tag': 'Tag B'}]
+    assert result[1]['tags'] == [
+        {'tagId': 10, 'tag': 'Tag A'}, {'tagId': 11, 'tag': 'Tag B'}]
+    assert result[2]['tags'] == []
+    assert 'tags' not in workouts[0]
+
+
+# List with pagination
+@pytest.mark.parametrize(('sort_type', 'names'), (
+    ('0', [b'Workout A from admin', b'Workout A from test1',
+           b'Workout B from admin', b'Workout B from test1']),
+    ('1', [b'Workout B from test1', b'Workout B from admin',
+           b'Workout A from test1', b'Workout A from admin']),
+))
+def test_list_pagination(client, auth, app, sort_type, names):
+    app.config['WORKOUT_PAGE_SIZE'] = 1
+    auth.login()
+    # Initialize entry in table_user_prefs
+    client.get('/workout/')
+    client.post(
+        '/user/prefs/update/workout/',
+        data={'inputSort': sort_type, 'inputFilter': '0'}
+    )
+
+    url = '/workout/'
+    for i, name in enumerate(names):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert name in response.data
+        for other in names[:i] + names[i + 1:]:
+            assert other not in response.data
+        if i > 0:
+            assert b'id="firstPage"' in response.data
+
+        next_page = re.search(rb'id="nextPage" href="([^"]+)"', response.data)
+        if i == len(names) - 1:
+            assert next_page is None
+        else:
+            url = next_page.group(1).decode('utf-8')
+
+
+@pytest.mark.parametrize(('cursor'), (
+    ('abc'),
+    ('WyJhIl0='),  # ["a"]
+    ('WzEsICJhIl0='),  # [1, "a"]
+    ('ä'),
+))
+def test_list_pagination_invalid_cursor(client, auth, cursor):
+    auth.login()
+    response = client.get('/workout/', query_string={'after': cursor})
+    assert response.status_code == 200
+    assert b'Workout A from admin' in response.data
+
+
+@pytest.mark.parametrize(('query', 'names'), (
+    ('work adm', ['Workout A from admin', 'Workout B from admin']),
+    ('WORK', ['Workout A from admin', 'Workout A from test1',
+              'Workout B from admin', 'Workout B from test1']),
+    ('descr test1', ['Workout A from test1', 'Workout B from test1']),
+    ('test2', []),
+    ('"b" from"', ['Workout B from admin', 'Workout B from test1']),
+    ('', []),
+    ('"', []),
+))
+def test_search(client, auth, query, names):
+    auth.login()
+    response = client.get('/workout/search', query_string={'q': query})
+    assert response.status_code == 200
+    assert sorted(workout['name'] for workout in response.json['workouts']) \
+        == names
+    assert response.json['next_page'] is None
+
+
+def test_search_ranking(client, auth):
+    auth.login()
+    response = client.get('/workout/search', query_string={'q': 'admin'})
+    # Workouts with a match in the name rank before matches in the description
+    assert [w['id'] for w in response.json['workouts']][:2] in ([1, 2], [2, 1])
+
+
+def test_search_pagination(client, auth, app):
+    app.config['SEARCH_PAGE_SIZE'] = 3
+    auth.login()
+    response = client.get('/workout/search', query_string={'q': 'workout'})
+    assert len(response.json['workouts']) == 3
+    assert response.json['next_page'] == 2
+
+    names = [workout['name'] for workout in response.json['workouts']]
+    response = client.get(
+        '/workout/search', query_string={'q': 'workout', 'page': 2})
+    assert len(response.json['workouts']) == 1
+    assert response.json['next_page'] is None
+    assert response.json['workouts'][0]['name'] not in names
+
+
+# Invalid pages are the first one
+@pytest.mark.parametrize(('page'), ('0', '-1', 'abc', '\u00b2'))
+def test_search_invalid_page(client, auth, page):
+    auth.login()
+    response = client.get(
+        '/workout/search', query_string={'q': 'workout', 'page': page})
+    assert response.status_code == 200
+    assert response.json['page'] == 1
+
+
+def test_search_sync(client, auth):
+    auth.login()
+    client.post(
+        '/workout/add',
+        data={'name': 'Fran', 'description': '21-15-9 Thrusters, Pull-Ups'}
+    )
+    client.post(
+        '/workout/3/update',
+        data={'name': 'Grace', 'description': '30 Clean-and-Jerks'}
+    )
+    client.get('/workout/4/delete')
+
+    response = client.get('/workout/search', query_string={'q': 'thru'})
+    assert [w['name'] for w in response.json['workouts']] == ['Fran']
+    response = client.get('/workout/search', query_string={'q': 'grace'})
+    assert [w['id'] for w in response.json['workouts']] == [3]
+    response = client.get('/workout/search', query_string={'q': 'test1'})
+    assert response.json['workouts'] == []
+
+
+def test_search_nologin(client):
+    response = client.get('/workout/search', query_string={'q': 'workout'})
+    assert response.status_code == 302
@@ -1,5 +1,4 @@
 import os
-import time
 
 from flask import Flask
 
@@ -23,13 +22,33 @@ def create_app(test_config=None):
     except OSError:
         pass
 
-    # Set timezone global
-    os.environ['TZ'] = app.config['TIMEZONE']
-    time.tzset()
-
     from . import db
     db.init_app(app)
 
+    from . import conditional
+    conditional.init_app(app)
+
+    from . import identity
+    identity.init_app(app)
+
+    from . import records
+    records.init_app(app)
+
+    from . import importer
+    importer.init_app(app)
+
+    from . import exporter
+    exporter.init_app(app)
+
+    from . import bundles
+    bundles.init_app(app)
+
+    from . import fragments
+    fragments.init_app(app)
+
+    from . import compression
+    compression.init_app(app)
+
     from .views import auth
     from .views import dashboard
     from .views import user
@@ -38,6 +57,9 @@ def create_app(test_config=None):
     from .views import movement
     from .views import equipment
     from .views import tag
+    from .views import data
+    from .views import leaderboard
+    from .views import sync
     app.register_blueprint(auth.bp)
     app.register_blueprint(dashboard.bp)
     app.add_url_rule('/', endpoint='index')
@@ -47,5 +69,8 @@ def create_app(test_config=None):
     app.register_blueprint(movement.bp)
     app.register_blueprint(equipment.bp)
     app.register_blueprint(tag.bp)
+    app.register_blueprint(data.bp)
+    app.register_blueprint(leaderboard.bp)
+    app.register_blueprint(sync.bp)
 
     return app
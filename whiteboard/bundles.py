@@ -0,0 +1,200 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+
+# The build works without them, but doesn't compile the SCSS (the
+# committed css/style.css is used), minify or write brotli variants then.
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+try:
+    import rcssmin
+except ImportError:  # pragma: no cover
+    rcssmin = None
+try:
+    import rjsmin
+except ImportError:  # pragma: no cover
+    rjsmin = None
+try:
+    import sass
+except ImportError:  # pragma: no cover
+    sass = None
+
+# Folder of the built assets in the static folder
+ASSETS_DIR = 'dist'
+# Built assets never change, their name changes with their content
+MAX_AGE = 31536000
+
+# Assets built by `flask build-assets` with their sources in the static
+# folder. css/style.css is compiled from assets/scss/style.scss.
+BUNDLES = {
+    'css/app.css': ('css/lib/w3pro.css', 'css/lib/Chart.min.css',
+                    'css/style.css'),
+    'js/lib/Chart.min.js': ('js/lib/Chart.min.js',),
+    'js/app.js': ('js/sidebar.js', 'js/collapse.js', 'js/search.js',
+                  'js/offline.js'),
+    'js/list.js': ('js/general/handle_dialog.js',),
+    'js/workout/list.js': ('js/general/handle_dialog.js',
+                           'js/workout/handle_dialog.js'),
+    'js/workout/entry.js': ('js/workout/handle_dialog.js',
+                            'js/score/handle_dialog.js',
+                            'js/score/chart.js'),
+    'js/tag/list.js': ('js/general/handle_dialog.js',
+                       'js/tag/handle_dialog.js'),
+}
+
+# Precompressed variants by content coding, best first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def init_app(app):
+    app.cli.add_command(build_assets_command)
+    app.url_defaults(add_asset_hash)
+    app.jinja_env.globals['asset_urls'] = asset_urls
+    if app.has_static_folder:
+        app.view_functions['static'] = send_static
+    app.extensions['whiteboard_assets'] = load_manifest(app.static_folder)
+
+
+# Built names by source name, empty if the assets were never built
+def load_manifest(static_folder):
+    path = os.path.join(static_folder or '', ASSETS_DIR, 'manifest.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def get_manifest():
+    return current_app.extensions['whiteboard_assets']
+
+
+# url_for('static', filename=...) points to the built asset, if any
+def add_asset_hash(endpoint, values):
+    if endpoint != 'static' or 'filename' not in values:
+        return
+
+    built = current_app.extensions.get('whiteboard_assets', {}).get(
+        values['filename'])
+    if built is not None:
+        values['filename'] = built
+
+
+# URLs of a bundle for the templates, its sources if it wasn't built
+def asset_urls(name):
+    if name in get_manifest():
+        return [url_for('static', filename=name)]
+
+    return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+
+# Serve the built assets precompressed if the client accepts it and cached
+# for good. Everything else is served as before.
+def send_static(filename):
+    if not filename.startswith(ASSETS_DIR + '/'):
+        return current_app.send_static_file(filename)
+
+    encoding, suffix = None, ''
+    for coding, extension in ENCODINGS:
+        if (request.accept_encodings[coding] and os.path.isfile(
+                os.path.join(current_app.static_folder,
+                             filename + extension))):
+            encoding, suffix = coding, extension
+            break
+
+    response = send_from_directory(
+        current_app.static_folder, filename + suffix,
+        mimetype=mimetypes.guess_type(filename)[0], max_age=MAX_AGE)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+
+    return response
+
+
+def read_source(static_folder, source):
+    if source == 'css/style.css' and sass is not None:
+        return sass.compile(
+            filename=os.path.join(current_app.root_path, 'assets', 'scss',
+                                  'style.scss'),
+            output_style='compressed')
+
+    with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+        text = f.read()
+
+    if '.min.' in source:
+        return text
+    if source.endswith('.css') and rcssmin is not None:
+        return rcssmin.cssmin(text)
+    if source.endswith('.js') and rjsmin is not None:
+        return rjsmin.jsmin(text)
+    return text
+
+
+# Join the sources of a bundle. Scripts are separated by a semicolon, so a
+# missing one at the end of a file can't join two statements.
+def build_bundle(static_folder, name):
+    sources = [read_source(static_folder, source)
+               for source in BUNDLES[name]]
+    separator = ';\n' if name.endswith('.js') else '\n'
+
+    return separator.join(sources).encode('utf-8')
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+# Build all bundles to ASSETS_DIR with the hash of their content in the
+# name, e.g. dist/css/app.0123456789ab.css, precompressed variants next to
+# them and the manifest.json of the built names. Returns the manifest.
+def build_assets(static_folder=None):
+    static_folder = static_folder or current_app.static_folder
+    output = os.path.join(static_folder, ASSETS_DIR)
+    shutil.rmtree(output, ignore_errors=True)
+
+    manifest = {}
+    for name in BUNDLES:
+        data = build_bundle(static_folder, name)
+        root, extension = os.path.splitext(name)
+        built = '{}/{}.{}{}'.format(
+            ASSETS_DIR, root, hashlib.sha256(data).hexdigest()[:12],
+            extension)
+        path = os.path.join(static_folder, built)
+
+        write_file(path, data)
+        # mtime=0, so the same content always gives the same file
+        write_file(path + '.gz', gzip.compress(data, 9, mtime=0))
+        if brotli is not None:
+            write_file(path + '.br', brotli.compress(data))
+        manifest[name] = built
+
+    write_file(os.path.join(output, 'manifest.json'),
+               json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    current_app.extensions['whiteboard_assets'] = manifest
+
+    return manifest
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Bundle, minify and precompress the static assets."""
+    manifest = build_assets()
+    for name, built in sorted(manifest.items()):
+        click.echo('{} -> {}'.format(name, built))
+    if sass is None:
+        click.echo('libsass is not installed, used css/style.css as is.')
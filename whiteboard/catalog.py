@@ -0,0 +1,82 @@
+import bisect
+import threading
+
+from flask import current_app, g
+
+from .db import get_db
+
+_catalog_lock = threading.Lock()
+
+
+# Read-only snapshot of the default workouts (userId = 1) and their tags,
+# sorted by (name, id) like the keyset of the workout list.
+class Catalog(object):
+    def __init__(self, version, workouts):
+        self.version = version
+        self.workouts = tuple(workouts)
+        self.keys = [(workout['name'], workout['id'])
+                     for workout in self.workouts]
+        self.by_id = {workout['id']: workout for workout in self.workouts}
+
+    def get(self, workout_id):
+        return self.by_id.get(workout_id)
+
+    # Up to limit workouts following the (name, id) keyset cursor
+    def page(self, after, ascending, limit):
+        if ascending:
+            start = 0
+            if after is not None:
+                start = bisect.bisect_right(self.keys, tuple(after))
+            return self.workouts[start:start + limit]
+
+        end = len(self.keys)
+        if after is not None:
+            end = bisect.bisect_left(self.keys, tuple(after))
+        return self.workouts[max(end - limit, 0):end][::-1]
+
+
+def get_catalog_version():
+    return get_db().execute(
+        'SELECT version FROM table_catalog_version'
+    ).fetchone()[0]
+
+
+# Get the catalog, reloading it from the db if the catalog version changed.
+# The version is checked once per request.
+def get_catalog():
+    if 'catalog' in g:
+        return g.catalog
+
+    version = get_catalog_version()
+    catalog = current_app.extensions.get('whiteboard_catalog')
+
+    if catalog is None or catalog.version != version:
+        with _catalog_lock:
+            catalog = current_app.extensions.get('whiteboard_catalog')
+            if catalog is None or catalog.version != version:
+                catalog = load_catalog(version)
+                current_app.extensions['whiteboard_catalog'] = catalog
+
+    g.catalog = catalog
+    return catalog
+
+
+def load_catalog(version):
+    # Imported here, the workout views depend on this module
+    from .views.workout import link_workouts_to_tags
+
+    db = get_db()
+    workouts = db.execute(
+        'SELECT id, userId, name, description, datetime'
+        ' FROM table_workout WHERE userId = 1'
+        ' ORDER BY name ASC, id ASC'
+    ).fetchall()
+    tags = db.execute(
+        'SELECT wt.workoutId, t.id AS tagId, t.tag'
+        ' FROM table_workout_tags wt'
+        ' INNER JOIN table_workout w ON w.id = wt.workoutId'
+        ' INNER JOIN table_tags t ON t.id = wt.tagId'
+        ' WHERE w.userId = 1'
+    ).fetchall()
+
+    return Catalog(version, link_workouts_to_tags(workouts, tags))
@@ -0,0 +1,126 @@
+import time
+
+from flask import g
+
+from .db import get_db
+
+# Synced data by kind as (columns, query). The condition appended to the
+# query selects the rows a user sees: the own workouts and tags and those
+# of the default catalog (userId = 1), but only the own scores.
+SYNC_KINDS = {
+    'workouts': (
+        ('id', 'userId', 'name', 'description', 'datetime', 'tags'),
+        'SELECT w.id, w.userId, w.name, w.description, w.datetime,'
+        " (SELECT GROUP_CONCAT(wt.tagId, ',')"
+        '  FROM table_workout_tags wt WHERE wt.workoutId = w.id) AS tags'
+        ' FROM table_workout w'
+        ' WHERE (w.userId = 1 OR w.userId = ?)'
+    ),
+    'tags': (
+        ('id', 'userId', 'tag'),
+        'SELECT id, userId, tag FROM table_tags'
+        ' WHERE (userId = 1 OR userId = ?)'
+    ),
+    'scores': (
+        ('id', 'workoutId', 'score', 'scoreValue', 'scoreType', 'rx',
+         'datetime', 'note'),
+        'SELECT id, workoutId, score, scoreValue, scoreType, rx, datetime,'
+        ' note FROM table_workout_score'
+        ' WHERE userId = ?'
+    ),
+}
+
+
+# Log a change of the given workouts, tags or scores of the current or the
+# given user. Call it in the same transaction as the write.
+def record_changes(kind, item_ids, deleted=False, user_id=None):
+    user_id = user_id if user_id is not None else g.user['id']
+    modified = int(time.time())
+
+    get_db().executemany(
+        'INSERT OR REPLACE INTO table_changelog'
+        ' (userId, kind, itemId, deleted, modified)'
+        ' VALUES (?, ?, ?, ?, ?)',
+        ((user_id, kind, item_id, 1 if deleted else 0, modified,)
+         for item_id in item_ids)
+    )
+
+
+def record_change(kind, item_id, deleted=False, user_id=None):
+    record_changes(kind, (item_id,), deleted, user_id)
+
+
+def get_version():
+    return get_db().execute(
+        'SELECT COALESCE(MAX(id), 0) FROM table_changelog'
+    ).fetchone()[0]
+
+
+def load_items(kind, user_id, item_ids=None):
+    columns, query = SYNC_KINDS[kind]
+    params = [user_id]
+    if item_ids is not None:
+        if not item_ids:
+            return []
+        query += ' AND id IN (' + ', '.join('?' * len(item_ids)) + ')'
+        params.extend(item_ids)
+
+    items = []
+    for row in get_db().execute(query + ' ORDER BY id', params):
+        item = dict(zip(columns, row))
+        if kind == 'workouts':
+            item['tags'] = [int(tag_id) for tag_id in
+                            item['tags'].split(',')] if item['tags'] else []
+        items.append(item)
+
+    return items
+
+
+# The workouts, tags and scores of the user changed since the given
+# version, at most limit changes at once ("more" tells if there are
+# others). Without a version or with one the server never handed out
+# (e.g. after restoring a backup) all of them are returned, with "full"
+# set so the client drops its copy first. The version is read before the
+# data, so a change in between is sent again with the next sync rather
+# than lost.
+def get_changes(user_id, since, limit):
+    version = get_version()
+    changes = {
+        'version': version,
+        'full': since is None or since > version,
+        'more': False,
+        'deleted': {kind: [] for kind in SYNC_KINDS},
+    }
+
+    if changes['full']:
+        for kind in SYNC_KINDS:
+            changes[kind] = load_items(kind, user_id)
+        return changes
+
+    rows = get_db().execute(
+        'SELECT id, kind, itemId, deleted FROM table_changelog'
+        ' WHERE id > ? AND id <= ?'
+        " AND (userId = ? OR (userId = 1 AND kind != 'scores'))"
+        ' ORDER BY id LIMIT ?',
+        (since, version, user_id, limit + 1,)
+    ).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        changes['version'] = rows[-1]['id']
+        changes['more'] = True
+
+    changed = {kind: [] for kind in SYNC_KINDS}
+    for row in rows:
+        if row['deleted']:
+            changes['deleted'][row['kind']].append(row['itemId'])
+        else:
+            changed[row['kind']].append(row['itemId'])
+
+    for kind, item_ids in changed.items():
+        changes[kind] = load_items(kind, user_id, item_ids)
+        # Gone without a logged delete
+        found = {item['id'] for item in changes[kind]}
+        changes['deleted'][kind].extend(
+            item_id for item_id in item_ids if item_id not in found)
+
+    return changes
@@ -0,0 +1,301 @@
+import re
+import threading
+import time
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+from werkzeug.wsgi import ClosingIterator
+
+# Optional, gzip is always there
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Content codings appended to the ETag of compressed responses, so caches
+# don't mix up the encoded and the plain body
+_etag_suffix = re.compile(r'-(gzip|br|zstd)"')
+
+
+def init_app(app):
+    middleware = CompressionMiddleware(
+        app.wsgi_app,
+        codings=app.config['COMPRESS_CODINGS'],
+        levels=app.config['COMPRESS_LEVELS'],
+        min_size=app.config['COMPRESS_MIN_SIZE'],
+        mimetypes=app.config['COMPRESS_MIMETYPES'])
+    app.wsgi_app = middleware
+    app.extensions['whiteboard_compression'] = middleware
+
+
+def get_compression_stats(app):
+    return app.extensions['whiteboard_compression'].stats()
+
+
+# Incremental compressors with the same interface: compress() returns what
+# is ready, flush() everything so far (for streamed responses), finish()
+# the rest
+class _GzipCompressor(object):
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor(object):
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class _ZstdCompressor(object):
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+COMPRESSORS = {'gzip': _GzipCompressor}
+if brotli is not None:
+    COMPRESSORS['br'] = _BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS['zstd'] = _ZstdCompressor
+
+
+# Compress the responses of a WSGI app with the best content coding the
+# client accepts. Responses with a known length below min_size, other
+# mimetypes, already encoded ones (e.g. the precompressed assets) and
+# anything but 200 are passed through. Streamed responses stay streamed,
+# every chunk is flushed. The first chunks are held back until min_size
+# is reached, so a short streamed response isn't compressed either. All
+# responses of the compressed mimetypes get Vary: Accept-Encoding, whether
+# they are compressed or not, so a cache doesn't hand out the wrong one.
+class CompressionMiddleware(object):
+    def __init__(self, app, codings=('br', 'zstd', 'gzip'), levels=None,
+                 min_size=500, mimetypes=('text/html', 'application/json')):
+        self.app = app
+        # The available ones in order of preference
+        self.codings = [coding for coding in codings
+                        if coding in COMPRESSORS]
+        self.levels = levels or {}
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+        self._lock = threading.Lock()
+        self._stats = {
+            'compressed': 0,
+            'skipped': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'cpu_time': 0.0,
+        }
+
+    def __call__(self, environ, start_response):
+        coding = self.negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None or environ['REQUEST_METHOD'] == 'HEAD':
+            def vary(status, headers, exc_info=None):
+                headers = Headers(headers)
+                if self._is_compressible(status, headers):
+                    add_vary(headers)
+                return start_response(status, headers.to_wsgi_list(),
+                                      exc_info)
+
+            return self.app(environ, vary)
+
+        # The app compares the ETags of the plain body
+        matched = strip_etag_suffix(environ)
+        captured = []
+        # Body passed to the legacy write() callable, it comes before the
+        # returned iterable
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            if exc_info is not None and captured:
+                raise exc_info[1].with_traceback(exc_info[2])
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        app_iter = self.app(environ, capture)
+        return ClosingIterator(
+            self._respond(app_iter, captured, written, coding, matched,
+                          start_response),
+            getattr(app_iter, 'close', None))
+
+    # Best coding the client accepts, ties go to the server's order
+    def negotiate(self, header):
+        accept = parse_accept_header(header)
+        best, best_quality = None, 0
+        for coding in self.codings:
+            quality = accept.quality(coding)
+            if quality > best_quality:
+                best, best_quality = coding, quality
+
+        return best
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+        return stats
+
+    def _respond(self, app_iter, captured, written, coding, matched,
+                 start_response):
+        chunks = iter(app_iter)
+        # Flask calls start_response before the first chunk, but a
+        # WSGI app doesn't have to
+        pending = written
+        size = sum(len(chunk) for chunk in written)
+        finished = False
+        while not captured:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                finished = True
+                break
+            pending.append(chunk)
+            size += len(chunk)
+
+        status, headers, exc_info = captured
+        headers = Headers(headers)
+        if self._should_compress(status, headers):
+            length = headers.get('Content-Length', type=int)
+            if length is not None:
+                # Not streamed, compress it in one go
+                pending.extend(chunks)
+                finished = True
+            else:
+                # Hold back the start of a streamed response up to min_size
+                while not finished and size < self.min_size:
+                    try:
+                        chunk = next(chunks)
+                    except StopIteration:
+                        finished = True
+                        break
+                    pending.append(chunk)
+                    size += len(chunk)
+                if finished:
+                    length = size
+            compress = length is None or length >= self.min_size
+        else:
+            compress = False
+            if matched is not None and status.startswith('304'):
+                add_etag_suffix(headers, matched)
+
+        if not compress:
+            self._count('skipped')
+            if self._is_compressible(status, headers):
+                add_vary(headers)
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            yield from pending
+            if not finished:
+                yield from chunks
+            return
+
+        headers['Content-Encoding'] = coding
+        headers.remove('Content-Length')
+        add_vary(headers)
+        add_etag_suffix(headers, coding)
+        compressor = COMPRESSORS[coding](self.levels.get(coding, 6))
+
+        if finished:
+            # All of it is here, so the length is known
+            body = self._compress(compressor, pending, True)
+            headers['Content-Length'] = str(len(body))
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            yield body
+            return
+
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        yield self._compress(compressor, pending, False)
+        for chunk in chunks:
+            if chunk:
+                yield self._compress(compressor, [chunk], False)
+        yield self._compress(compressor, [], True)
+
+    def _should_compress(self, status, headers):
+        mimetype = headers.get('Content-Type', '').split(';')[0].strip()
+        return (status.startswith('200')
+                and mimetype in self.mimetypes
+                and 'Content-Encoding' not in headers
+                and 'no-transform' not in headers.get('Cache-Control', ''))
+
+    # Whether the response might be compressed for another client, a 304
+    # stands for such a page too
+    def _is_compressible(self, status, headers):
+        mimetype = headers.get('Content-Type', '').split(';')[0].strip()
+        return mimetype in self.mimetypes or status.startswith('304')
+
+    def _compress(self, compressor, chunks, finish):
+        started = time.thread_time()
+        data = [compressor.compress(chunk) for chunk in chunks]
+        data.append(compressor.finish() if finish else compressor.flush())
+        data = b''.join(data)
+        cpu_time = time.thread_time() - started
+
+        with self._lock:
+            self._stats['bytes_in'] += sum(len(chunk) for chunk in chunks)
+            self._stats['bytes_out'] += len(data)
+            self._stats['cpu_time'] += cpu_time
+            if finish:
+                self._stats['compressed'] += 1
+
+        return data
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+
+# Remove the coding suffixes from If-None-Match and return the coding of
+# the last one, None if there was none
+def strip_etag_suffix(environ):
+    header = environ.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return None
+
+    matched = _etag_suffix.findall(header)
+    if not matched:
+        return None
+    environ['HTTP_IF_NONE_MATCH'] = _etag_suffix.sub('"', header)
+    return matched[-1]
+
+
+# "abc" becomes "abc-gzip", W/"abc" becomes W/"abc-gzip"
+def add_etag_suffix(headers, coding):
+    etag = headers.get('ETag')
+    if etag and etag.endswith('"'):
+        headers['ETag'] = '{}-{}"'.format(etag[:-1], coding)
+
+
+def add_vary(headers):
+    vary = [value.strip() for value in headers.get('Vary', '').split(',')
+            if value.strip()]
+    if 'accept-encoding' not in (value.lower() for value in vary):
+        vary.append('Accept-Encoding')
+    headers['Vary'] = ', '.join(vary)
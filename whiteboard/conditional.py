@@ -0,0 +1,117 @@
+import calendar
+import functools
+import hashlib
+import os
+import time
+
+from flask import current_app, g, make_response, request, session
+
+from .bundles import get_manifest
+from .db import get_db
+
+
+def init_app(app):
+    app.extensions['whiteboard_template_digest'] = get_template_digest(app)
+
+
+# Digest over all templates, so a deployment with changed templates doesn't
+# answer with 304 for pages rendered by the old ones. It is the same in all
+# worker processes.
+def get_template_digest(app):
+    digest = hashlib.sha1()
+    template_folder = os.path.join(app.root_path, app.template_folder)
+
+    for root, dirs, files in sorted(os.walk(template_folder)):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, template_folder).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+# Mark the data of the current or the given user as changed
+# Call it in the same transaction as the write.
+def bump_data_version(user_id=None):
+    get_db().execute(
+        'UPDATE table_users'
+        ' SET dataVersion = dataVersion + 1, dataModified = ?'
+        ' WHERE id = ?',
+        (int(time.time()),
+         user_id if user_id is not None else g.user['id'],)
+    )
+
+
+# Data version of the current user. Read it before the data it stands for,
+# so the data is at least as new as the version.
+def get_data_version():
+    return get_db().execute(
+        'SELECT dataVersion FROM table_users WHERE id = ?',
+        (g.user['id'],)
+    ).fetchone()[0]
+
+
+# Get the ETag and last modification time of the current page. Both change
+# with the data of the user, the default catalog, the request and the
+# templates. The ETag also changes with the built assets, whose names are
+# in the page.
+def get_page_version():
+    version = get_db().execute(
+        'SELECT u.dataVersion, u.dataModified, c.version, c.modified'
+        ' FROM table_users u, table_catalog_version c'
+        ' WHERE u.id = ?',
+        (g.user['id'],)
+    ).fetchone()
+
+    etag = hashlib.sha1(repr((
+        current_app.extensions['whiteboard_template_digest'],
+        sorted(get_manifest().items()),
+        request.endpoint,
+        sorted(request.view_args.items()),
+        request.query_string,
+        g.user['id'],
+        version['dataVersion'],
+        version['version'],
+    )).encode('utf-8')).hexdigest()
+
+    return etag, max(version['dataModified'], version['modified'])
+
+
+# Answer conditional GET requests with 304 Not Modified before the view
+# renders anything. Has to be used after login_required.
+def conditional(view):
+    @functools.wraps(view)
+    def wrapped_view(**kwargs):
+        # Flashed messages are part of the page and consumed by rendering it
+        if request.method != 'GET' or '_flashes' in session:
+            return view(**kwargs)
+
+        etag, last_modified = get_page_version()
+
+        # If-Modified-Since only counts without If-None-Match (RFC 7232)
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        elif request.if_modified_since:
+            not_modified = last_modified <= calendar.timegm(
+                request.if_modified_since.utctimetuple())
+        else:
+            not_modified = False
+
+        if not_modified:
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(**kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        # Browsers may keep the page, but have to revalidate it every time
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+        return response
+
+    return wrapped_view
@@ -1,33 +1,203 @@
+import os
+import re
 import sqlite3
+import threading
+import time
 
 import click
 from flask import current_app, g
 from flask.cli import with_appcontext
 
+from .utils import score_to_value
+
+_pool_lock = threading.Lock()
+
 
 def init_app(app):
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(backfill_scores_command)
+    app.cli.add_command(backup_db_command)
 
 
-def get_db():
-    if 'db' not in g:
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
+# Bounded pool of tuned connections, one pool per app and worker process.
+# Idle connections remember the thread that released them and are handed
+# back to that thread first, so a gunicorn thread keeps its warm page cache.
+class ConnectionPool(object):
+    def __init__(self, database, size, timeout, pragmas):
+        self.database = database
+        self.size = max(int(size), 1)
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self.pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = []  # (thread ident, connection)
+        self._opened = 0
+        self._closed = False
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'discarded': 0,
+        }
+
+    def acquire(self):
+        ident = threading.get_ident()
+        started = None
+
+        with self._cond:
+            try:
+                while True:
+                    conn = self._pop_idle(ident)
+                    if conn is not None:
+                        if self._is_healthy(conn):
+                            self._stats['hits'] += 1
+                            return conn
+                        self._discard(conn)
+                        continue
+
+                    if self._opened < self.size:
+                        self._opened += 1
+                        self._stats['misses'] += 1
+                        break
+
+                    if started is None:
+                        started = time.monotonic()
+                        self._stats['waits'] += 1
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise sqlite3.OperationalError(
+                            'database connection pool exhausted')
+                    self._cond.wait(remaining)
+            finally:
+                if started is not None:
+                    self._stats['wait_time'] += time.monotonic() - started
+
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        try:
+            # Never hand out a connection with a dangling transaction
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            with self._cond:
+                self._discard(conn)
+                self._cond.notify()
+            return
+
+        with self._cond:
+            if self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((threading.get_ident(), conn))
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop()[1])
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open'] = self._opened
+            stats['idle'] = len(self._idle)
+        return stats
+
+    def _pop_idle(self, ident):
+        for i in range(len(self._idle) - 1, -1, -1):
+            if self._idle[i][0] == ident:
+                return self._idle.pop(i)[1]
+        if self._idle:
+            return self._idle.pop()[1]
+        return None
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def _discard(self, conn):
+        self._opened -= 1
+        self._stats['discarded'] += 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            # Connections move between threads via the pool, but are only
+            # ever used by one request at a time
+            check_same_thread=False
         )
+        for key, value in self.pragmas.items():
+            conn.execute('PRAGMA {} = {}'.format(key, value))
         # Tells the connection to return rows that behave like dicts.
         # This allows accessing the columns by name.
-        g.db.row_factory = sqlite3.Row
+        conn.row_factory = sqlite3.Row
+
+        return conn
+
+
+def get_pool():
+    pool = current_app.extensions.get('whiteboard_db_pool')
+
+    # A forked worker must not reuse the connections of its parent
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            pool = current_app.extensions.get('whiteboard_db_pool')
+            if pool is None or pool.pid != os.getpid():
+                pool = ConnectionPool(
+                    current_app.config['DATABASE'],
+                    current_app.config['DATABASE_POOL_SIZE'],
+                    current_app.config['DATABASE_POOL_TIMEOUT'],
+                    current_app.config['DATABASE_PRAGMAS'])
+                current_app.extensions['whiteboard_db_pool'] = pool
+
+    return pool
+
+
+def get_pool_stats():
+    return get_pool().stats()
+
+
+def close_pool():
+    pool = current_app.extensions.pop('whiteboard_db_pool', None)
+
+    if pool is not None:
+        pool.close()
+
+
+def get_db():
+    if 'db' not in g:
+        g.db_pool = get_pool()
+        g.db = g.db_pool.acquire()
 
     return g.db
 
 
 def close_db(e=None):
     db = g.pop('db', None)
+    pool = g.pop('db_pool', None)
 
     if db is not None:
-        db.close()
+        pool.release(db)
 
 
 def init_db():
@@ -36,6 +206,118 @@ def init_db():
     with current_app.open_resource('schema.sql') as f:
         db.executescript(f.read().decode('utf8'))
 
+    migrate()
+
+
+# Ordered list of (version, filename) found in the migrations folder,
+# e.g. 0002_indexes.sql
+def get_migrations():
+    migrations = []
+    for filename in os.listdir(os.path.join(current_app.root_path,
+                                            'migrations')):
+        match = re.fullmatch(r'(\d+)_\w+\.sql', filename)
+        if match is not None:
+            migrations.append((int(match.group(1)), filename))
+
+    return sorted(migrations)
+
+
+def get_schema_version():
+    db = get_db()
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS schema_version ('
+        ' version INTEGER PRIMARY KEY,'
+        ' name TEXT,'
+        ' applied INTEGER)'
+    )
+    db.commit()
+
+    return db.execute(
+        'SELECT COALESCE(MAX(version), 0) FROM schema_version'
+    ).fetchone()[0]
+
+
+# Apply all pending migrations, each one in its own transaction
+def migrate():
+    db = get_db()
+    current = get_schema_version()
+    applied = []
+
+    for version, filename in get_migrations():
+        if version <= current:
+            continue
+
+        with current_app.open_resource('migrations/' + filename) as f:
+            script = f.read().decode('utf8')
+
+        try:
+            # executescript() commits first, the explicit BEGIN keeps the
+            # migration and its schema_version row in one transaction
+            db.executescript('BEGIN;\n' + script)
+            db.execute(
+                'INSERT INTO schema_version(version, name, applied)'
+                ' VALUES (?, ?, ?)',
+                (version, filename, int(time.time()),)
+            )
+            db.commit()
+        except sqlite3.Error:
+            db.rollback()
+            raise
+
+        applied.append(filename)
+
+    return applied
+
+
+# Fill in the typed score value of rows written before it existed.
+# Returns the number of updated and of invalid scores.
+def backfill_scores():
+    db = get_db()
+    scores = db.execute(
+        'SELECT id, userId, workoutId, score FROM table_workout_score'
+        ' WHERE scoreType IS NULL'
+    ).fetchall()
+
+    values = []
+    pairs = set()
+    for score in scores:
+        value, value_type = score_to_value(score['score'])
+        if value is not None:
+            values.append((value, value_type, score['id'],))
+            pairs.add((score['userId'], score['workoutId']))
+
+    db.executemany(
+        'UPDATE table_workout_score SET scoreValue = ?, scoreType = ?'
+        ' WHERE id = ?',
+        values
+    )
+    # Pages showing the scores have to be rendered again
+    db.executemany(
+        'UPDATE table_users SET dataVersion = dataVersion + 1 WHERE id = ?',
+        ((user_id,) for user_id in sorted({pair[0] for pair in pairs}))
+    )
+    # The personal records depend on the values
+    from .records import rebuild_records
+    rebuild_records(sorted(pairs))
+
+    return len(values), len(scores) - len(values)
+
+
+# Copy the database to path with the online backup API. It copies a few
+# pages per step and sleeps in between, so writers are never blocked for
+# long. A write during the backup restarts it.
+def backup_db(path, pages=None, sleep=None):
+    target = sqlite3.connect(path)
+    try:
+        with target:
+            get_db().backup(
+                target,
+                pages=pages or current_app.config['BACKUP_PAGES'],
+                sleep=(sleep if sleep is not None
+                       else current_app.config['BACKUP_SLEEP']))
+    finally:
+        target.close()
+
 
 @click.command('init-db')
 @with_appcontext
@@ -43,3 +325,31 @@ def init_db_command():
     """Clear the existing data and create new tables."""
     init_db()
     click.echo('Initialized the database.')
+
+
+@click.command('migrate')
+@with_appcontext
+def migrate_command():
+    """Upgrade the database schema in place."""
+    applied = migrate()
+    for filename in applied:
+        click.echo('Applied migration {}.'.format(filename))
+    click.echo('Database schema is at version {}.'.format(
+        get_schema_version()))
+
+
+@click.command('backfill-scores')
+@with_appcontext
+def backfill_scores_command():
+    """Fill in the typed value of existing scores."""
+    updated, invalid = backfill_scores()
+    click.echo('Updated {} scores, {} invalid.'.format(updated, invalid))
+
+
+@click.command('backup-db')
+@click.argument('path', type=click.Path(dir_okay=False))
+@with_appcontext
+def backup_db_command(path):
+    """Copy the database to a file while it is in use."""
+    backup_db(path)
+    click.echo('Saved the database to {}.'.format(path))
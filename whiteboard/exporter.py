@@ -0,0 +1,131 @@
+import csv
+import json
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .db import get_db
+
+FORMATS = ('csv', 'ndjson')
+
+# Data of a user by kind as (columns, query with the user id as parameter).
+# The score columns match the importer, so exported scores can be imported
+# again. The tags of a workout are a JSON array, since tag names may hold
+# any separator; NDJSON has them as a list, CSV as the JSON text.
+EXPORTS = {
+    'workouts': (
+        ('id', 'name', 'description', 'datetime', 'tags'),
+        'SELECT w.id, w.name, w.description, w.datetime,'
+        ' (SELECT json_group_array(t.tag)'
+        '  FROM table_workout_tags wt'
+        '  INNER JOIN table_tags t ON t.id = wt.tagId'
+        '  WHERE wt.workoutId = w.id) AS tags'
+        ' FROM table_workout w WHERE w.userId = ?'
+        ' ORDER BY w.id'
+    ),
+    'scores': (
+        ('id', 'workout', 'score', 'datetime', 'rx', 'note', 'scoreValue',
+         'scoreType'),
+        'SELECT s.id, w.name AS workout, s.score, s.datetime, s.rx, s.note,'
+        ' s.scoreValue, s.scoreType'
+        ' FROM table_workout_score s'
+        ' LEFT JOIN table_workout w ON w.id = s.workoutId'
+        ' WHERE s.userId = ?'
+        ' ORDER BY s.id'
+    ),
+    'tags': (
+        ('id', 'tag'),
+        'SELECT id, tag FROM table_tags WHERE userId = ? ORDER BY id'
+    ),
+    'prefs': (
+        ('sortType', 'filterType', 'timezone'),
+        'SELECT sortType, filterType, timezone FROM table_user_prefs'
+        ' WHERE userId = ?'
+    ),
+}
+
+
+def init_app(app):
+    app.cli.add_command(export_data_command)
+
+
+# Returns the value passed to write, so csv.writer formats a single row
+class _Echo(object):
+    def write(self, value):
+        return value
+
+
+# Join the small pieces of a generator to chunks of about chunk_size
+def join_chunks(pieces, chunk_size):
+    chunk = []
+    size = 0
+
+    for piece in pieces:
+        chunk.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+
+    if chunk:
+        yield ''.join(chunk)
+
+
+# CSV of one kind of data of the user, row by row
+def iter_csv(user_id, kind):
+    columns, query = EXPORTS[kind]
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow(columns)
+    for row in get_db().execute(query, (user_id,)):
+        yield writer.writerow(row)
+
+
+# NDJSON of the given kinds of data of the user, one object per line with
+# its kind in "type", e.g. {"type": "tags", "id": 20, "tag": "Hero"}
+def iter_ndjson(user_id, kinds):
+    for kind in kinds:
+        columns, query = EXPORTS[kind]
+        for row in get_db().execute(query, (user_id,)):
+            data = {'type': kind}
+            data.update(zip(columns, row))
+            if kind == 'workouts':
+                data['tags'] = json.loads(data['tags'])
+            yield json.dumps(data) + '\n'
+
+
+# Export the data of the user as chunks of text. CSV holds only one kind,
+# NDJSON all of them by default.
+def iter_export(user_id, data_format, kinds=None):
+    if data_format == 'csv':
+        pieces = iter_csv(user_id, kinds[0] if kinds else 'scores')
+    else:
+        pieces = iter_ndjson(user_id, kinds or EXPORTS.keys())
+
+    return join_chunks(pieces, current_app.config['EXPORT_CHUNK_SIZE'])
+
+
+@click.command('export-data')
+@click.argument('username')
+@click.option('--format', 'data_format', type=click.Choice(FORMATS),
+              default='ndjson', show_default=True)
+@click.option('--kind', 'kinds', type=click.Choice(tuple(EXPORTS)),
+              multiple=True, help='Data to export, all by default.')
+@click.option('--output', '-o', type=click.File('w'), default='-',
+              help='File to write to, stdout by default.')
+@with_appcontext
+def export_data_command(username, data_format, kinds, output):
+    """Export the data of a user as CSV or NDJSON."""
+    user = get_db().execute(
+        'SELECT id FROM table_users WHERE name = ?', (username,)
+    ).fetchone()
+    if user is None:
+        raise click.BadParameter('Unknown user.', param_hint='USERNAME')
+    if data_format == 'csv' and len(kinds) > 1:
+        raise click.BadParameter('CSV holds one kind only.',
+                                 param_hint='--kind')
+
+    for chunk in iter_export(user['id'], data_format, kinds):
+        output.write(chunk)
@@ -0,0 +1,113 @@
+import collections
+import itertools
+import sys
+import threading
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+def init_app(app):
+    cache = FragmentCache(app.config['FRAGMENT_CACHE_SIZE'])
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.extend(fragment_cache=cache)
+    app.extensions['whiteboard_fragments'] = cache
+
+
+def get_fragment_stats(app):
+    return app.extensions['whiteboard_fragments'].stats()
+
+
+# In-process LRU of rendered fragments, bounded by the memory size of the
+# strings in it. A fragment larger than the whole cache isn't kept.
+class FragmentCache(object):
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._fragments = collections.OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._fragments.get(key)
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._fragments.move_to_end(key)
+
+            return value
+
+    def set(self, key, value):
+        size = sys.getsizeof(value)
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            old = self._fragments.pop(key, None)
+            if old is not None:
+                self._size -= sys.getsizeof(old)
+            self._fragments[key] = value
+            self._size += size
+            while self._size > self.max_size:
+                _, evicted = self._fragments.popitem(last=False)
+                self._size -= sys.getsizeof(evicted)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._fragments),
+                'size': self._size,
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+            }
+
+
+# {% cache key, ... %}...{% endcache %} renders the body once per key and
+# template position and then reuses the output. The key has to cover
+# everything the body depends on, e.g. the id and the version of a row.
+# Nothing is cached while templates are reloaded on change.
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        # Tells the fragments apart, a recompiled template gets new ones
+        self._fragment_ids = itertools.count()
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+
+        position = nodes.Const(
+            (parser.name, lineno, next(self._fragment_ids)))
+        return nodes.CallBlock(
+            self.call_method('_render', [position, nodes.Tuple(key, 'load')]),
+            [], [], body).set_lineno(lineno)
+
+    def _render(self, position, key, caller):
+        cache = self.environment.fragment_cache
+        if self.environment.auto_reload or not cache.max_size:
+            return caller()
+
+        key = (position, key)
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, value)
+
+        return value
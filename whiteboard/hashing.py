@@ -0,0 +1,165 @@
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+
+import bcrypt
+from flask import current_app
+
+_pool_lock = threading.Lock()
+
+
+# Raised if all slots of the hash pool are taken or a hash took too long
+class HashPoolBusy(Exception):
+    pass
+
+
+# Runs in the worker processes, returns the result and the seconds it took
+def _check_password_hash(pw_hash, password):
+    started = time.perf_counter()
+    try:
+        result = bcrypt.checkpw(password.encode('utf-8'),
+                                pw_hash.encode('utf-8'))
+    except ValueError:
+        # Not a valid bcrypt hash
+        result = False
+    return result, time.perf_counter() - started
+
+
+def _generate_password_hash(password, rounds):
+    started = time.perf_counter()
+    result = bcrypt.hashpw(password.encode('utf-8'),
+                           bcrypt.gensalt(rounds)).decode('utf-8')
+    return result, time.perf_counter() - started
+
+
+# Bounded pool of processes hashing the passwords, one per app and worker
+# process. Request threads only wait for the result, so a burst of logins
+# can't take all threads. At most queue_size hashes are running or waiting,
+# more are rejected right away. workers = 0 hashes in the request thread,
+# still limited to queue_size at a time.
+class HashPool(object):
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = max(int(workers), 0)
+        self.queue_size = max(int(queue_size), 1)
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._executor = None
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'pending': 0,
+            'hash_time': 0.0,
+            'wait_time': 0.0,
+            'max_wait_time': 0.0,
+        }
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise HashPoolBusy()
+
+        started = time.perf_counter()
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['pending'] += 1
+        future = None
+        try:
+            if self.workers == 0:
+                result, hash_time = func(*args)
+            else:
+                future = self._get_executor().submit(func, *args)
+                result, hash_time = future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            # The slot is taken until the hash is done anyway
+            future.add_done_callback(self._release)
+            raise HashPoolBusy()
+        except BaseException:
+            self._release()
+            raise
+        self._release()
+
+        # Time spent in the queue and passing the arguments around
+        wait_time = time.perf_counter() - started - hash_time
+        with self._lock:
+            self._stats['hash_time'] += hash_time
+            self._stats['wait_time'] += wait_time
+            self._stats['max_wait_time'] = max(self._stats['max_wait_time'],
+                                               wait_time)
+
+        return result
+
+    def _release(self, future=None):
+        with self._lock:
+            self._stats['pending'] -= 1
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['queue_size'] = self.queue_size
+        return stats
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Forking a process with running threads isn't safe
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+
+def get_hash_pool():
+    pool = current_app.extensions.get('whiteboard_hash_pool')
+
+    # A forked worker can't use the processes of its parent
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            pool = current_app.extensions.get('whiteboard_hash_pool')
+            if pool is None or pool.pid != os.getpid():
+                pool = HashPool(
+                    current_app.config['HASH_POOL_WORKERS'],
+                    current_app.config['HASH_POOL_QUEUE_SIZE'],
+                    current_app.config['HASH_POOL_TIMEOUT'])
+                current_app.extensions['whiteboard_hash_pool'] = pool
+
+    return pool
+
+
+def get_hash_stats():
+    return get_hash_pool().stats()
+
+
+def close_hash_pool():
+    pool = current_app.extensions.pop('whiteboard_hash_pool', None)
+
+    if pool is not None:
+        pool.close()
+
+
+# Check a password against its bcrypt hash in the hash pool
+# Raises HashPoolBusy if the pool is saturated.
+def check_password_hash(pw_hash, password):
+    return get_hash_pool().run(_check_password_hash, pw_hash, password)
+
+
+# Hash a password with BCRYPT_LOG_ROUNDS in the hash pool
+# Raises HashPoolBusy if the pool is saturated.
+def generate_password_hash(password):
+    return get_hash_pool().run(_generate_password_hash, password,
+                               current_app.config['BCRYPT_LOG_ROUNDS'])
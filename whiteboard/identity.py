@@ -0,0 +1,54 @@
+from flask import current_app, g
+
+
+def init_app(app):
+    app.after_request(add_stats_header)
+
+
+# Rows loaded by primary key during the current request, keyed by
+# (kind, key). A miss is stored as None, so a second lookup of an unknown
+# id doesn't hit the db either.
+def get_identity_map():
+    if 'identity_map' not in g:
+        g.identity_map = {}
+        g.identity_stats = {'hits': 0, 'misses': 0}
+
+    return g.identity_map
+
+
+# Get the row from the identity map or load it with load(key)
+def lookup(kind, key, load):
+    identity_map = get_identity_map()
+
+    if (kind, key) in identity_map:
+        g.identity_stats['hits'] += 1
+        return identity_map[(kind, key)]
+
+    g.identity_stats['misses'] += 1
+    row = identity_map[(kind, key)] = load(key)
+
+    return row
+
+
+# Drop a row after writing it, or all rows of the kind without a key
+def forget(kind, key=None):
+    identity_map = get_identity_map()
+
+    if key is not None:
+        identity_map.pop((kind, key), None)
+    else:
+        for identity in [i for i in identity_map if i[0] == kind]:
+            del identity_map[identity]
+
+
+def get_identity_stats():
+    get_identity_map()
+    return dict(g.identity_stats)
+
+
+def add_stats_header(response):
+    if current_app.config['IDENTITY_MAP_STATS'] and 'identity_map' in g:
+        response.headers['X-Identity-Map'] = 'hits={}, misses={}'.format(
+            g.identity_stats['hits'], g.identity_stats['misses'])
+
+    return response
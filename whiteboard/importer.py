@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .changelog import record_changes
+from .conditional import bump_data_version
+from .db import get_db
+from .records import rebuild_records
+from .utils import (
+    is_number, is_float, is_timestamp, is_datetime, datetime_to_sec,
+    score_to_value
+)
+
+FORMATS = ('csv', 'ndjson')
+
+
+def init_app(app):
+    app.cli.add_command(import_scores_command)
+
+
+# Result of an import, only the first max_errors errors are kept
+class ImportResult(object):
+    def __init__(self, max_errors):
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'message': message})
+
+    def to_dict(self):
+        return {
+            'imported': self.imported,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+# Guess the format from a filename or mimetype, e.g. scores.csv
+def get_format(name):
+    name = (name or '').lower()
+    if name.endswith('csv'):
+        return 'csv'
+    if name.endswith('ndjson') or name.endswith('jsonl'):
+        return 'ndjson'
+    return None
+
+
+# Read the rows of a binary stream one by one as (line, row) with the
+# columns workout, score, datetime, rx and note
+def read_rows(stream, data_format):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if data_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line, value in enumerate(text, 1):
+            if not value.strip():
+                continue
+            try:
+                row = json.loads(value)
+            except ValueError:
+                row = None
+            yield line, row if isinstance(row, dict) else None
+
+
+def is_rx(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 'rx')
+
+
+# Timezone of the user's prefs or the default one of the config
+def get_timezone_name(user_id):
+    prefs = get_db().execute(
+        'SELECT timezone FROM table_user_prefs WHERE userId = ?',
+        (user_id,)
+    ).fetchone()
+
+    if prefs is not None and prefs['timezone']:
+        return prefs['timezone']
+    return current_app.config['TIMEZONE']
+
+
+class ScoreImporter(object):
+    def __init__(self, user_id, batch_size, max_errors, timezone):
+        self.user_id = user_id
+        self.timezone = timezone
+        self.batch_size = batch_size
+        self.result = ImportResult(max_errors)
+        self.workout_ids = {}
+        self.batch = []
+
+    # Id of the workout with the name, the user's own workouts first
+    def get_workout_id(self, name):
+        if name not in self.workout_ids:
+            workout = get_db().execute(
+                'SELECT id FROM table_workout'
+                ' WHERE name = ? AND (userId = 1 OR userId = ?)'
+                ' ORDER BY userId = ? DESC, id LIMIT 1',
+                (name, self.user_id, self.user_id,)
+            ).fetchone()
+            self.workout_ids[name] = workout['id'] if workout else None
+
+        return self.workout_ids[name]
+
+    # Validate a row like score.add, returns the insert values or an error.
+    # Both are None for rows to skip.
+    def parse_row(self, row):
+        if row is None:
+            return None, 'Row is invalid.'
+        # Other data in an NDJSON export
+        if row.get('type', 'scores') != 'scores':
+            return None, None
+
+        workout_name = str(row.get('workout') or '').strip()
+        score_value = str(row.get('score') or '').strip()
+        score_datetime = str(row.get('datetime') or '').strip()
+        score_note = str(row.get('note') or '').strip()
+
+        if not workout_name:
+            return None, 'Workout is required.'
+        workout_id = self.get_workout_id(workout_name)
+        if workout_id is None:
+            return None, 'Workout is invalid.'
+
+        if not score_value:
+            return None, 'Score is required.'
+        elif (not is_number(score_value) and not is_float(score_value)
+              and not is_timestamp(score_value)):
+            return None, 'Score is invalid.'
+
+        if not score_datetime:
+            return None, 'Datetime is required.'
+        timestamp_in_sec = datetime_to_sec(score_datetime, self.timezone)
+        if ((is_datetime(score_datetime) is False
+             and not score_datetime.isdigit()) or timestamp_in_sec == -1):
+            return None, 'Datetime is invalid.'
+
+        value, value_type = score_to_value(score_value)
+
+        return (self.user_id, workout_id, score_value, value, value_type,
+                1 if is_rx(row.get('rx', '')) else 0, timestamp_in_sec,
+                score_note,), None
+
+    def add(self, line, row):
+        values, error = self.parse_row(row)
+
+        if error is not None:
+            self.result.add_error(line, error)
+            return
+        if values is None:
+            return
+
+        self.batch.append(values)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    # Insert the pending rows in one transaction
+    def flush(self):
+        if not self.batch:
+            return
+
+        db = get_db()
+        try:
+            db.executemany(
+                'INSERT INTO table_workout_score'
+                '(userId, workoutId, score, scoreValue, scoreType, rx,'
+                ' datetime, note)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                self.batch
+            )
+            # The rows got consecutive ids, nobody else writes in between
+            last_id = db.execute('SELECT last_insert_rowid()').fetchone()[0]
+            record_changes(
+                'scores', range(last_id - len(self.batch) + 1, last_id + 1),
+                user_id=self.user_id)
+            bump_data_version(self.user_id)
+            # Commits the batch
+            rebuild_records(sorted({(self.user_id, values[1])
+                                    for values in self.batch}))
+        except Exception:
+            db.rollback()
+            raise
+
+        self.result.imported += len(self.batch)
+        self.batch = []
+
+
+# Import the scores of a binary CSV or NDJSON stream for a user. The
+# stream is read row by row and inserted in batches of batch_size. The
+# datetimes are read in the user's timezone by default. A stream that
+# isn't UTF-8 stops the import, the rows read up to then are imported.
+def import_scores(user_id, stream, data_format, batch_size=None,
+                  max_errors=None, timezone=None):
+    importer = ScoreImporter(
+        user_id,
+        batch_size or current_app.config['IMPORT_BATCH_SIZE'],
+        max_errors or current_app.config['IMPORT_MAX_ERRORS'],
+        timezone or get_timezone_name(user_id))
+
+    line = 0
+    try:
+        for line, row in read_rows(stream, data_format):
+            importer.add(line, row)
+    except UnicodeDecodeError:
+        # Decoded in chunks, so it is somewhere after the last row read
+        importer.result.add_error(line + 1, 'Encoding is invalid.')
+    importer.flush()
+
+    return importer.result
+
+
+@click.command('import-scores')
+@click.argument('username')
+@click.argument('file', type=click.File('rb'))
+@click.option('--format', 'data_format', type=click.Choice(FORMATS),
+              help='Format of the file, guessed from its name by default.')
+@click.option('--batch-size', type=int, help='Rows per transaction.')
+@with_appcontext
+def import_scores_command(username, file, data_format, batch_size):
+    """Import the scores of a user from a CSV or NDJSON file."""
+    user = get_db().execute(
+        'SELECT id FROM table_users WHERE name = ?', (username,)
+    ).fetchone()
+    if user is None:
+        raise click.BadParameter('Unknown user.', param_hint='USERNAME')
+
+    data_format = data_format or get_format(file.name)
+    if data_format is None:
+        raise click.BadParameter('Unknown format.', param_hint='--format')
+
+    result = import_scores(user['id'], file, data_format, batch_size)
+
+    for error in result.errors:
+        click.echo('Line {}: {}'.format(error['line'], error['message']))
+    click.echo('Imported {} scores, {} errors.'.format(
+        result.imported, result.error_count))
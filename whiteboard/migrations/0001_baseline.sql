@@ -0,0 +1,48 @@
+-- Tables as created by schema.sql before migrations were introduced.
+-- A no-op on existing databases.
+CREATE TABLE IF NOT EXISTS table_users (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name TEXT,
+  password TEXT
+);
+CREATE TABLE IF NOT EXISTS table_user_prefs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  userId INTEGER,
+  sortType INTEGER,
+  filterType INTEGER
+);
+CREATE TABLE IF NOT EXISTS table_tags (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  userId INTEGER,
+  tag TEXT
+);
+CREATE TABLE IF NOT EXISTS table_equipment (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  equipment TEXT
+);
+CREATE TABLE IF NOT EXISTS table_movements (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  movement TEXT,
+  equipmentIds TEXT
+);
+CREATE TABLE IF NOT EXISTS table_workout (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  userId INTEGER,
+  name TEXT,
+  description TEXT,
+  datetime INTEGER
+);
+CREATE TABLE IF NOT EXISTS table_workout_score (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  userId INTEGER,
+  workoutId INTEGER,
+  score TEXT,
+  rx BOOL,
+  datetime INTEGER,
+  note TEXT
+);
+CREATE TABLE IF NOT EXISTS table_workout_tags (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  workoutId INTEGER,
+  tagId INTEGER
+);
@@ -0,0 +1,28 @@
+-- Indexes for the lookups done on every page view
+
+-- auth.login
+CREATE INDEX IF NOT EXISTS idx_users_name
+  ON table_users(name);
+
+-- user.get_user_prefs
+CREATE INDEX IF NOT EXISTS idx_user_prefs_user
+  ON table_user_prefs(userId);
+
+-- workout.list (WHERE userId ... ORDER BY name)
+CREATE INDEX IF NOT EXISTS idx_workout_user_name
+  ON table_workout(userId, name);
+
+-- workout.info (WHERE workoutId = ? AND userId = ? ORDER BY datetime)
+-- and workout.delete
+CREATE INDEX IF NOT EXISTS idx_workout_score_workout_user_datetime
+  ON table_workout_score(workoutId, userId, datetime);
+
+-- Tag joins in workout.list and workout.get_workout, both directions
+CREATE INDEX IF NOT EXISTS idx_workout_tags_workout_tag
+  ON table_workout_tags(workoutId, tagId);
+CREATE INDEX IF NOT EXISTS idx_workout_tags_tag_workout
+  ON table_workout_tags(tagId, workoutId);
+
+-- tag.list (WHERE userId ... ORDER BY tag)
+CREATE INDEX IF NOT EXISTS idx_tags_user_tag
+  ON table_tags(userId, tag);
@@ -0,0 +1,3 @@
+-- Keyset pagination of workout.list walks the workouts in (name, id) order
+CREATE INDEX IF NOT EXISTS idx_workout_name
+  ON table_workout(name);
@@ -0,0 +1,32 @@
+-- Full-text index over the workout names and descriptions for
+-- workout.search, kept in sync with table_workout by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS table_workout_fts USING fts5(
+  name,
+  description,
+  content='table_workout',
+  content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_workout_fts_insert
+AFTER INSERT ON table_workout BEGIN
+  INSERT INTO table_workout_fts(rowid, name, description)
+  VALUES (new.id, new.name, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workout_fts_delete
+AFTER DELETE ON table_workout BEGIN
+  INSERT INTO table_workout_fts(table_workout_fts, rowid, name, description)
+  VALUES ('delete', old.id, old.name, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_workout_fts_update
+AFTER UPDATE OF name, description ON table_workout BEGIN
+  INSERT INTO table_workout_fts(table_workout_fts, rowid, name, description)
+  VALUES ('delete', old.id, old.name, old.description);
+  INSERT INTO table_workout_fts(rowid, name, description)
+  VALUES (new.id, new.name, new.description);
+END;
+
+-- Index the workouts that already exist
+INSERT INTO table_workout_fts(table_workout_fts) VALUES ('rebuild');
@@ -0,0 +1,58 @@
+-- Version of the default workout catalog (userId = 1), bumped by triggers
+-- whenever a default workout, its tags or a default tag change. The
+-- in-process catalog cache reloads when it sees a new version.
+CREATE TABLE IF NOT EXISTS table_catalog_version (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  version INTEGER NOT NULL,
+  modified INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO table_catalog_version(id, version, modified)
+VALUES (1, 1, CAST(strftime('%s', 'now') AS INTEGER));
+
+CREATE TRIGGER IF NOT EXISTS trg_catalog_workout_insert
+AFTER INSERT ON table_workout WHEN new.userId = 1 BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_catalog_workout_update
+AFTER UPDATE ON table_workout WHEN old.userId = 1 OR new.userId = 1 BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_catalog_workout_delete
+AFTER DELETE ON table_workout WHEN old.userId = 1 BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_catalog_workout_tags_insert
+AFTER INSERT ON table_workout_tags BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_catalog_workout_tags_update
+AFTER UPDATE ON table_workout_tags BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_catalog_workout_tags_delete
+AFTER DELETE ON table_workout_tags BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_catalog_tags_update
+AFTER UPDATE ON table_tags WHEN old.userId = 1 BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_catalog_tags_delete
+AFTER DELETE ON table_tags WHEN old.userId = 1 BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
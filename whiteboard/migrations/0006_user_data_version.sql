@@ -0,0 +1,4 @@
+-- Per-user data version, bumped by every write of the user. Used for the
+-- ETag and Last-Modified headers of the list and detail pages.
+ALTER TABLE table_users ADD COLUMN dataVersion INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE table_users ADD COLUMN dataModified INTEGER NOT NULL DEFAULT 0;
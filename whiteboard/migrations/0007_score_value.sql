@@ -0,0 +1,5 @@
+-- Typed score value, normalised from the score as entered. scoreType is 0
+-- for numbers (reps, rounds, load) and 1 for times, which are stored in
+-- seconds. Existing rows are filled in by `flask backfill-scores`.
+ALTER TABLE table_workout_score ADD COLUMN scoreValue REAL;
+ALTER TABLE table_workout_score ADD COLUMN scoreType INTEGER;
@@ -0,0 +1,49 @@
+-- Personal record, last score and attempts per user and workout, kept up
+-- to date by the score views. The best score is the first one ordered by
+-- Rx, then bestSort (seconds for times, negated value for numbers), then
+-- date. Rebuild it with `flask rebuild-records`.
+CREATE TABLE IF NOT EXISTS table_workout_records (
+  userId INTEGER NOT NULL,
+  workoutId INTEGER NOT NULL,
+  attempts INTEGER NOT NULL,
+  rxAttempts INTEGER NOT NULL,
+  bestScoreId INTEGER NOT NULL,
+  bestScore TEXT,
+  bestValue REAL,
+  bestType INTEGER,
+  bestSort REAL,
+  bestRx INTEGER,
+  bestDatetime INTEGER,
+  lastScoreId INTEGER NOT NULL,
+  lastScore TEXT,
+  lastValue REAL,
+  lastRx INTEGER,
+  lastDatetime INTEGER,
+  PRIMARY KEY (userId, workoutId)
+);
+
+INSERT OR REPLACE INTO table_workout_records
+SELECT b.userId, b.workoutId, b.attempts, b.rxAttempts,
+  b.id, b.score, b.scoreValue, b.scoreType, b.sort, b.rx, b.datetime,
+  l.id, l.score, l.scoreValue, l.rx, l.datetime
+FROM (
+  SELECT *,
+    COUNT(*) OVER w AS attempts,
+    SUM(rx) OVER w AS rxAttempts,
+    ROW_NUMBER() OVER (
+      PARTITION BY userId, workoutId
+      ORDER BY rx DESC, sort IS NULL, sort, datetime, id) AS pos
+  FROM (
+    SELECT *,
+      CASE scoreType WHEN 1 THEN scoreValue ELSE -scoreValue END AS sort
+    FROM table_workout_score)
+  WINDOW w AS (PARTITION BY userId, workoutId)
+) b
+JOIN (
+  SELECT *,
+    ROW_NUMBER() OVER (
+      PARTITION BY userId, workoutId
+      ORDER BY datetime DESC, id DESC) AS pos
+  FROM table_workout_score
+) l ON l.userId = b.userId AND l.workoutId = b.workoutId AND l.pos = 1
+WHERE b.pos = 1;
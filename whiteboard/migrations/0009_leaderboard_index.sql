@@ -0,0 +1,5 @@
+-- Leaderboard of a workout in rank order: Rx first, then the best sort
+-- value, the earlier date and the user id as tie breakers.
+CREATE INDEX IF NOT EXISTS idx_workout_records_leaderboard
+ON table_workout_records(workoutId, bestRx DESC, bestSort, bestDatetime,
+                         userId);
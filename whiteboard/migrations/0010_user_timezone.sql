@@ -0,0 +1,3 @@
+-- IANA timezone of the user, e.g. Europe/Berlin. NULL is the TIMEZONE of
+-- the app config.
+ALTER TABLE table_user_prefs ADD COLUMN timezone TEXT;
@@ -0,0 +1,3 @@
+-- Bumped by every password change. Sessions cache the identity of their
+-- user with the version it had at login and are dropped once it differs.
+ALTER TABLE table_users ADD COLUMN authVersion INTEGER NOT NULL DEFAULT 0;
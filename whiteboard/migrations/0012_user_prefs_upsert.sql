@@ -0,0 +1,12 @@
+-- One prefs row per user, written with INSERT ... ON CONFLICT(userId).
+-- Keep the latest row of users with several.
+DELETE FROM table_user_prefs WHERE id NOT IN (
+  SELECT MAX(id) FROM table_user_prefs GROUP BY userId
+);
+DROP INDEX IF EXISTS idx_user_prefs_user;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_prefs_user
+  ON table_user_prefs(userId);
+
+-- Bumped by every prefs update. Sessions cache the prefs of their user and
+-- drop them once the version differs.
+ALTER TABLE table_users ADD COLUMN prefsVersion INTEGER NOT NULL DEFAULT 0;
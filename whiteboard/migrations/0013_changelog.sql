@@ -0,0 +1,15 @@
+-- Last change of every workout, tag and score, written by the views in the
+-- same transaction as the change. The id is the sync version: a change
+-- replaces the row of its item, so the item gets a new, higher id.
+CREATE TABLE IF NOT EXISTS table_changelog (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  userId INTEGER NOT NULL,
+  kind TEXT NOT NULL,
+  itemId INTEGER NOT NULL,
+  deleted INTEGER NOT NULL DEFAULT 0,
+  modified INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_changelog_item
+  ON table_changelog(kind, itemId);
+CREATE INDEX IF NOT EXISTS idx_changelog_user
+  ON table_changelog(userId, id);
@@ -0,0 +1,35 @@
+-- Times rank ahead of reps or load (e.g. of athletes hitting the time cap)
+-- and the sort values are only compared within a score type: Rx first,
+-- then bestType descending, then bestSort, date and user id.
+DROP INDEX IF EXISTS idx_workout_records_leaderboard;
+CREATE INDEX IF NOT EXISTS idx_workout_records_leaderboard
+ON table_workout_records(workoutId, bestRx DESC, bestType DESC, bestSort,
+                         bestDatetime, userId);
+
+-- Pick the best scores again with the score type in the order
+INSERT OR REPLACE INTO table_workout_records
+SELECT b.userId, b.workoutId, b.attempts, b.rxAttempts,
+  b.id, b.score, b.scoreValue, b.scoreType, b.sort, b.rx, b.datetime,
+  l.id, l.score, l.scoreValue, l.rx, l.datetime
+FROM (
+  SELECT *,
+    COUNT(*) OVER w AS attempts,
+    SUM(rx) OVER w AS rxAttempts,
+    ROW_NUMBER() OVER (
+      PARTITION BY userId, workoutId
+      ORDER BY rx DESC, sort IS NULL, scoreType DESC, sort, datetime, id
+    ) AS pos
+  FROM (
+    SELECT *,
+      CASE scoreType WHEN 1 THEN scoreValue ELSE -scoreValue END AS sort
+    FROM table_workout_score)
+  WINDOW w AS (PARTITION BY userId, workoutId)
+) b
+JOIN (
+  SELECT *,
+    ROW_NUMBER() OVER (
+      PARTITION BY userId, workoutId
+      ORDER BY datetime DESC, id DESC) AS pos
+  FROM table_workout_score
+) l ON l.userId = b.userId AND l.workoutId = b.workoutId AND l.pos = 1
+WHERE b.pos = 1;
@@ -0,0 +1,27 @@
+-- Only the tags of default workouts (userId = 1) are part of the catalog,
+-- tagging a custom workout leaves its version as it is.
+DROP TRIGGER IF EXISTS trg_catalog_workout_tags_insert;
+DROP TRIGGER IF EXISTS trg_catalog_workout_tags_update;
+DROP TRIGGER IF EXISTS trg_catalog_workout_tags_delete;
+
+CREATE TRIGGER trg_catalog_workout_tags_insert
+AFTER INSERT ON table_workout_tags
+WHEN (SELECT userId FROM table_workout WHERE id = new.workoutId) = 1 BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER trg_catalog_workout_tags_update
+AFTER UPDATE ON table_workout_tags
+WHEN (SELECT userId FROM table_workout WHERE id = old.workoutId) = 1
+  OR (SELECT userId FROM table_workout WHERE id = new.workoutId) = 1 BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+
+CREATE TRIGGER trg_catalog_workout_tags_delete
+AFTER DELETE ON table_workout_tags
+WHEN (SELECT userId FROM table_workout WHERE id = old.workoutId) = 1 BEGIN
+  UPDATE table_catalog_version
+  SET version = version + 1, modified = CAST(strftime('%s', 'now') AS INTEGER);
+END;
@@ -0,0 +1,300 @@
+import click
+from flask.cli import with_appcontext
+
+from .db import get_db
+
+_columns = (
+    'userId', 'workoutId', 'attempts', 'rxAttempts',
+    'bestScoreId', 'bestScore', 'bestValue', 'bestType', 'bestSort',
+    'bestRx', 'bestDatetime',
+    'lastScoreId', 'lastScore', 'lastValue', 'lastRx', 'lastDatetime',
+)
+
+
+def init_app(app):
+    app.cli.add_command(rebuild_records_command)
+
+
+# Sort value of a score, lower is better: seconds for times and the negated
+# value for reps or load. None for scores without a valid value.
+def get_sort_value(value, value_type):
+    if value is None:
+        return None
+    return value if value_type == 1 else -value
+
+
+# Order of scores for the best score, like ORDER BY rx DESC,
+# sort IS NULL, scoreType DESC, sort, datetime, id. Times (type 1) come
+# before reps or load, e.g. of athletes hitting the time cap, and the sort
+# values are only compared within a type.
+def get_best_key(rx, value_type, sort, datetime, score_id):
+    return (-rx, sort is None, -(value_type or 0), sort or 0, datetime,
+            score_id)
+
+
+def get_score_key(score):
+    return get_best_key(
+        score['rx'], score['scoreType'],
+        get_sort_value(score['scoreValue'], score['scoreType']),
+        score['datetime'], score['id'])
+
+
+def get_record(user_id, workout_id):
+    return get_db().execute(
+        'SELECT ' + ', '.join(_columns) +
+        ' FROM table_workout_records WHERE userId = ? AND workoutId = ?',
+        (user_id, workout_id,)
+    ).fetchone()
+
+
+def save_record(record):
+    get_db().execute(
+        'INSERT OR REPLACE INTO table_workout_records'
+        ' (' + ', '.join(_columns) + ')'
+        ' VALUES (' + ', '.join('?' * len(_columns)) + ')',
+        tuple(record[column] for column in _columns)
+    )
+
+
+def set_best(record, score):
+    record['bestScoreId'] = score['id']
+    record['bestScore'] = score['score']
+    record['bestValue'] = score['scoreValue']
+    record['bestType'] = score['scoreType']
+    record['bestSort'] = get_sort_value(score['scoreValue'],
+                                        score['scoreType'])
+    record['bestRx'] = score['rx']
+    record['bestDatetime'] = score['datetime']
+
+
+def set_last(record, score):
+    record['lastScoreId'] = score['id']
+    record['lastScore'] = score['score']
+    record['lastValue'] = score['scoreValue']
+    record['lastRx'] = score['rx']
+    record['lastDatetime'] = score['datetime']
+
+
+def is_best(record, score):
+    return get_score_key(score) < get_best_key(
+        record['bestRx'], record['bestType'], record['bestSort'],
+        record['bestDatetime'], record['bestScoreId'])
+
+
+def is_last(record, score):
+    return ((score['datetime'], score['id']) >
+            (record['lastDatetime'], record['lastScoreId']))
+
+
+# Add an inserted score to the record of its user and workout
+# Call it in the same transaction as the write.
+def add_score(score):
+    record = get_record(score['userId'], score['workoutId'])
+
+    if record is None:
+        record = {
+            'userId': score['userId'],
+            'workoutId': score['workoutId'],
+            'attempts': 0,
+            'rxAttempts': 0,
+        }
+        set_best(record, score)
+        set_last(record, score)
+    else:
+        record = dict(record)
+        if is_best(record, score):
+            set_best(record, score)
+        if is_last(record, score):
+            set_last(record, score)
+
+    record['attempts'] += 1
+    record['rxAttempts'] += score['rx']
+    save_record(record)
+
+
+# Remove a deleted score from the record. The record is only recomputed
+# if the score was the best or the last one.
+def remove_score(score):
+    record = get_record(score['userId'], score['workoutId'])
+
+    if record is None:
+        return
+    if score['id'] in (record['bestScoreId'], record['lastScoreId']):
+        recompute_record(score['userId'], score['workoutId'])
+        return
+
+    record = dict(record)
+    record['attempts'] -= 1
+    record['rxAttempts'] -= score['rx']
+    save_record(record)
+
+
+# Replace the old by the new version of an updated score
+def update_score(old, new):
+    record = get_record(old['userId'], old['workoutId'])
+
+    if (record is None or old['workoutId'] != new['workoutId']
+            or old['id'] in (record['bestScoreId'], record['lastScoreId'])):
+        recompute_record(old['userId'], old['workoutId'])
+        if old['workoutId'] != new['workoutId']:
+            recompute_record(new['userId'], new['workoutId'])
+        return
+
+    record = dict(record)
+    record['rxAttempts'] += new['rx'] - old['rx']
+    if is_best(record, new):
+        set_best(record, new)
+    if is_last(record, new):
+        set_last(record, new)
+    save_record(record)
+
+
+# Compute the record of a user and workout from all its scores
+def recompute_record(user_id, workout_id):
+    db = get_db()
+    counts = db.execute(
+        'SELECT COUNT(id), COALESCE(SUM(rx), 0) FROM table_workout_score'
+        ' WHERE userId = ? AND workoutId = ?',
+        (user_id, workout_id,)
+    ).fetchone()
+
+    if counts[0] == 0:
+        db.execute(
+            'DELETE FROM table_workout_records'
+            ' WHERE userId = ? AND workoutId = ?',
+            (user_id, workout_id,)
+        )
+        return
+
+    best = db.execute(
+        'SELECT id, score, scoreValue, scoreType, rx, datetime'
+        ' FROM table_workout_score WHERE userId = ? AND workoutId = ?'
+        ' ORDER BY rx DESC, scoreValue IS NULL, scoreType DESC,'
+        ' CASE scoreType WHEN 1 THEN scoreValue ELSE -scoreValue END,'
+        ' datetime, id LIMIT 1',
+        (user_id, workout_id,)
+    ).fetchone()
+    last = db.execute(
+        'SELECT id, score, scoreValue, scoreType, rx, datetime'
+        ' FROM table_workout_score WHERE userId = ? AND workoutId = ?'
+        ' ORDER BY datetime DESC, id DESC LIMIT 1',
+        (user_id, workout_id,)
+    ).fetchone()
+
+    record = {
+        'userId': user_id,
+        'workoutId': workout_id,
+        'attempts': counts[0],
+        'rxAttempts': counts[1],
+    }
+    set_best(record, best)
+    set_last(record, last)
+    save_record(record)
+
+
+# Drop the records of a user's workout after deleting all its scores
+def remove_workout(user_id, workout_id):
+    get_db().execute(
+        'DELETE FROM table_workout_records WHERE userId = ? AND workoutId = ?',
+        (user_id, workout_id,)
+    )
+
+
+# Compute the records of the given (userId, workoutId) pairs or of all
+def rebuild_records(pairs=None):
+    db = get_db()
+
+    if pairs is None:
+        db.execute('DELETE FROM table_workout_records')
+        pairs = db.execute(
+            'SELECT DISTINCT userId, workoutId FROM table_workout_score'
+        ).fetchall()
+
+    count = 0
+    for user_id, workout_id in pairs:
+        recompute_record(user_id, workout_id)
+        count += 1
+    db.commit()
+
+    return count
+
+
+# Position of a record in the leaderboard of its workout, i.e. the number
+# of records before its key (bestRx, bestType, bestSort, bestDatetime,
+# userId) + 1. All counts are index range scans.
+def get_rank(workout_id, key):
+    rx, value_type, sort, datetime, user_id = key
+    ahead = get_db().execute(
+        'SELECT'
+        ' (SELECT COUNT(*) FROM table_workout_records'
+        '  WHERE workoutId = ? AND bestRx > ? AND bestSort IS NOT NULL)'
+        ' + (SELECT COUNT(*) FROM table_workout_records'
+        '  WHERE workoutId = ? AND bestRx = ? AND bestType > ?'
+        '  AND bestSort IS NOT NULL)'
+        ' + (SELECT COUNT(*) FROM table_workout_records'
+        '  WHERE workoutId = ? AND bestRx = ? AND bestType = ?'
+        '  AND (bestSort, bestDatetime, userId) < (?, ?, ?))',
+        (workout_id, rx, workout_id, rx, value_type, workout_id, rx,
+         value_type, sort, datetime, user_id,)
+    ).fetchone()[0]
+
+    return ahead + 1
+
+
+def get_leaderboard_key(record):
+    return (record['bestRx'], record['bestType'], record['bestSort'],
+            record['bestDatetime'], record['userId'])
+
+
+# Rank of the user in the leaderboard of the workout, None without a score
+def get_user_rank(workout_id, user_id):
+    record = get_record(user_id, workout_id)
+    if record is None or record['bestSort'] is None:
+        return None
+
+    return get_rank(workout_id, get_leaderboard_key(record))
+
+
+# Up to limit entries of the leaderboard of a workout following the keyset
+# cursor after (the key of the last entry of the previous page). Rx and
+# scaled, times and reps/load are read separately, so each is a single
+# index range.
+def get_leaderboard(workout_id, after=None, limit=50):
+    db = get_db()
+    entries = []
+
+    for rx, value_type in ((1, 1), (1, 0), (0, 1), (0, 0)):
+        if after is not None and (rx, value_type) > tuple(after[:2]):
+            continue
+        if after is not None and (rx, value_type) == tuple(after[:2]):
+            condition = (' AND (r.bestSort, r.bestDatetime, r.userId)'
+                         ' > (?, ?, ?)')
+            params = tuple(after[2:])
+        else:
+            condition = ' AND r.bestSort IS NOT NULL'
+            params = ()
+
+        entries.extend(db.execute(
+            'SELECT r.userId, u.name, r.bestScore, r.bestRx, r.bestType,'
+            ' r.bestSort, r.bestDatetime'
+            ' FROM table_workout_records r'
+            ' INNER JOIN table_users u ON u.id = r.userId'
+            ' WHERE r.workoutId = ? AND r.bestRx = ? AND r.bestType = ?' +
+            condition +
+            ' ORDER BY r.bestSort, r.bestDatetime, r.userId'
+            ' LIMIT ?',
+            (workout_id, rx, value_type,) + params +
+            (limit - len(entries),)
+        ).fetchall())
+        if len(entries) >= limit:
+            break
+
+    return entries
+
+
+@click.command('rebuild-records')
+@with_appcontext
+def rebuild_records_command():
+    """Compute the personal records from all scores."""
+    count = rebuild_records()
+    click.echo('Rebuilt {} records.'.format(count))
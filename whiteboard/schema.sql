@@ -6,6 +6,11 @@ DROP TABLE IF EXISTS table_movements;
 DROP TABLE IF EXISTS table_workout;
 DROP TABLE IF EXISTS table_workout_score;
 DROP TABLE IF EXISTS table_workout_tags;
+DROP TABLE IF EXISTS table_workout_fts;
+DROP TABLE IF EXISTS table_catalog_version;
+DROP TABLE IF EXISTS table_workout_records;
+DROP TABLE IF EXISTS table_changelog;
+DROP TABLE IF EXISTS schema_version;
 
 CREATE TABLE IF NOT EXISTS table_users (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -0,0 +1,85 @@
+// Register the service worker and keep a local copy of the workouts, tags
+// and scores of the user in IndexedDB. Only the changes since the last
+// sync are fetched.
+var SYNC_KINDS = ['workouts', 'tags', 'scores'];
+
+function openLocalData(user) {
+  return new Promise(function(resolve, reject) {
+    let request = indexedDB.open('whiteboard-' + user, 1);
+    request.onupgradeneeded = function() {
+      for (const kind of SYNC_KINDS) {
+        request.result.createObjectStore(kind, {keyPath: 'id'});
+      }
+      request.result.createObjectStore('meta');
+    };
+    request.onsuccess = function() { resolve(request.result); };
+    request.onerror = function() { reject(request.error); };
+  });
+}
+
+function getSyncVersion(db) {
+  return new Promise(function(resolve, reject) {
+    let request = db.transaction('meta').objectStore('meta').get('version');
+    request.onsuccess = function() {
+      resolve(request.result === undefined ? null : request.result);
+    };
+    request.onerror = function() { reject(request.error); };
+  });
+}
+
+// Apply the changes and the new version in one transaction
+function applyChanges(db, changes) {
+  return new Promise(function(resolve, reject) {
+    let tx = db.transaction(SYNC_KINDS.concat(['meta']), 'readwrite');
+    for (const kind of SYNC_KINDS) {
+      let store = tx.objectStore(kind);
+      if (changes.full) {
+        store.clear();
+      }
+      for (const item of changes[kind]) {
+        store.put(item);
+      }
+      for (const id of changes.deleted[kind]) {
+        store.delete(id);
+      }
+    }
+    tx.objectStore('meta').put(changes.version, 'version');
+    tx.oncomplete = function() { resolve(changes); };
+    tx.onerror = function() { reject(tx.error); };
+  });
+}
+
+function syncLocalData(db, url) {
+  return getSyncVersion(db).then(function(version) {
+    // Everything on the first sync
+    let query = version === null ? '' : '?since=' + version;
+    return fetch(url + query, {credentials: 'same-origin'});
+  }).then(function(response) {
+    if (!response.ok) {
+      throw new Error('Sync failed with ' + response.status);
+    }
+    return response.json();
+  }).then(function(changes) {
+    return applyChanges(db, changes);
+  }).then(function(changes) {
+    if (changes.more) {
+      return syncLocalData(db, url);
+    }
+  });
+}
+
+(function() {
+  let data = document.body.dataset;
+  if ('serviceWorker' in navigator && data.serviceWorker) {
+    navigator.serviceWorker.register(data.serviceWorker).catch(function(error) {
+      console.log('Service worker not registered: ' + error);
+    });
+  }
+  if (window.indexedDB && data.sync && data.user && navigator.onLine) {
+    openLocalData(data.user).then(function(db) {
+      return syncLocalData(db, data.sync);
+    }).catch(function(error) {
+      console.log('Local data not synced: ' + error);
+    });
+  }
+})();
@@ -0,0 +1,104 @@
+// Draw the score chart with the history fetched from the server, with at
+// most one point per pixel of the canvas
+function loadChart(canvas) {
+  var points = Math.max(Math.round(canvas.clientWidth), 3);
+  var url = canvas.dataset.url + '?points=' + points;
+
+  fetch(url, {credentials: 'same-origin'})
+    .then(function(response) { return response.json(); })
+    .then(function(history) { drawChart(canvas, history); });
+}
+
+function drawChart(canvas, history) {
+  return new Chart(canvas.getContext('2d'), {
+    type: 'line',
+    data: {
+        labels: history.labels,
+        datasets: [{
+            data: history.values
+        }]
+    },
+    options: {
+      layout: {
+        padding: {
+          left: 0,
+          right: 0,
+          top: 10,
+          bottom: 0,
+        },
+      },
+      tooltips: {
+        xPadding: 10,
+        yPadding: 10,
+        cornerRadius: 5,
+        backgroundColor: 'rgba(33, 150, 243, 0.20)',
+        titleFontColor: '#343a40',
+        bodyFontColor: '#343a40',
+        footerFontColor: '#343a40',
+        borderWidth: 0,
+        borderColor: 'rgba(33, 150, 243, 0.5)',
+        displayColors: false,
+        caretPadding: 10,
+        caretSize: 5,
+      },
+      elements: {
+        point: {
+          radius: 5,
+          hoverRadius: 6,
+          hitRadius: 1,
+          hoverBorderWidth: 2,
+          borderColor: 'rgba(12, 58, 95, 0.1)',
+          backgroundColor: 'rgba(12, 58, 95, 0.1)',
+        },
+        line: {
+          borderWidth: 3,
+          borderColor: 'rgba(33, 150, 243, 1.0)',
+          backgroundColor: 'rgba(33, 150, 243, 0.10)',
+        },
+      },
+      scales: {
+        yAxes: [{
+          display: true,
+          position: 'right',
+          ticks: {
+            display: false,
+            mirror: true,
+            padding: -10,
+            maxTicksLimit: 5,
+            labelOffset: 0,
+          },
+          gridLines: {
+            display: true,
+            color: '#f1f1f1',
+            zeroLineColor: '#ddd',
+            tickMarkLength: 0,
+          },
+        }],
+        xAxes: [{
+          display: true,
+          ticks: {
+            display: false,
+          },
+          gridLines: {
+            display: false,
+            color: '#f1f1f1',
+            zeroLineColor: '#ddd',
+            tickMarkLength: 1,
+          },
+        }],
+      },
+      legend: {
+        display: false,
+      },
+      showLine: true,
+      responsive: true,
+      maintainAspectRatio: true,
+      aspectRatio: 3
+    },
+  });
+}
+
+var chartCanvas = document.getElementById('chart');
+if (chartCanvas) {
+  loadChart(chartCanvas);
+}
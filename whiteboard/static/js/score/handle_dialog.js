@@ -1,4 +1,27 @@
+// Current time as dd.mm.YYYY HH:MM in the timezone of the user. Filled in
+// here rather than by the server, so the workout page can be revalidated.
+function formatNow(timezone) {
+  let format, parts = {};
+  try {
+    format = new Intl.DateTimeFormat('en-GB', {
+      timeZone: timezone, day: '2-digit', month: '2-digit', year: 'numeric',
+      hour: '2-digit', minute: '2-digit', hourCycle: 'h23'
+    });
+  } catch (error) {
+    // Unknown timezone, use the one of the browser
+    return formatNow(undefined);
+  }
+  for (const part of format.formatToParts()) {
+    parts[part.type] = part.value;
+  }
+  return parts.day + '.' + parts.month + '.' + parts.year + ' ' +
+    parts.hour + ':' + parts.minute;
+}
 function openAddScoreDialog() {
+  let datetime = document.getElementById('addScoreDatetime');
+  if (!datetime.value) {
+    datetime.value = formatNow(datetime.dataset.timezone);
+  }
   document.getElementById('addScoreDialog').style.display='block';
 }
 function closeAddScoreDialog() {
@@ -1,7 +1,18 @@
 search = document.getElementById('searchbar');
 search.value = '';
 
+var searchTimeout = null;
+var searchRequest = 0;
+var searchableContent = null;
+
 function doSearch() {
+  // Lists which are paginated on the server are searched on the server
+  if (search.dataset.url) {
+    clearTimeout(searchTimeout);
+    searchTimeout = setTimeout(function() { doServerSearch(1); }, 150);
+    return;
+  }
+
   // Declare variables
   var filter, ul, li, i, value;
   filter = search.value.toUpperCase();
@@ -18,6 +29,56 @@ function doSearch() {
   }
 }
 
+function doServerSearch(page) {
+  var ul = document.getElementById('searchable');
+  var pagination = document.getElementById('pagination');
+  var query = search.value.trim();
+  var request = ++searchRequest;
+
+  if (searchableContent === null) {
+    searchableContent = ul.innerHTML;
+  }
+  // Restore the current page if the search is cleared
+  if (query === '') {
+    ul.innerHTML = searchableContent;
+    if (pagination) {
+      pagination.style.display = '';
+    }
+    return;
+  }
+  if (pagination) {
+    pagination.style.display = 'none';
+  }
+
+  fetch(search.dataset.url + '?q=' + encodeURIComponent(query) + '&page=' + page)
+    .then(function(response) { return response.json(); })
+    .then(function(data) {
+      // Drop responses of outdated requests
+      if (request !== searchRequest) {
+        return;
+      }
+      if (page === 1) {
+        ul.innerHTML = '';
+      } else {
+        ul.removeChild(ul.lastChild);
+      }
+      data.workouts.forEach(function(workout) {
+        var li = document.createElement('li');
+        li.className = 'padding-16 pointer w3-border-light-gray';
+        li.textContent = workout.name;
+        li.onclick = function() { location.href = workout.id; };
+        ul.appendChild(li);
+      });
+      if (data.next_page) {
+        var more = document.createElement('li');
+        more.className = 'padding-16 pointer w3-border-light-gray w3-center';
+        more.innerHTML = '<i class="icon fa fa-angle-down"></i>';
+        more.onclick = function() { doServerSearch(data.next_page); };
+        ul.appendChild(more);
+      }
+    });
+}
+
 function toggleSearch() {
   parentDiv = search.parentNode;
   if(parentDiv.style.display == 'block') {
@@ -0,0 +1,23 @@
+from flask import (
+    current_app, get_flashed_messages, render_template, stream_with_context
+)
+
+
+# Render a list page. With STREAM_TEMPLATES the page is sent while it is
+# rendered, so the head and toolbar reach the browser before the rows.
+# Rows passed as db cursor are then read from the db while streaming.
+def render_list(template_name, **context):
+    if not current_app.config['STREAM_TEMPLATES']:
+        return render_template(template_name, **context)
+
+    app = current_app._get_current_object()
+    # The session is saved before the body is sent, so pop the flashed
+    # messages now. The template gets them from the request cache.
+    get_flashed_messages()
+
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(app.config['STREAM_BUFFER_SIZE'])
+
+    return app.response_class(
+        stream_with_context(stream), mimetype='text/html')
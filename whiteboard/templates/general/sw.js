@@ -0,0 +1,81 @@
+// Service worker of the whiteboard, rendered by sync.service_worker
+const CACHE = 'whiteboard-{{ version }}';
+const PAGES = 'whiteboard-pages';
+const ASSETS = {{ assets|tojson }};
+const INDEX_URL = {{ url_for('index')|tojson }};
+const LOGIN_URL = {{ url_for('auth.login')|tojson }};
+const LOGOUT_URL = {{ url_for('auth.logout')|tojson }};
+const STATIC_URL = {{ url_for('static', filename='')|tojson }};
+
+// Cache the app shell up front
+self.addEventListener('install', function(event) {
+  event.waitUntil(
+    caches.open(CACHE).then(function(cache) {
+      return cache.addAll(ASSETS);
+    }).then(function() {
+      return self.skipWaiting();
+    })
+  );
+});
+
+// Drop the app shell of older deployments
+self.addEventListener('activate', function(event) {
+  event.waitUntil(
+    caches.keys().then(function(names) {
+      return Promise.all(names.filter(function(name) {
+        return name.startsWith('whiteboard-') && name !== CACHE && name !== PAGES;
+      }).map(function(name) {
+        return caches.delete(name);
+      }));
+    }).then(function() {
+      return self.clients.claim();
+    })
+  );
+});
+
+// The visited pages are kept for offline use, the last version wins
+function fetchPage(request) {
+  return fetch(request).then(function(response) {
+    if (response.ok && !response.redirected) {
+      let copy = response.clone();
+      caches.open(PAGES).then(function(cache) {
+        cache.put(request, copy);
+      });
+    }
+    return response;
+  }).catch(function() {
+    return caches.match(request, {cacheName: PAGES}).then(function(response) {
+      return response || caches.match(INDEX_URL, {cacheName: PAGES});
+    }).then(function(response) {
+      return response || new Response('The whiteboard is offline.', {
+        status: 503,
+        headers: {'Content-Type': 'text/plain; charset=utf-8'}
+      });
+    });
+  });
+}
+
+self.addEventListener('fetch', function(event) {
+  let request = event.request;
+  let url = new URL(request.url);
+  if (url.origin !== self.location.origin) {
+    return;
+  }
+
+  // The pages of one user are not shown to the next one. The user can
+  // only change by a login, the one of an expired session too.
+  if (url.pathname === LOGIN_URL || url.pathname === LOGOUT_URL) {
+    event.respondWith(caches.delete(PAGES).then(function() {
+      return fetch(request);
+    }));
+  } else if (request.method !== 'GET') {
+    return;
+  } else if (url.pathname.startsWith(STATIC_URL)) {
+    event.respondWith(caches.match(request, {cacheName: CACHE}).then(function(response) {
+      return response || fetch(request);
+    }));
+  } else if (request.mode === 'navigate') {
+    event.respondWith(fetchPage(request));
+  }
+  // Everything else, e.g. the sync, goes to the network as usual
+});
@@ -1,13 +1,45 @@
-import time
+import base64
+import binascii
 import datetime
+import functools
+import json
 import re
+import time
+import zoneinfo
+
+import numpy as np
+
+# Timezone of the conversions if none is given, see get_timezone()
+DEFAULT_TIMEZONE = 'UTC'
+
+NUMBER_PATTERN = re.compile(r'[0-9]+')
+FLOAT_PATTERN = re.compile(r'[0-9]+[.]?[0-9]+')
+# HH:MM(:SS) and DD.MM.YYYY HH:MM(:SS) with groups of the fields, shared
+# by the checks, the scalar and the batch parsers. ASCII digits only.
+_timestamp_fields = re.compile(
+    r'([0-9]{1,2}):([0-9]{1,2})(?::([0-9]{1,2}))?')
+_datetime_fields = re.compile(
+    r'([0-9]{1,2})\.([0-9]{1,2})\.([0-9]{4}) ' + _timestamp_fields.pattern)
+DATETIME_PATTERN = _datetime_fields
+TIMESTAMP_PATTERN = _timestamp_fields
+_epoch = datetime.datetime(1970, 1, 1)
+_second = datetime.timedelta(seconds=1)
+
+
+# Number regex check, ASCII digits only (str.isdigit() accepts e.g. '²',
+# which int() and float() reject)
+# e.g. 123
+def is_number(value):
+    if NUMBER_PATTERN.fullmatch(value) is None:
+        return False
+    else:
+        return True
 
 
 # Floating number regex check
 # e.g. 123.45
 def is_float(value):
-    pattern = re.compile(r'[0-9]+[.]?[0-9]+')
-    if pattern.fullmatch(value) is None:
+    if FLOAT_PATTERN.fullmatch(value) is None:
         return False
     else:
         return True
@@ -16,8 +48,7 @@ def is_float(value):
 # Datetime regex check (dd.mm.YYY HH:MM)
 # e.g. 17.5.2019 19:21
 def is_datetime(value):
-    pattern = re.compile(r'\d{1,2}.\d{1,2}.\d{4} \d{1,2}([:]\d{1,2}){1,2}')
-    if pattern.fullmatch(value) is None:
+    if DATETIME_PATTERN.fullmatch(value) is None:
         return False
     else:
         return True
@@ -26,24 +57,48 @@ def is_datetime(value):
 # Datetime regex check (dd.mm.YYY)
 # e.g 19:21:23
 def is_timestamp(value):
-    pattern = re.compile(r'\d{1,2}(:\d{1,2}){1,2}')
-    if pattern.fullmatch(value) is None:
+    if TIMESTAMP_PATTERN.fullmatch(value) is None:
+        return False
+    else:
+        return True
+
+
+# Timezone check, the IANA name of a known zone
+# e.g. Europe/Berlin
+def is_timezone(value):
+    try:
+        get_timezone(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError, TypeError):
         return False
     else:
         return True
 
 
-# Get timestamp (unix time) in specific format
+# Cached zoneinfo object of an IANA timezone name
+# Raises zoneinfo.ZoneInfoNotFoundError for unknown names.
+@functools.lru_cache(maxsize=64)
+def get_timezone(name):
+    return zoneinfo.ZoneInfo(name)
+
+
+# Get timestamp (unix time) in specific format and timezone
 # e.g. 01.12.1990 12:00
-def get_format_timestamp(datetime=None):
+def get_format_timestamp(datetime=None, timezone=DEFAULT_TIMEZONE):
     if datetime is None:
-        return time.strftime("%d.%m.%Y %H:%M", time.localtime(time.time()))
+        return _format_timestamp(int(time.time()), timezone)
     elif str(datetime).isdigit():
-        return time.strftime("%d.%m.%Y %H:%M", time.localtime(datetime))
+        return _format_timestamp(int(datetime), timezone)
     else:
         return -1
 
 
+# Score pages format the same few timestamps over and over again
+@functools.lru_cache(maxsize=4096)
+def _format_timestamp(seconds, timezone):
+    return datetime.datetime.fromtimestamp(
+        seconds, get_timezone(timezone)).strftime("%d.%m.%Y %H:%M")
+
+
 # Convert timestamp (HH:MM:SS) to seconds
 # @todo Check the timezone
 def timestamp_to_sec(value):
@@ -59,16 +114,118 @@ def timestamp_to_sec(value):
             sec = int(ts_split[0])*3600+int(ts_split[1])*60+int(ts_split[2])
 
         return sec
-    elif value.isdigit() is True or is_float(value) is True:
+    elif is_number(value) is True or is_float(value) is True:
         # Convert float from string to int
         return int(float(value))
     else:
         return -1
 
 
-# Convert datetime (DD.MM:YYYY HH:MM:SS) to seconds
-# @todo Check the timezone
-def datetime_to_sec(value):
+# Parse the values with the pattern into an int64 array of its groups
+# (missing ones are 0), the values matching it and the numbers of the rest
+# (or -1 if invalid)
+def _parse_fields(values, pattern, size):
+    values = [str(value) for value in values]
+    matches = [pattern.fullmatch(value) for value in values]
+    matched = np.array([match is not None for match in matches], dtype=bool)
+
+    fields = np.zeros((len(values), size), dtype=np.int64)
+    if matched.any():
+        # Let numpy convert all fields at once
+        fields[matched] = np.fromstring(
+            ' '.join(' '.join(match.groups('0'))
+                     for match in matches if match is not None),
+            dtype=np.int64, sep=' ').reshape(-1, size)
+
+    numbers = np.full(len(values), -1, dtype=np.int64)
+    for i in np.flatnonzero(~matched).tolist():
+        if is_number(values[i]) or is_float(values[i]):
+            numbers[i] = int(float(values[i]))
+
+    return fields, matched, numbers
+
+
+# Convert many timestamps (HH:MM:SS) or numbers to seconds like
+# timestamp_to_sec. Returns an int64 masked array, invalid values are
+# masked (and -1).
+def timestamps_to_sec(values):
+    fields, is_time, numbers = _parse_fields(values, _timestamp_fields, 3)
+
+    # H:M (sic) like timestamp_to_sec, or H:M:S
+    seconds = np.where(
+        is_time, fields[:, 0] * 3600 + fields[:, 1] * 60 + fields[:, 2],
+        numbers)
+
+    return np.ma.masked_array(seconds, mask=seconds == -1)
+
+
+# Days since 1970-01-01 of the proleptic Gregorian dates, vectorised
+def _days_from_civil(year, month, day):
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = (year_of_era * 365 + year_of_era // 4 -
+                  year_of_era // 100 + day_of_year)
+    return era * 146097 + day_of_era - 719468
+
+
+# Seconds to subtract from the local (naive) times in the timezone to get
+# unix time. The offset is looked up once per distinct hour.
+def _local_offsets(naive, timezone):
+    hours, inverse = np.unique(naive // 3600, return_inverse=True)
+    zone = get_timezone(timezone)
+    hour = datetime.timedelta(hours=1)
+
+    # tzinfo.utcoffset() reads the wall time of naive datetimes as well
+    offsets = np.array([zone.utcoffset(_epoch + value * hour) // _second
+                        for value in hours.tolist()], dtype=np.int64)
+
+    return offsets[inverse.reshape(-1)]
+
+
+# Convert many datetimes (DD.MM.YYYY HH:MM:SS) in the timezone or numbers
+# to seconds like datetime_to_sec. Returns an int64 masked array, invalid
+# values are masked (and -1).
+def datetimes_to_sec(values, timezone=DEFAULT_TIMEZONE):
+    fields, is_datetime, numbers = _parse_fields(
+        values, _datetime_fields, 6)
+
+    day, month, year, hour, minute, second = fields.T
+    valid_month = (month >= 1) & (month <= 12)
+    days = _days_from_civil(year, np.where(valid_month, month, 1), day)
+    month_length = _days_from_civil(
+        year + (month == 12), np.where(month == 12, 1, month + 1), 1
+    ) - _days_from_civil(year, np.where(valid_month, month, 1), 1)
+    # datetime() rejects the same
+    is_datetime &= (valid_month & (year >= 1) & (day >= 1) &
+                    (day <= month_length) & (hour < 24) & (minute < 60) &
+                    (second < 60))
+
+    seconds = numbers
+    if is_datetime.any():
+        naive = days * 86400 + hour * 3600 + minute * 60 + second
+        naive = naive[is_datetime]
+        seconds[is_datetime] = naive - _local_offsets(naive, timezone)
+
+    return np.ma.masked_array(seconds, mask=seconds == -1)
+
+
+# Normalise a score as entered to its value and type
+# Numbers (e.g. 42.5) are type 0, times (e.g. 2:30:45) type 1 in seconds.
+# Returns (None, None) if the score is invalid.
+def score_to_value(value):
+    value = str(value).strip()
+    if is_timestamp(value) is True:
+        return float(timestamp_to_sec(value)), 1
+    elif is_number(value) is True or is_float(value) is True:
+        return float(value), 0
+    else:
+        return None, None
+
+
+# Convert datetime (DD.MM:YYYY HH:MM:SS) in the timezone to seconds
+def datetime_to_sec(value, timezone=DEFAULT_TIMEZONE):
     if is_datetime(value) is True:
         dt_split = value.split(" ")
         if len(dt_split) > 2:
@@ -91,11 +248,82 @@ def datetime_to_sec(value):
 
         if len(t_split) == 3:
             seconds = int(t_split[2])
-        sec = time.mktime(datetime.datetime(
-            year, month, day, hour, minutes, seconds).timetuple())
+        # Impossible dates (e.g. 31.02.2020) are invalid like in the batch
+        try:
+            sec = datetime.datetime(
+                year, month, day, hour, minutes, seconds,
+                tzinfo=get_timezone(timezone)).timestamp()
+        except (ValueError, OverflowError):
+            return -1
         return int(sec)
-    elif value.isdigit() is True or is_float(value) is True:
+    elif is_number(value) is True or is_float(value) is True:
         # Convert float from string to int
         return int(float(value))
     else:
         return -1
+
+
+# Downsample a series of (x, y) points sorted by x to threshold points with
+# Largest-Triangle-Three-Buckets, which keeps the peaks and the first and
+# last point. Returns the points unchanged if there are not more.
+def downsample_lttb(points, threshold):
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    # Bucket size of the points between the first and the last one
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket, the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        avg_x = sum(p[0] for p in points[next_start:next_end])
+        avg_y = sum(p[1] for p in points[next_start:next_end])
+        avg_x /= next_end - next_start
+        avg_y /= next_end - next_start
+
+        # Point of the current bucket with the largest triangle
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = points[a][0], points[a][1]
+        max_area = -1
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) -
+                       (ax - points[j][0]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                a_next = j
+        sampled.append(points[a_next])
+        a = a_next
+
+    sampled.append(points[-1])
+
+    return sampled
+
+
+# Encode the sort key of the last row of a page as opaque (url safe) cursor
+# e.g. encode_cursor('Fran', 42)
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(
+        json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+# Decode a cursor created by encode_cursor
+# Returns None if the cursor is missing or doesn't match the expected types
+def decode_cursor(value, types):
+    if not value:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+    except (ValueError, binascii.Error):
+        return None
+
+    if not isinstance(values, list) or len(values) != len(types):
+        return None
+    for item, item_type in zip(values, types):
+        if type(item) is not item_type:
+            return None
+
+    return values
@@ -1,31 +1,67 @@
 import functools
+import time
 
 from flask import (
-    Flask, Blueprint, flash, g, redirect, render_template, request, session,
-    url_for
+    Blueprint, current_app, flash, g, redirect, render_template, request,
+    session, url_for
 )
 
 from hashlib import sha256
-from flask_bcrypt import Bcrypt
 
 from ..db import get_db
+from ..hashing import (
+    HashPoolBusy, check_password_hash, generate_password_hash
+)
 
-app = Flask(__name__)
-bcrypt = Bcrypt(app)
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+BUSY_MESSAGE = 'Too many logins at the moment, please try again.'
+PASSWD_BUSY_MESSAGE = ('Too many requests at the moment, the password was '
+                       'not changed.')
+
 
 # Runs before the view function, no matter what URL is requested
+# The identity is read from the session and only checked against the
+# database every AUTH_CHECK_INTERVAL seconds. Static files don't need it.
 @bp.before_app_request
 def load_logged_in_user():
     user_id = session.get('user_id')
-
-    if user_id is None:
-        g.user = None
-    else:
-        g.user = get_db().execute(
-            'SELECT id, name FROM table_users WHERE id = ?', (user_id,)
-        ).fetchone()
+    g.user = None
+
+    if user_id is None or request.endpoint == 'static':
+        return
+
+    now = int(time.time())
+    if (session.get('user_name') is not None
+            and now - session.get('auth_checked', 0) <
+            current_app.config['AUTH_CHECK_INTERVAL']):
+        g.user = {'id': user_id, 'name': session['user_name']}
+        return
+
+    user = get_db().execute(
+        'SELECT id, name, authVersion, prefsVersion FROM table_users'
+        ' WHERE id = ?',
+        (user_id,)
+    ).fetchone()
+    # Deleted or the password changed since the login
+    if user is None or user['authVersion'] != session.get('auth_version', 0):
+        session.clear()
+        return
+    # Prefs changed by another session
+    if user['prefsVersion'] != session.get('prefs_version'):
+        session.pop('prefs', None)
+
+    remember_user(user, now)
+    g.user = {'id': user['id'], 'name': user['name']}
+
+
+# Cache the identity of the user in the session
+def remember_user(user, now=None):
+    session['user_id'] = user['id']
+    session['user_name'] = user['name']
+    session['auth_version'] = user['authVersion']
+    session['prefs_version'] = user['prefsVersion']
+    session['auth_checked'] = now if now is not None else int(time.time())
 
 
 def login_required(view):
@@ -48,20 +84,28 @@ def login():
         db = get_db()
         error = None
         user = db.execute(
-            'SELECT id, name, password FROM table_users WHERE name = ?',
+            'SELECT id, name, password, authVersion, prefsVersion'
+            ' FROM table_users WHERE name = ?',
             (username,)
         ).fetchone()
 
         if user is None:
             error = 'Incorrect username.'
-        elif not bcrypt.check_password_hash(
-                user['password'],
-                sha256(password.encode('utf-8')).hexdigest()):
-            error = 'Incorrect password.'
+        else:
+            try:
+                if not check_password_hash(
+                        user['password'],
+                        sha256(password.encode('utf-8')).hexdigest()):
+                    error = 'Incorrect password.'
+            except HashPoolBusy:
+                # Fail fast instead of holding the thread
+                flash(BUSY_MESSAGE)
+                return (render_template('auth/login.html'), 429,
+                        {'Retry-After': '1'})
 
         if error is None:
             session.clear()
-            session['user_id'] = user['id']
+            remember_user(user)
             return redirect(url_for('index'))
 
         flash(error)
@@ -87,17 +131,29 @@ def prefs_update():
         if not pw1 or not pw2 or pw1 != pw2:
             error = 'Passwords are not equal.'
 
+        if error is None:
+            try:
+                pw_hash = generate_password_hash(
+                    sha256(pw1.encode('utf-8')).hexdigest())
+            except HashPoolBusy:
+                error = PASSWD_BUSY_MESSAGE
+
         if error is not None:
             flash(error)
         else:
             db = get_db()
+            # Logs out the other sessions of the user
             db.execute(
-                'UPDATE table_users SET password = ?'
+                'UPDATE table_users SET password = ?,'
+                ' authVersion = authVersion + 1'
                 ' WHERE id = ?',
-                (bcrypt.generate_password_hash(
-                    sha256(pw1.encode('utf-8')).hexdigest()),
-                    g.user['id'],)
+                (pw_hash, g.user['id'],)
             )
             db.commit()
+            remember_user(db.execute(
+                'SELECT id, name, authVersion, prefsVersion FROM table_users'
+                ' WHERE id = ?',
+                (g.user['id'],)
+            ).fetchone())
 
     return redirect(url_for('index'))
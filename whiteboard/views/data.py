@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+from flask import (
+    Blueprint, current_app, g, jsonify, request, send_file,
+    stream_with_context
+)
+
+from ..db import backup_db
+from ..exporter import EXPORTS, iter_export
+from ..importer import get_format, import_scores
+from .auth import login_required
+
+bp = Blueprint('data', __name__, url_prefix='/data')
+
+
+# Import scores from an uploaded file (form field "file") or from the
+# request body with the mimetype text/csv or application/x-ndjson
+@bp.route('/import', methods=('POST',))
+@login_required
+def import_data():
+    upload = request.files.get('file')
+
+    if upload is not None:
+        stream = upload.stream
+        data_format = (request.form.get('format') or
+                       get_format(upload.filename) or
+                       get_format(upload.mimetype))
+    else:
+        stream = request.stream
+        data_format = request.args.get('format') or get_format(
+            request.mimetype)
+
+    if data_format not in ('csv', 'ndjson'):
+        return jsonify(error='Format is invalid.'), 400
+
+    result = import_scores(g.user['id'], stream, data_format)
+
+    return jsonify(result.to_dict())
+
+
+# Download the data of the user as NDJSON (all kinds by default) or as CSV
+# (one kind, scores by default). The admin can download the whole
+# database with format=sqlite.
+@bp.route('/export')
+@login_required
+def export_data():
+    data_format = request.args.get('format', 'ndjson')
+    kinds = request.args.getlist('kind')
+
+    if data_format == 'sqlite':
+        if g.user['id'] != 1:
+            return jsonify(error='User is not allowed to export the db.'), 403
+        return send_db_backup()
+
+    if data_format not in ('csv', 'ndjson'):
+        return jsonify(error='Format is invalid.'), 400
+    if any(kind not in EXPORTS for kind in kinds):
+        return jsonify(error='Kind is invalid.'), 400
+    if data_format == 'csv' and len(kinds) > 1:
+        return jsonify(error='CSV holds one kind only.'), 400
+
+    if data_format == 'csv':
+        mimetype = 'text/csv'
+        filename = 'whiteboard-{}.csv'.format(kinds[0] if kinds else 'scores')
+    else:
+        mimetype = 'application/x-ndjson'
+        filename = 'whiteboard.ndjson'
+
+    return current_app.response_class(
+        stream_with_context(iter_export(g.user['id'], data_format, kinds)),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': 'attachment; filename=' + filename
+        })
+
+
+def send_db_backup():
+    fd, path = tempfile.mkstemp(suffix='.sqlite')
+    os.close(fd)
+    try:
+        backup_db(path)
+        response = send_file(
+            path,
+            mimetype='application/vnd.sqlite3',
+            as_attachment=True,
+            download_name='whiteboard.sqlite',
+            conditional=False)
+    except Exception:
+        os.unlink(path)
+        raise
+
+    response.call_on_close(lambda: os.unlink(path))
+
+    return response
@@ -1,8 +1,10 @@
 from flask import (
-    Blueprint, render_template
+    Blueprint
 )
 
+from ..conditional import conditional
 from ..db import get_db
+from ..streaming import render_list
 from .auth import login_required
 from .user import (
     get_user_prefs
@@ -13,6 +15,7 @@ bp = Blueprint('equipment', __name__, url_prefix='/equipment')
 
 @bp.route('/')
 @login_required
+@conditional
 def list():
     prefs = get_user_prefs()
     sort_pref = ('ASC' if prefs['sortType'] == 0 else 'DESC')
@@ -22,8 +25,8 @@ def list():
         'SELECT id, equipment'
         ' FROM table_equipment'
         ' ORDER BY equipment ' + sort_pref
-    ).fetchall()
-    return render_template(
+    )
+    return render_list(
         'equipment/equipment.html',
         prefs=prefs,
         equipment=equipment)
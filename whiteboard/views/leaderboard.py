@@ -0,0 +1,87 @@
+from flask import (
+    Blueprint, current_app, flash, g, jsonify, redirect, render_template,
+    request, url_for
+)
+
+from ..records import (
+    get_leaderboard, get_leaderboard_key, get_rank, get_user_rank
+)
+from ..utils import decode_cursor, encode_cursor, get_format_timestamp
+from .auth import login_required
+from .user import get_user_timezone
+from .workout import get_workout
+
+bp = Blueprint('leaderboard', __name__, url_prefix='/workout/<int:workout_id>')
+
+
+# Best score per user of a workout, Rx first, then times before reps/load
+# (time capped), then the lowest time or the highest reps/load. Paginated
+# by keyset on the rank order, the "after" argument is the cursor of the
+# last entry of the previous page.
+# Not conditional, the page changes with the scores of other users too.
+@bp.route('/leaderboard')
+@login_required
+def list(workout_id):
+    workout = get_workout(workout_id)
+
+    if workout is None:
+        flash('User or Workout ID is invalid.')
+        return redirect(url_for('workout.list'))
+
+    entries, next_cursor = get_page(workout_id)
+
+    return render_template(
+        'leaderboard/leaderboard.html',
+        workout=workout,
+        entries=entries,
+        next_cursor=next_cursor,
+        rank=get_user_rank(workout_id, g.user['id']),
+        userId=g.user['id'])
+
+
+@bp.route('/leaderboard.json')
+@login_required
+def list_json(workout_id):
+    if get_workout(workout_id) is None:
+        return jsonify(error='User or Workout ID is invalid.'), 404
+
+    entries, next_cursor = get_page(workout_id)
+
+    return jsonify(
+        entries=entries,
+        next_cursor=next_cursor,
+        rank=get_user_rank(workout_id, g.user['id']))
+
+
+# Get the page of the leaderboard following the cursor of the request
+def get_page(workout_id):
+    page_size = current_app.config['LEADERBOARD_PAGE_SIZE']
+    cursor = decode_cursor(request.args.get('after'),
+                           (int, int, float, int, int))
+
+    rows = get_leaderboard(workout_id, cursor, page_size + 1)
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(*get_leaderboard_key(last))
+
+    entries = []
+    if rows:
+        # Ranks are consecutive from the first entry on
+        first = rows[0]
+        rank = get_rank(workout_id, get_leaderboard_key(first))
+        timezone = get_user_timezone()
+        for i, row in enumerate(rows):
+            entries.append({
+                'rank': rank + i,
+                'userId': row['userId'],
+                'name': row['name'],
+                'score': row['bestScore'],
+                'rx': row['bestRx'],
+                'datetime': row['bestDatetime'],
+                'date': get_format_timestamp(row['bestDatetime'], timezone),
+            })
+
+    return entries, next_cursor
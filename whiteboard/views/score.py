@@ -1,12 +1,18 @@
 from flask import (
-    Blueprint, flash, g, redirect, request, url_for
+    Blueprint, current_app, flash, g, jsonify, redirect, request, url_for
 )
 
+from ..changelog import record_change
+from ..conditional import bump_data_version, conditional
 from ..db import get_db
+from ..identity import forget, lookup
+from ..records import add_score, remove_score, update_score
 from ..utils import (
-    is_float, is_timestamp, is_datetime, datetime_to_sec
+    is_number, is_float, is_timestamp, is_datetime, datetime_to_sec,
+    score_to_value, downsample_lttb, get_format_timestamp
 )
 from .auth import login_required
+from .user import get_user_timezone
 from .workout import (
     get_workout
 )
@@ -14,6 +20,41 @@ from .workout import (
 bp = Blueprint('score', __name__, url_prefix='/workout/<int:workout_id>/score')
 
 
+# Score values over time for the chart, downsampled to the given number
+# of points. The optional range start and end are unix timestamps.
+@bp.route('/history.json')
+@login_required
+@conditional
+def history(workout_id):
+    if get_workout(workout_id) is None:
+        return jsonify(error='User or Workout ID is invalid.'), 404
+
+    max_points = current_app.config['SCORE_HISTORY_POINTS']
+    points = request.args.get('points', max_points, type=int)
+    points = min(max(points, 3), max_points)
+    start = request.args.get('start', type=int)
+    end = request.args.get('end', type=int)
+
+    scores = get_db().execute(
+        'SELECT datetime, scoreValue FROM table_workout_score'
+        ' WHERE workoutId = ? AND userId = ? AND scoreValue IS NOT NULL'
+        ' AND datetime >= ? AND datetime <= ?'
+        ' ORDER BY datetime ASC, id ASC',
+        (workout_id, g.user['id'],
+         start if start is not None else -2 ** 63,
+         end if end is not None else 2 ** 63 - 1,)
+    ).fetchall()
+    sampled = downsample_lttb(scores, points)
+    timezone = get_user_timezone()
+
+    return jsonify(
+        total=len(scores),
+        labels=[get_format_timestamp(score[0], timezone)
+                for score in sampled],
+        datetimes=[score[0] for score in sampled],
+        values=[score[1] for score in sampled])
+
+
 # Add workout score
 @bp.route('/add', methods=('GET', 'POST'))
 @login_required
@@ -27,14 +68,15 @@ def add(workout_id):
 
         if not score_value:
             error = 'Score is required.'
-        elif (not score_value.isdigit() and not is_float(score_value)
+        elif (not is_number(score_value) and not is_float(score_value)
               and not is_timestamp(score_value)):
             error = 'Score is invalid.'
 
         if not score_datetime:
             error = 'Datetime is required.'
         else:
-            timestamp_in_sec = datetime_to_sec(score_datetime)
+            timestamp_in_sec = datetime_to_sec(score_datetime,
+                                               get_user_timezone())
             if is_datetime(score_datetime) is False or timestamp_in_sec == -1:
                 error = 'Datetime is invalid.'
 
@@ -51,14 +93,28 @@ def add(workout_id):
             if workout is None:
                 return redirect(url_for('workout.list'))
         else:
+            value, value_type = score_to_value(score_value)
             db = get_db()
-            db.execute(
+            cursor = db.execute(
                 'INSERT INTO table_workout_score'
-                '(userId, workoutId, score, rx, datetime, note)'
-                ' VALUES (?, ?, ?, ?, ?, ?)',
-                (g.user['id'], workout_id, score_value, rx, timestamp_in_sec,
-                 score_note,)
+                '(userId, workoutId, score, scoreValue, scoreType, rx,'
+                ' datetime, note)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (g.user['id'], workout_id, score_value, value, value_type, rx,
+                 timestamp_in_sec, score_note,)
             )
+            add_score({
+                'id': cursor.lastrowid,
+                'userId': g.user['id'],
+                'workoutId': workout_id,
+                'score': score_value,
+                'scoreValue': value,
+                'scoreType': value_type,
+                'rx': rx,
+                'datetime': timestamp_in_sec,
+            })
+            record_change('scores', cursor.lastrowid)
+            bump_data_version()
             db.commit()
 
     return redirect(url_for('workout.info', workout_id=workout_id))
@@ -77,21 +133,25 @@ def update(workout_id, score_id):
 
         if not score_value:
             error = 'Score is required.'
-        elif (not score_value.isdigit() and not is_float(score_value)
+        elif (not is_number(score_value) and not is_float(score_value)
               and not is_timestamp(score_value)):
             error = 'Score is invalid.'
 
         if not score_datetime:
             error = 'Datetime is required.'
         else:
-            timestamp_in_sec = datetime_to_sec(score_datetime)
+            timestamp_in_sec = datetime_to_sec(score_datetime,
+                                               get_user_timezone())
             if is_datetime(score_datetime) is False or timestamp_in_sec == -1:
                 error = 'Datetime is invalid.'
 
+        score = None
         if workout is None:
             error = 'User or Workout ID is invalid.'
-        elif get_score(score_id) is None:
-            error = 'User or Score ID is invalid.'
+        else:
+            score = get_score(score_id)
+            if score is None:
+                error = 'User or Score ID is invalid.'
 
         if 'rx' in request.form:
             rx = 1
@@ -103,14 +163,27 @@ def update(workout_id, score_id):
             if workout is None:
                 return redirect(url_for('workout.list'))
         else:
+            value, value_type = score_to_value(score_value)
             db = get_db()
             db.execute(
                 'UPDATE table_workout_score'
-                ' SET workoutId = ?, score = ?, rx = ?, datetime = ?, note = ?'
+                ' SET workoutId = ?, score = ?, scoreValue = ?, scoreType = ?,'
+                ' rx = ?, datetime = ?, note = ?'
                 ' WHERE id = ? AND userId = ?',
-                (workout_id, score_value, rx, timestamp_in_sec, score_note,
-                 score_id, g.user['id'],)
+                (workout_id, score_value, value, value_type, rx,
+                 timestamp_in_sec, score_note, score_id, g.user['id'],)
             )
+            update_score(score, dict(
+                score,
+                workoutId=workout_id,
+                score=score_value,
+                scoreValue=value,
+                scoreType=value_type,
+                rx=rx,
+                datetime=timestamp_in_sec))
+            forget('score', score_id)
+            record_change('scores', score_id)
+            bump_data_version()
             db.commit()
 
     return redirect(url_for('workout.info', workout_id=workout_id))
@@ -121,11 +194,12 @@ def update(workout_id, score_id):
 @login_required
 def delete(workout_id, score_id):
     workout = get_workout(workout_id)
+    score = get_score(score_id)
     error = None
 
     if workout is None:
         error = 'User or Workout ID is invalid.'
-    elif get_score(score_id) is None:
+    elif score is None:
         error = 'User or Score ID is invalid.'
     else:
         db = get_db()
@@ -134,6 +208,10 @@ def delete(workout_id, score_id):
             ' WHERE id = ? AND userId = ?',
             (score_id, g.user['id'],)
         )
+        remove_score(score)
+        forget('score', score_id)
+        record_change('scores', score_id, deleted=True)
+        bump_data_version()
         db.commit()
 
     if error is not None:
@@ -145,11 +223,7 @@ def delete(workout_id, score_id):
 
 
 def get_score(score_id):
-    score = get_db().execute(
-        'SELECT id, userId, workoutId, score, rx, datetime, note'
-        ' FROM table_workout_score WHERE id = ?',
-        (score_id,)
-    ).fetchone()
+    score = lookup('score', score_id, load_score)
 
     # @todo Raise custom exception here
     if score is None:
@@ -158,3 +232,12 @@ def get_score(score_id):
         return None
 
     return score
+
+
+def load_score(score_id):
+    return get_db().execute(
+        'SELECT id, userId, workoutId, score, scoreValue, scoreType, rx,'
+        ' datetime, note'
+        ' FROM table_workout_score WHERE id = ?',
+        (score_id,)
+    ).fetchone()
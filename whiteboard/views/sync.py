@@ -0,0 +1,48 @@
+import hashlib
+import json
+
+from flask import (
+    Blueprint, current_app, g, jsonify, make_response, render_template,
+    request, url_for
+)
+
+from ..bundles import BUNDLES, asset_urls, get_manifest
+from ..changelog import get_changes
+from ..utils import is_number
+from .auth import login_required
+
+bp = Blueprint('sync', __name__)
+
+
+# Workouts, tags and scores changed since the version of the client's copy
+# (all of them without one). See changelog.get_changes().
+@bp.route('/sync')
+@login_required
+def sync():
+    since = request.args.get('since')
+    if since is not None and not is_number(since):
+        return jsonify(error='Version is invalid.'), 400
+
+    return jsonify(get_changes(
+        g.user['id'], int(since) if since is not None else None,
+        current_app.config['SYNC_PAGE_SIZE']))
+
+
+# The service worker has to be served from the root to control all pages.
+# Its cache name changes with the templates and the built assets, so a
+# deployment replaces the cached app shell.
+@bp.route('/sw.js')
+def service_worker():
+    assets = [url for name in sorted(BUNDLES) for url in asset_urls(name)]
+    assets.append(url_for('static', filename='manifest.webmanifest'))
+    version = hashlib.sha1(json.dumps([
+        current_app.extensions['whiteboard_template_digest'],
+        get_manifest(),
+    ], sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    response = make_response(render_template(
+        'general/sw.js', assets=sorted(set(assets)), version=version))
+    response.mimetype = 'text/javascript'
+    response.cache_control.no_cache = True
+
+    return response
@@ -1,8 +1,13 @@
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, url_for
+    Blueprint, flash, g, redirect, request, url_for
 )
 
+from ..changelog import record_change
+from ..catalog import get_catalog_version
+from ..conditional import bump_data_version, conditional, get_data_version
 from ..db import get_db
+from ..identity import forget, lookup
+from ..streaming import render_list
 from .auth import login_required
 from .user import (
     get_user_prefs
@@ -13,10 +18,14 @@ bp = Blueprint('tag', __name__, url_prefix='/tag')
 
 @bp.route('/')
 @login_required
+@conditional
 def list():
     prefs = get_user_prefs()
     sort_pref = ('ASC' if prefs['sortType'] == 0 else 'DESC')
 
+    # The rendered rows are cached by these versions
+    catalog_version = get_catalog_version()
+    data_version = get_data_version()
     db = get_db()
     tags = db.execute(
         'SELECT id, userId, tag'
@@ -24,11 +33,13 @@ def list():
         ' WHERE (userId = 1 OR userId = ?)'
         ' ORDER BY tag ' + sort_pref,
         (g.user['id'],)
-    ).fetchall()
-    return render_template(
+    )
+    return render_list(
         'tag/tag.html',
         prefs=prefs,
         tags=tags,
+        catalog_version=catalog_version,
+        data_version=data_version,
         userId=g.user['id'])
 
 
@@ -48,12 +59,14 @@ def add():
             flash(error)
         else:
             db = get_db()
-            db.execute(
+            cursor = db.execute(
                 'INSERT INTO table_tags'
                 ' (userId, tag)'
                 ' VALUES (?, ?)',
                 (g.user['id'], tag_name,)
             )
+            record_change('tags', cursor.lastrowid)
+            bump_data_version()
             db.commit()
 
     return redirect(url_for('tag.list'))
@@ -83,6 +96,11 @@ def update(tag_id):
                 ' WHERE id = ? AND userId = ?',
                 (tag_name, tag_id, g.user['id'],)
             )
+            # Workouts carry the names of their tags
+            forget('tag', tag_id)
+            forget('workout')
+            record_change('tags', tag_id)
+            bump_data_version()
             db.commit()
 
     return redirect(url_for('tag.list'))
@@ -103,6 +121,10 @@ def delete(tag_id):
             ' WHERE id = ? AND userId = ?',
             (tag_id, g.user['id'],)
         )
+        forget('tag', tag_id)
+        forget('workout')
+        record_change('tags', tag_id, deleted=True)
+        bump_data_version()
         db.commit()
 
     if error is not None:
@@ -113,12 +135,7 @@ def delete(tag_id):
 
 # Get tag by id
 def get_tag(tag_id, force_user_id=False):
-    db = get_db()
-    tag = db.execute(
-        'SELECT id, userId, tag'
-        ' FROM table_tags WHERE id = ?',
-        (tag_id,)
-    ).fetchone()
+    tag = lookup('tag', tag_id, load_tag)
 
     # @todo Raise custom exception here
     if tag is None:
@@ -132,3 +149,11 @@ def get_tag(tag_id, force_user_id=False):
             return None
 
     return tag
+
+
+def load_tag(tag_id):
+    return get_db().execute(
+        'SELECT id, userId, tag'
+        ' FROM table_tags WHERE id = ?',
+        (tag_id,)
+    ).fetchone()
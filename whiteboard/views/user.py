@@ -1,9 +1,11 @@
 from flask import (
-    Blueprint, flash, g, redirect, request, url_for
+    Blueprint, current_app, flash, g, redirect, request, session, url_for
 )
 from markupsafe import escape
 
+from ..conditional import bump_data_version
 from ..db import get_db
+from ..utils import is_number, is_timezone
 from .auth import login_required
 
 bp = Blueprint('user', __name__, url_prefix='/user')
@@ -16,27 +18,57 @@ def prefs_update(route):
     if request.method == 'POST':
         sort_type = request.form['inputSort']
         filter_type = request.form['inputFilter']
+        # Not part of older forms, keeps the current timezone then
+        timezone = request.form.get('inputTimezone')
         error = None
 
         if not sort_type:
             error = 'Sort type is required.'
-        elif not sort_type.isdigit():
+        elif not is_number(sort_type):
             error = 'Sort type is invalid.'
         if not filter_type:
             error = 'Filter type is required.'
-        elif not filter_type.isdigit():
+        elif not is_number(filter_type):
             error = 'Filter type is invalid.'
+        if timezone is not None:
+            timezone = timezone.strip()
+            if timezone and not is_timezone(timezone):
+                error = 'Timezone is invalid.'
 
         if error is not None:
             flash(error)
         else:
+            prefs = {
+                'sortType': int(sort_type),
+                'filterType': int(filter_type),
+                'timezone': (get_user_prefs()['timezone'] if timezone is None
+                             else timezone or None),
+            }
             db = get_db()
             db.execute(
-                'UPDATE table_user_prefs SET sortType = ?, filterType = ?'
-                ' WHERE userId = ?',
-                (sort_type, filter_type, g.user['id'],)
+                'INSERT INTO table_user_prefs'
+                '(userId, sortType, filterType, timezone)'
+                ' VALUES (?, ?, ?, ?)'
+                ' ON CONFLICT(userId) DO UPDATE SET'
+                ' sortType = excluded.sortType,'
+                ' filterType = excluded.filterType,'
+                ' timezone = excluded.timezone',
+                (g.user['id'], prefs['sortType'], prefs['filterType'],
+                 prefs['timezone'],)
             )
+            # Drops the prefs cached by the other sessions of the user
+            db.execute(
+                'UPDATE table_users SET prefsVersion = prefsVersion + 1'
+                ' WHERE id = ?',
+                (g.user['id'],)
+            )
+            version = db.execute(
+                'SELECT prefsVersion FROM table_users WHERE id = ?',
+                (g.user['id'],)
+            ).fetchone()[0]
+            bump_data_version()
             db.commit()
+            remember_prefs(prefs, version)
 
     if 'workout/' in escape(route):
         return redirect(url_for('workout.list'))
@@ -50,26 +82,48 @@ def prefs_update(route):
         return redirect(url_for('index'))
 
 
+# Prefs of the logged in user, read once per session
 def get_user_prefs():
-    db = get_db()
-    prefs = db.execute(
-        'SELECT sortType, filterType'
+    prefs = session.get('prefs')
+
+    if prefs is None:
+        prefs = load_user_prefs(g.user['id'])
+        remember_prefs(prefs)
+
+    return prefs
+
+
+# Cache the prefs in the session, with the prefsVersion they belong to if
+# it is known
+def remember_prefs(prefs, version=None):
+    session['prefs'] = prefs
+    if version is not None:
+        session['prefs_version'] = version
+
+
+# Timezone of the logged in user, the default one of the config if unset
+def get_user_timezone():
+    if g.user is not None:
+        timezone = get_user_prefs()['timezone']
+        if timezone:
+            return timezone
+
+    return current_app.config['TIMEZONE']
+
+
+# Prefs of a user, the defaults if the user never saved any
+def load_user_prefs(user_id):
+    prefs = get_db().execute(
+        'SELECT sortType, filterType, timezone'
         ' FROM table_user_prefs WHERE userId = ?',
-        (g.user['id'],)
+        (user_id,)
     ).fetchone()
 
     if prefs is None:
-        prefs_default = {
+        return {
             'sortType': 0,
-            'filterType': 0
+            'filterType': 0,
+            'timezone': None
         }
-        db.execute(
-            'INSERT INTO table_user_prefs(userId, sortType, filterType)'
-            ' VALUES (?, ?, ?)',
-            (g.user['id'], prefs_default['sortType'],
-             prefs_default['filterType'])
-        )
-        db.commit()
-        return prefs_default
 
-    return prefs
+    return dict(prefs)
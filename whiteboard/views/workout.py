@@ -1,75 +1,142 @@
+import heapq
+import itertools
 import time
 
 from flask import (
-    Blueprint, flash, g, redirect, render_template, request, url_for
+    Blueprint, current_app, flash, g, jsonify, redirect, render_template,
+    request, url_for
 )
 
+from ..catalog import get_catalog, get_catalog_version
+from ..changelog import record_change, record_changes
+from ..conditional import bump_data_version, conditional, get_data_version
 from ..db import get_db
+from ..identity import forget, lookup
+from ..records import get_record, remove_workout
+from ..streaming import render_list
 from ..utils import (
-    get_format_timestamp, timestamp_to_sec
+    decode_cursor, encode_cursor, get_format_timestamp, is_number
 )
 from .auth import login_required
 from .user import (
-    get_user_prefs
+    get_user_prefs, get_user_timezone
 )
 
 bp = Blueprint('workout', __name__, url_prefix='/workout')
 
 
 # List all workouts
+# The list is paginated by keyset on (name, id), the "after" argument is the
+# cursor of the last workout on the previous page. Default workouts come
+# from the in-process catalog, only the custom ones are read from the db.
 @bp.route('/')
 @login_required
+@conditional
 def list():
-    db = get_db()
     prefs = get_user_prefs()
-    sort_pref = ('ASC' if prefs['sortType'] == 0 else 'DESC')
-
-    if prefs['filterType'] == 0:  # No Filter
-        where_clause = 'userId = 1 OR userId = ?'
-    elif prefs['filterType'] == 1:  # Default only
-        where_clause = 'userId = 1'
-    elif prefs['filterType'] == 2:  # Custom only
-        where_clause = 'userId = ?'
-    else:  # Fallback
-        where_clause = 'userId = 1 OR userId = ?'
-
-    if '?' in where_clause:
-        workouts_res = db.execute(
-            'SELECT id, userId, name, description, datetime'
-            ' FROM table_workout'
-            ' WHERE (' + where_clause + ')'
-            ' ORDER BY name ' + sort_pref,
-            (g.user['id'],)
-        ).fetchall()
+    page_size = current_app.config['WORKOUT_PAGE_SIZE']
+    ascending = prefs['sortType'] == 0
+    cursor = decode_cursor(request.args.get('after'), (str, int))
+
+    # The defaults are the custom workouts of the admin (userId = 1)
+    is_admin = g.user['id'] == 1
+    with_defaults = prefs['filterType'] != 2 or is_admin
+    with_customs = prefs['filterType'] != 1 and not is_admin
+
+    # The rendered rows are cached by these versions
+    data_version = get_data_version()
+    default_workouts = []
+    if with_defaults:
+        catalog = get_catalog()
+        catalog_version = catalog.version
+        default_workouts = catalog.page(cursor, ascending, page_size + 1)
     else:
-        workouts_res = db.execute(
-            'SELECT id, userId, name, description, datetime'
-            ' FROM table_workout'
-            ' WHERE (' + where_clause + ')'
-            ' ORDER BY name ' + sort_pref
-        ).fetchall()
+        catalog_version = get_catalog_version()
 
-    tags = db.execute(
-        'SELECT w.id AS workoutId, t.id AS tagId, t.tag'
-        ' FROM table_workout w, table_tags t'
-        ' INNER JOIN table_workout_tags on table_workout_tags.tagId = t.id'
-        ' AND table_workout_tags.workoutId = w.id'
-        ' WHERE (w.userId = 1 OR w.userId = ?)',
-        (g.user['id'],)
-    ).fetchall()
+    custom_workouts = []
+    if with_customs:
+        custom_workouts = get_custom_workouts(cursor, ascending, page_size + 1)
+
+    merged = heapq.merge(
+        default_workouts, custom_workouts,
+        key=lambda workout: (workout['name'], workout['id']),
+        reverse=not ascending)
+    workouts = [workout for workout in itertools.islice(merged, page_size + 1)]
 
-    workouts = link_workouts_to_tags(workouts_res, tags)
+    next_cursor = None
+    if len(workouts) > page_size:
+        workouts = workouts[:page_size]
+        next_cursor = encode_cursor(workouts[-1]['name'], workouts[-1]['id'])
 
-    return render_template(
+    return render_list(
         'workout/workout.html',
         prefs=prefs,
         workouts=workouts,
+        next_cursor=next_cursor,
+        catalog_version=catalog_version,
+        data_version=data_version,
         userId=g.user['id'])
 
 
+# Get up to limit custom workouts of the user following the keyset cursor
+def get_custom_workouts(cursor, ascending, limit):
+    sort_pref = ('ASC' if ascending else 'DESC')
+    where_clause = 'userId = ?'
+    params = [g.user['id']]
+
+    if cursor is not None:
+        where_clause += ' AND (name, id) ' + ('>' if ascending else '<') \
+            + ' (?, ?)'
+        params.extend(cursor)
+
+    workouts_res = get_db().execute(
+        'SELECT id, userId, name, description, datetime'
+        ' FROM table_workout'
+        ' WHERE ' + where_clause +
+        ' ORDER BY name ' + sort_pref + ', id ' + sort_pref +
+        ' LIMIT ?',
+        params + [limit]
+    ).fetchall()
+
+    return link_workouts_to_tags(
+        workouts_res,
+        get_workouts_tags([workout['id'] for workout in workouts_res]))
+
+
+# Full-text search over the names and descriptions of all workouts
+# visible to the user, best matches first
+@bp.route('/search')
+@login_required
+def search():
+    match = build_search_query(request.args.get('q', ''))
+    page = request.args.get('page', '1')
+    page = int(page) if is_number(page) and int(page) > 0 else 1
+    page_size = current_app.config['SEARCH_PAGE_SIZE']
+
+    if match is None:
+        return jsonify(workouts=[], page=page, next_page=None)
+
+    workouts_res = get_db().execute(
+        'SELECT w.id, w.userId, w.name, w.description'
+        ' FROM table_workout_fts'
+        ' INNER JOIN table_workout w ON w.id = table_workout_fts.rowid'
+        ' WHERE table_workout_fts MATCH ?'
+        ' AND (w.userId = 1 OR w.userId = ?)'
+        ' ORDER BY bm25(table_workout_fts, 10.0, 1.0), w.name'
+        ' LIMIT ? OFFSET ?',
+        (match, g.user['id'], page_size + 1, (page - 1) * page_size,)
+    ).fetchall()
+
+    return jsonify(
+        workouts=[dict(workout) for workout in workouts_res[:page_size]],
+        page=page,
+        next_page=(page + 1 if len(workouts_res) > page_size else None))
+
+
 # Get workout info
 @bp.route('/<int:workout_id>')
 @login_required
+@conditional
 def info(workout_id):
     error = None
     workout = get_workout(workout_id)
@@ -83,6 +150,12 @@ def info(workout_id):
             ' ORDER BY datetime ASC',
             (workout_id, g.user['id'],)
         ).fetchall()
+        # Format the date once per score
+        timezone = get_user_timezone()
+        scores = [dict(score, date=get_format_timestamp(score['datetime'],
+                                                        timezone))
+                  for score in scores]
+        record = get_record(g.user['id'], workout_id)
 
     if error is not None:
         flash(error)
@@ -93,10 +166,9 @@ def info(workout_id):
             'workout/entry.html',
             workout=workout,
             scores=scores,
+            record=record,
             userId=g.user['id'],
-            cur_format_time=get_format_timestamp(),
-            get_format_timestamp=get_format_timestamp,
-            timestamp_to_sec=timestamp_to_sec)
+            timezone=timezone)
 
 
 # Add new workout
@@ -118,23 +190,18 @@ def add():
             flash(error)
         else:
             db = get_db()
-            db.execute(
+            cursor = db.execute(
                 'INSERT INTO table_workout'
                 ' (userId, name, description, datetime)'
                 ' VALUES (?, ?, ?, ?)',
                 (g.user['id'], workout_name, workout_description, time.time(),)
             )
+            record_change('workouts', cursor.lastrowid)
+            bump_data_version()
             db.commit()
-            inserted_workout = db.execute(
-                'SELECT last_insert_rowid()'
-                ' FROM table_workout WHERE userId = ? LIMIT 1',
-                (g.user['id'],)
-            ).fetchone()
 
-            if inserted_workout['last_insert_rowid()']:
-                return redirect(url_for(
-                    'workout.info',
-                    workout_id=inserted_workout['last_insert_rowid()']))
+            return redirect(url_for('workout.info',
+                                    workout_id=cursor.lastrowid))
 
     return redirect(url_for('workout.list'))
 
@@ -169,6 +236,9 @@ def update(workout_id):
                 (workout_name, workout_description, int(time.time()),
                  workout_id, g.user['id'],)
             )
+            forget('workout', workout_id)
+            record_change('workouts', workout_id)
+            bump_data_version()
             db.commit()
 
     return redirect(url_for('workout.info', workout_id=workout_id))
@@ -189,13 +259,22 @@ def delete(workout_id):
             ' WHERE id = ? AND userId = ?',
             (workout_id, g.user['id'],)
         )
-        db.commit()
+        record_change('workouts', workout_id, deleted=True)
+        record_changes('scores', [score['id'] for score in db.execute(
+            'SELECT id FROM table_workout_score'
+            ' WHERE workoutId = ? AND userId = ?',
+            (workout_id, g.user['id'],)
+        )], deleted=True)
         # @todo: use current delete_score function
         db.execute(
             'DELETE FROM table_workout_score'
             ' WHERE workoutId = ? AND userId = ?',
             (workout_id, g.user['id'],)
         )
+        remove_workout(g.user['id'], workout_id)
+        forget('workout', workout_id)
+        forget('score')
+        bump_data_version()
         db.commit()
 
     if error is not None:
@@ -206,27 +285,12 @@ def delete(workout_id):
 
 # Get the workout and tag list from db
 def get_workout(workout_id, force_user_id=False):
-    db = get_db()
-    workout_res = db.execute(
-        'SELECT id, userId, name, description, datetime'
-        ' FROM table_workout WHERE id = ?',
-        (workout_id,)
-    ).fetchone()
+    workout = lookup('workout', workout_id, load_workout)
 
     # @todo Raise custom exception here
-    if workout_res is None:
+    if workout is None:
         return None
 
-    tags = db.execute(
-        'SELECT w.id AS workoutId, t.id AS tagId, t.tag'
-        ' FROM table_workout w, table_tags t'
-        ' INNER JOIN table_workout_tags on table_workout_tags.tagId = t.id'
-        ' AND table_workout_tags.workoutId = w.id'
-        ' WHERE w.id = ?',
-        (workout_id,)
-    ).fetchall()
-
-    workout = link_workout_to_tags(workout_res, tags)
     if force_user_id:
         if workout['userId'] != g.user['id']:
             return None
@@ -237,24 +301,67 @@ def get_workout(workout_id, force_user_id=False):
     return workout
 
 
-# Add tags to all  workouts
+# Get the workout with its tags, from the catalog if it is a default one
+def load_workout(workout_id):
+    workout = get_catalog().get(workout_id)
+    if workout is not None:
+        return dict(workout)
+
+    workout = get_db().execute(
+        'SELECT id, userId, name, description, datetime'
+        ' FROM table_workout WHERE id = ?',
+        (workout_id,)
+    ).fetchone()
+    if workout is None:
+        return None
+
+    return link_workout_to_tags(workout, get_workouts_tags([workout_id]))
+
+
+# Build a FTS5 query from the search input where every word has to match
+# as prefix, e.g. 'fran thru' -> '"fran"* "thru"*'
+# Returns None if there is nothing to search for
+def build_search_query(value):
+    terms = ['"' + term + '"*' for term in value.replace('"', ' ').split()]
+    if not terms:
+        return None
+
+    return ' '.join(terms)
+
+
+# Get the tags of the given workouts
+def get_workouts_tags(workout_ids):
+    if not workout_ids:
+        return []
+
+    return get_db().execute(
+        'SELECT wt.workoutId, t.id AS tagId, t.tag'
+        ' FROM table_workout_tags wt'
+        ' INNER JOIN table_tags t ON t.id = wt.tagId'
+        ' WHERE wt.workoutId IN (' + ', '.join('?' * len(workout_ids)) + ')',
+        workout_ids
+    ).fetchall()
+
+
+# Add tags to all workouts
+# The tags are grouped by workout id in a single pass, so this is linear in
+# the number of workouts and tags.
 def link_workouts_to_tags(workouts, tags):
+    tags_by_workout = {}
+    for tag in tags:
+        tags_by_workout.setdefault(tag['workoutId'], []).append(
+            {'tagId': tag['tagId'], 'tag': tag['tag']}
+        )
+
     workouts_res = []
     for workout in workouts:
-        workouts_res.append(link_workout_to_tags(workout, tags))
+        workout_res = dict(workout)
+        workout_res['tags'] = tags_by_workout.get(workout['id'], [])
+        workouts_res.append(workout_res)
 
     return workouts_res
 
 
 # Add tags to the workout entry
 def link_workout_to_tags(workout, tags):
-    workout_tags = []
-    for tag in tags:
-        if tag['workoutId'] == workout['id']:
-            workout_tags.append(
-                {'tagId': tag['tagId'], 'tag': tag['tag']}
-            )
-    workout_res = dict(workout)
-    workout_res['tags'] = workout_tags
-
-    return workout_res
+    return link_workouts_to_tags([workout], tags)[0]